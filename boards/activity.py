@@ -0,0 +1,78 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from .models import Activity
+
+logger = logging.getLogger(__name__)
+
+
+# Guardo las actividades en bloque y anoto sus acciones en cada tablero (filtro del panel).
+def save_activities(activities):
+    Activity.objects.bulk_create(activities)
+    actions = {}
+    for activity in activities:
+        actions.setdefault(activity.board_id, (activity.board, set()))[1].add(activity.action)
+    for board, board_actions in actions.values():
+        board.add_activity_actions(board_actions)
+
+
+# Actividades de la petición en curso; se guardan todas juntas al terminarla.
+class ActivityBuffer:
+    def __init__(self):
+        self.pending = []
+        self.closed = False
+
+    def add(self, activity):
+        # Si la transacción se confirma después de cerrar el buffer, la guardo sin esperar.
+        if self.closed:
+            save_activities([activity])
+        else:
+            self.pending.append(activity)
+
+    def flush(self):
+        batch, self.pending = self.pending, []
+        if batch:
+            save_activities(batch)
+        return len(batch)
+
+
+# Buffer de la petición en curso (None: fuera de una petición, p. ej. en comandos).
+_buffer = ContextVar("activity_buffer", default=None)
+
+
+# Solo entra en el buffer si su transacción se confirma: un rollback no deja auditoría fantasma.
+def queue_activity(activity):
+    buffer = _buffer.get()
+    if buffer is None:
+        transaction.on_commit(lambda: save_activities([activity]))
+    else:
+        transaction.on_commit(lambda: buffer.add(activity))
+    return activity
+
+
+@contextmanager
+def buffered_activities():
+    buffer = ActivityBuffer()
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        try:
+            buffer.flush()
+        except Exception:
+            logger.exception("No se pudo guardar la actividad del tablero")
+        buffer.closed = True
+        _buffer.reset(token)
+
+
+# Envuelvo cada petición en un buffer de actividad.
+class ActivityBufferMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_activities():
+            return self.get_response(request)
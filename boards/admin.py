@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Board, TaskList, Task, Tag, BoardMembership, UserProfile, Activity
+from .models import Board, TaskList, Task, Tag, BoardMembership, UserProfile, Activity, OutboundEmail, ExportJob, ActivityArchive
 
 # Registro entidades base para administrarlas desde Django admin.
 admin.site.register(Board)
@@ -26,11 +26,37 @@ class UserProfileAdmin(admin.ModelAdmin):
 class ActivityAdmin(admin.ModelAdmin):
     list_display = ("board", "user", "action", "created_at")
     list_filter = ("board", "action")
-    search_fields = ("board__title", "user__username", "action", "details")
+    search_fields = ("board__title", "user__username", "details")
 
 
 # Configuro el catálogo de etiquetas disponible en tareas.
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
-    # Muestro nombre y color directamente en el listado del admin.
-    list_display = ("name", "color")
+    # Muestro nombre, color y tablero (vacío si es global) directamente en el listado del admin.
+    list_display = ("name", "color", "board")
+    list_filter = (("board", admin.EmptyFieldListFilter),)
+    search_fields = ("name",)
+
+
+# Configuro la cola de emails salientes para revisar fallos y reintentos.
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "last_error")
+
+
+# Reviso las exportaciones generadas y sus errores.
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("board", "kind", "change_version", "compressed", "status", "finished_at")
+    list_filter = ("status", "kind")
+    search_fields = ("board__title", "error")
+
+
+# Dejo ver qué partes de actividad se han archivado y cuántas filas tiene cada una.
+@admin.register(ActivityArchive)
+class ActivityArchiveAdmin(admin.ModelAdmin):
+    list_display = ("board", "month", "row_count", "first_created_at", "last_created_at")
+    list_filter = ("month",)
+    search_fields = ("board__title",)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BoardsConfig(AppConfig):
     # Defino la configuración base para que Django cargue esta app.
     name = 'boards'
+
+    def ready(self):
+        # Registro señales de invalidación de cachés.
+        from . import signals  # noqa: F401
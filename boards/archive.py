@@ -0,0 +1,100 @@
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Activity, ActivityArchive, Board
+
+# Filas movidas por transacción al archivar.
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def retention_cutoff(days=None, now=None):
+    days = settings.ACTIVITY_RETENTION_DAYS if days is None else days
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archived_activity_dict(activity):
+    return {
+        "id": activity.id,
+        "action": activity.action,
+        "details": activity.details,
+        "user_id": activity.user_id,
+        "user": activity.user.username if activity.user else "",
+        "created_at": activity.created_at.isoformat(),
+    }
+
+
+def _month_key(activity):
+    return activity.board_id, activity.created_at.date().replace(day=1)
+
+
+# Escribo una parte (filas de más reciente a más antigua) y la registro.
+def _write_archive(board_id, month, activities):
+    with tempfile.TemporaryFile() as tmp:
+        with gzip.GzipFile(fileobj=tmp, mode="wb") as out:
+            for activity in activities:
+                out.write(json.dumps(archived_activity_dict(activity)).encode("utf-8") + b"\n")
+        tmp.seek(0)
+        archive = ActivityArchive(
+            board_id=board_id,
+            month=month,
+            row_count=len(activities),
+            first_created_at=activities[-1].created_at,
+            last_created_at=activities[0].created_at,
+        )
+        archive.file.save(
+            f"board_{board_id}_{month:%Y_%m}_{activities[-1].id}.ndjson.gz", File(tmp), save=False
+        )
+    archive.save()
+    return archive
+
+
+# Muevo a ficheros la actividad anterior a `cutoff` por lotes: cada lote escribe sus partes,
+# borra las filas y recalcula las acciones de sus tableros en la misma transacción. Si algo
+# falla, borro los ficheros ya escritos.
+def archive_activity(cutoff, batch_size=None, progress=None):
+    batch_size = batch_size or ARCHIVE_BATCH_SIZE
+    archived = 0
+    while True:
+        written = []
+        try:
+            with transaction.atomic():
+                batch = list(
+                    Activity.objects.filter(created_at__lt=cutoff)
+                    .select_related("user")
+                    .order_by("board_id", "-created_at", "-id")[:batch_size]
+                )
+                if not batch:
+                    break
+                for (board_id, month), rows in groupby(batch, key=_month_key):
+                    written.append(_write_archive(board_id, month, list(rows)))
+                Activity.objects.filter(pk__in=[activity.pk for activity in batch]).delete()
+                # El filtro del panel solo debe ofrecer acciones que sigan en la tabla.
+                for board_id in {activity.board_id for activity in batch}:
+                    Board(pk=board_id).recount_activity_actions()
+        except Exception:
+            for archive in written:
+                archive.file.delete(save=False)
+            raise
+        archived += len(batch)
+        if progress:
+            progress(archived)
+    return archived
+
+
+# Leo la actividad archivada de un tablero, de más reciente a más antigua (como el feed),
+# opcionalmente filtrada por código de acción.
+def iter_archived_activity(board, action=None):
+    for archive in board.activity_archives.order_by("-last_created_at", "-id").iterator():
+        with archive.file.open("rb") as raw, gzip.GzipFile(fileobj=raw) as lines:
+            for line in lines:
+                data = json.loads(line)
+                if action is None or data["action"] == action:
+                    yield data
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import prefetch_related_objects
+from django.template.backends.utils import csrf_input
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+# Marcador del campo CSRF dentro del HTML cacheado: el token es de cada sesión, así que lo
+# pongo al servir la tarjeta y no al guardarla.
+CSRF_PLACEHOLDER = mark_safe("<!--csrf-->")
+
+
+# Devuelvo el backend configurado para los fragmentos de tarjetas y cabeceras.
+def _cards_cache():
+    return caches[getattr(settings, "CARD_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "CARD_CACHE_TIMEOUT", 3600)
+
+
+# La clave lleva las dos versiones de la fila (`version` sube al editar o mover y
+# `changed_version` con cualquier cambio registrado) y `updated_at`, que cambia con cualquier
+# save() aunque venga del admin o de un comando. Lo que no pasa por save() (borrar una etiqueta
+# o un usuario) lo marcan las señales. Una tarea cambiada simplemente pide otra clave.
+def _stamp(obj):
+    return f"{obj.version}:{obj.changed_version}:{obj.updated_at.timestamp()}"
+
+
+def task_card_key(task, role):
+    mode = "view" if role == "viewer" else "edit"
+    return f"boards:card:{task.pk}:{_stamp(task)}:{mode}"
+
+
+def list_header_key(task_list):
+    return f"boards:list-header:{task_list.pk}:{_stamp(task_list)}"
+
+
+# Leo de una vez los fragmentos ya cacheados, renderizo los que faltan (tras `prepare`) y los
+# guardo de una vez. Con CARD_CACHE_TIMEOUT=0 renderizo siempre.
+def _cached_fragments(objects, key_func, render, prepare=None):
+    timeout = _timeout()
+    keys = {obj.pk: key_func(obj) for obj in objects}
+    cache = _cards_cache()
+    cached = cache.get_many(keys.values()) if timeout else {}
+    missing = [obj for obj in objects if keys[obj.pk] not in cached]
+    if missing and prepare:
+        prepare(missing)
+    rendered = {keys[obj.pk]: render(obj) for obj in missing}
+    if rendered and timeout:
+        cache.set_many(rendered, timeout)
+    cached.update(rendered)
+    return {pk: cached[key] for pk, key in keys.items()}
+
+
+# Devuelvo {task_id: html} de tarjetas. Las tareas pueden venir sin asignados ni etiquetas:
+# solo los cargo (en dos consultas) para las que no estaban en caché.
+def render_task_cards(request, tasks, role):
+    tasks = list(tasks)
+    fragments = _cached_fragments(
+        tasks,
+        lambda task: task_card_key(task, role),
+        lambda task: render_to_string(
+            "boards/_task_card.html",
+            {"task": task, "user_role": role, "csrf_field": CSRF_PLACEHOLDER},
+        ),
+        prepare=lambda missing: prefetch_related_objects(missing, "assigned_to", "tags"),
+    )
+    token = csrf_input(request) if request is not None else ""
+    return {pk: mark_safe(html.replace(CSRF_PLACEHOLDER, token)) for pk, html in fragments.items()}
+
+
+def render_list_headers(task_lists):
+    return {
+        pk: mark_safe(html)
+        for pk, html in _cached_fragments(
+            list(task_lists),
+            list_header_key,
+            lambda task_list: render_to_string("boards/_list_header.html", {"list": task_list}),
+        ).items()
+    }
@@ -0,0 +1,264 @@
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from email.mime.image import MIMEImage
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+# Leo el logo una sola vez por proceso. Cacheo solo los bytes: una parte MIME pertenece a un
+# único mensaje (y los hilos del worker los serializan a la vez), así que la creo en cada uno.
+@functools.lru_cache(maxsize=1)
+def get_logo_bytes():
+    logo_path = os.path.join(settings.BASE_DIR, "static", "img", "taskmaster.png")
+    try:
+        with open(logo_path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def get_logo_mime():
+    data = get_logo_bytes()
+    if data is None:
+        return None
+    img = MIMEImage(data)
+    img.add_header("Content-ID", "<taskmaster-logo>")
+    img.add_header("Content-Disposition", "inline", filename="taskmaster.png")
+    return img
+
+
+# Construyo el email HTML con el logo embebido que usan todas las plantillas.
+def build_html_email(subject, text_body, html_body, to_emails, from_email=None, connection=None):
+    email = EmailMultiAlternatives(
+        subject,
+        text_body,
+        from_email or settings.DEFAULT_FROM_EMAIL,
+        to_emails,
+        connection=connection,
+    )
+    if html_body:
+        email.attach_alternative(html_body, "text/html")
+
+    logo = get_logo_mime()
+    if logo is not None:
+        email.attach(logo)
+
+    return email
+
+
+# Centralizo aquí el envío: por defecto solo encolo y el worker hace el SMTP.
+# Si recibo un lote, acumulo el mensaje y lo envío junto al resto al cerrarlo.
+def send_html_email(subject, text_body, html_body, to_emails, batch=None, from_email=None):
+    if batch is not None:
+        batch.add(subject, text_body, html_body, to_emails, from_email=from_email)
+        return None
+    if getattr(settings, "EMAIL_QUEUE_ENABLED", True):
+        return enqueue_html_email(subject, text_body, html_body, to_emails, from_email=from_email)
+    build_html_email(subject, text_body, html_body, to_emails, from_email=from_email).send(
+        fail_silently=False
+    )
+    return None
+
+
+# Envío muchos mensajes de una vez: un INSERT en cola o una única sesión SMTP.
+def send_html_emails(messages):
+    messages = list(messages)
+    if not messages:
+        return 0
+    if getattr(settings, "EMAIL_QUEUE_ENABLED", True):
+        OutboundEmail.objects.bulk_create(
+            [
+                OutboundEmail(
+                    subject=subject[:255],
+                    text_body=text_body,
+                    html_body=html_body or "",
+                    to_emails=list(to_emails),
+                    from_email=from_email or "",
+                )
+                for subject, text_body, html_body, to_emails, from_email in messages
+            ]
+        )
+        return len(messages)
+    connection = get_connection(fail_silently=False)
+    emails = [
+        build_html_email(*message, connection=connection) for message in messages
+    ]
+    return connection.send_messages(emails)
+
+
+# Acumulo mensajes durante una operación y los envío juntos al salir del bloque.
+class EmailBatch:
+    def __init__(self):
+        self.messages = []
+
+    def add(self, subject, text_body, html_body, to_emails, from_email=None):
+        self.messages.append((subject, text_body, html_body, list(to_emails), from_email))
+
+    def flush(self):
+        messages, self.messages = self.messages, []
+        return send_html_emails(messages)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def __len__(self):
+        return len(self.messages)
+
+
+def enqueue_html_email(subject, text_body, html_body, to_emails, from_email=None):
+    return OutboundEmail.objects.create(
+        subject=subject[:255],
+        text_body=text_body,
+        html_body=html_body or "",
+        to_emails=list(to_emails),
+        from_email=from_email or "",
+    )
+
+
+# Calculo el backoff exponencial entre reintentos (con tope).
+def retry_delay(attempts):
+    base = getattr(settings, "EMAIL_QUEUE_RETRY_BASE_SECONDS", 60)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 6 * 60 * 60))
+
+
+# Reservo un lote de emails listos; SKIP LOCKED permite varios workers en paralelo.
+def claim_email_batch(batch_size):
+    now = timezone.now()
+    stale_lock = now - timedelta(
+        seconds=getattr(settings, "EMAIL_QUEUE_LOCK_TIMEOUT", 10 * 60)
+    )
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="pending", next_attempt_at__lte=now)
+                | Q(status="sending", locked_at__lt=stale_lock)
+            )
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        OutboundEmail.objects.filter(id__in=ids).update(status="sending", locked_at=now)
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by("next_attempt_at", "id"))
+
+
+def _error_text(exc):
+    return str(exc) or exc.__class__.__name__
+
+
+# Cada hilo abre una sola conexión SMTP y envía su parte del lote por ella.
+def _deliver_chunk(chunk):
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.exception("No se pudo abrir la conexión SMTP")
+        return [_error_text(exc)] * len(chunk)
+
+    errors = []
+    try:
+        for outbound in chunk:
+            try:
+                connection.send_messages([
+                    build_html_email(
+                        outbound.subject,
+                        outbound.text_body,
+                        outbound.html_body,
+                        outbound.to_emails,
+                        from_email=outbound.from_email or None,
+                        connection=connection,
+                    )
+                ])
+            except Exception as exc:
+                logger.exception("Fallo al enviar email encolado %s", outbound.pk)
+                errors.append(_error_text(exc))
+            else:
+                errors.append(None)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.exception("Fallo al cerrar la conexión SMTP")
+    return errors
+
+
+# Proceso un lote: envío en paralelo y guardo resultados con un solo bulk_update.
+def process_email_queue(batch_size=50, workers=4, max_attempts=5):
+    batch = claim_email_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    workers = max(1, min(workers, len(batch)))
+    chunks = [batch[i::workers] for i in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        chunk_errors = list(pool.map(_deliver_chunk, chunks))
+    # Reordeno los resultados según el reparto intercalado de cada hilo.
+    errors = [None] * len(batch)
+    for offset, chunk_result in enumerate(chunk_errors):
+        errors[offset::workers] = chunk_result
+
+    now = timezone.now()
+    sent = failed = 0
+    for outbound, error in zip(batch, errors):
+        outbound.locked_at = None
+        if error is None:
+            outbound.status = "sent"
+            outbound.sent_at = now
+            outbound.last_error = ""
+            # El cuerpo puede llevar enlaces de un solo uso (reset de contraseña): una vez
+            # enviado no lo guardo.
+            outbound.text_body = ""
+            outbound.html_body = ""
+            sent += 1
+            continue
+        outbound.attempts += 1
+        outbound.last_error = error
+        failed += 1
+        if outbound.attempts >= max_attempts:
+            outbound.status = "failed"
+        else:
+            outbound.status = "pending"
+            outbound.next_attempt_at = now + retry_delay(outbound.attempts)
+
+    OutboundEmail.objects.bulk_update(
+        batch,
+        [
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "locked_at",
+            "last_error",
+            "sent_at",
+            "text_body",
+            "html_body",
+        ],
+    )
+    return sent, failed
+
+
+# Borro los emails ya resueltos (enviados o fallidos definitivamente) pasada la retención.
+def prune_email_queue(retention_days=None):
+    if retention_days is None:
+        retention_days = getattr(settings, "EMAIL_QUEUE_RETENTION_DAYS", 7)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = OutboundEmail.objects.filter(
+        status__in=["sent", "failed"], created_at__lt=cutoff
+    ).delete()
+    return deleted
@@ -0,0 +1,310 @@
+import csv
+import gzip
+import json
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .archive import iter_archived_activity
+from .models import Activity, ExportJob, Task
+
+logger = logging.getLogger(__name__)
+
+# Filas leídas por consulta al exportar; el prefetch se resuelve por bloque.
+EXPORT_CHUNK_SIZE = 500
+
+TASK_CSV_HEADER = [
+    "id",
+    "title",
+    "description",
+    "priority",
+    "due_date",
+    "list",
+    "list_id",
+    "created_by",
+    "created_by_id",
+    "assigned_to",
+    "assigned_to_ids",
+    "tags",
+    "tags_ids",
+    "created_at",
+    "position",
+]
+
+ACTIVITY_CSV_HEADER = ["id", "action", "details", "user", "created_at"]
+
+ACTION_LABELS = dict(Activity.ACTION_CHOICES)
+
+
+# Uso un "buffer" que devuelve lo escrito para que csv.writer produzca líneas sueltas.
+class Echo:
+    def write(self, value):
+        return value
+
+
+# Agrupo las tareas a exportar con todo lo que necesita cada fila.
+def export_tasks_queryset(board):
+    return (
+        Task.objects.filter(task_list__board=board)
+        .select_related("task_list", "created_by")
+        .prefetch_related("assigned_to", "tags")
+        .order_by("task_list__position", "position", "id")
+    )
+
+
+def export_activity_queryset(board, action=None):
+    activities = board.activities.select_related("user")
+    if action not in (None, ""):
+        activities = activities.filter(action=int(action))
+    return activities
+
+
+def task_csv_row(t):
+    assigned_to = list(t.assigned_to.all())
+    tags = list(t.tags.all())
+    return [
+        t.id,
+        t.title,
+        t.description,
+        t.priority,
+        t.due_date.isoformat() if t.due_date else "",
+        t.task_list.title,
+        t.task_list.id,
+        t.created_by.username if t.created_by else "",
+        t.created_by.id if t.created_by else "",
+        ", ".join(u.username for u in assigned_to),
+        ", ".join(str(u.id) for u in assigned_to),
+        ", ".join(tag.name for tag in tags),
+        ", ".join(str(tag.id) for tag in tags),
+        t.created_at.isoformat() if t.created_at else "",
+        t.position,
+    ]
+
+
+def task_json_dict(t):
+    return {
+        "id": t.id,
+        "title": t.title,
+        "description": t.description,
+        "priority": t.priority,
+        "due_date": t.due_date.isoformat() if t.due_date else None,
+        "list": {"id": t.task_list.id, "title": t.task_list.title},
+        "created_by": {
+            "id": t.created_by.id,
+            "username": t.created_by.username,
+        } if t.created_by else None,
+        "assigned_to": [
+            {"id": u.id, "username": u.username} for u in t.assigned_to.all()
+        ],
+        "tags": [{"id": tag.id, "name": tag.name} for tag in t.tags.all()],
+        "created_at": t.created_at.isoformat() if t.created_at else None,
+        "position": t.position,
+    }
+
+
+def activity_csv_row(a):
+    return [
+        a.id,
+        a.get_action_display(),
+        a.details,
+        a.user.username if a.user else "",
+        a.created_at.isoformat() if a.created_at else "",
+    ]
+
+
+# Genero el CSV línea a línea leyendo el queryset por bloques: memoria constante.
+def iter_csv(header, queryset, build_row, chunk_size=None):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for obj in queryset.iterator(chunk_size=chunk_size or EXPORT_CHUNK_SIZE):
+        yield writer.writerow(build_row(obj))
+
+
+def archived_activity_csv_row(data):
+    return [
+        data["id"],
+        ACTION_LABELS.get(data["action"], ""),
+        data["details"],
+        data["user"],
+        data["created_at"],
+    ]
+
+
+# Actividad completa del tablero: primero la de la tabla y después la archivada (más antigua),
+# de modo que la exportación no cambia al archivar.
+def iter_activity_csv(board, action=None, chunk_size=None):
+    code = None if action in (None, "") else int(action)
+    yield from iter_csv(
+        ACTIVITY_CSV_HEADER, export_activity_queryset(board, code), activity_csv_row, chunk_size
+    )
+    writer = csv.writer(Echo())
+    for data in iter_archived_activity(board, code):
+        yield writer.writerow(archived_activity_csv_row(data))
+
+
+# Escribo el sobre {"board": ..., "tasks": [...]} a trozos, serializando tarea a tarea.
+def iter_tasks_json(board, queryset, chunk_size=None):
+    yield '{"board": %s, "tasks": [' % json.dumps(board.title)
+    separator = ""
+    for task in queryset.iterator(chunk_size=chunk_size or EXPORT_CHUNK_SIZE):
+        yield separator + json.dumps(task_json_dict(task))
+        separator = ", "
+    yield "]}"
+
+
+# NDJSON: una tarea por línea, cómodo para consumirlo también en streaming.
+def iter_tasks_ndjson(queryset, chunk_size=None):
+    for task in queryset.iterator(chunk_size=chunk_size or EXPORT_CHUNK_SIZE):
+        yield json.dumps(task_json_dict(task)) + "\n"
+
+
+# Describo cada exportación: nombre de fichero, content type y generador del contenido.
+EXPORT_KINDS = {
+    "tasks_csv": ("tasks.csv", "text/csv"),
+    "tasks_json": ("tasks.json", "application/json"),
+    "tasks_ndjson": ("tasks.ndjson", "application/x-ndjson"),
+    "activity_csv": ("activity.csv", "text/csv"),
+}
+
+
+def iter_export_content(board, kind, params=""):
+    if kind == "tasks_csv":
+        return iter_csv(TASK_CSV_HEADER, export_tasks_queryset(board), task_csv_row)
+    if kind == "tasks_json":
+        return iter_tasks_json(board, export_tasks_queryset(board))
+    if kind == "tasks_ndjson":
+        return iter_tasks_ndjson(export_tasks_queryset(board))
+    if kind == "activity_csv":
+        return iter_activity_csv(board, params)
+    raise ValueError(f"Tipo de exportación desconocido: {kind}")
+
+
+def export_filename(job):
+    suffix, _ = EXPORT_KINDS[job.kind]
+    name = f"board_{job.board_id}_{suffix}"
+    return f"{name}.gz" if job.compressed else name
+
+
+def export_content_type(job):
+    if job.compressed:
+        return "application/gzip"
+    return EXPORT_KINDS[job.kind][1]
+
+
+# Reutilizo el artefacto de la versión actual del tablero o pido uno nuevo al worker. La
+# actividad se guarda al terminar la petición que subió la versión, así que las exportaciones
+# de actividad también dependen de la última fila guardada.
+def request_export(board, kind, params="", compressed=False, user=None):
+    lookup = {
+        "board": board,
+        "kind": kind,
+        "params": params,
+        "compressed": compressed,
+        "change_version": board.change_version,
+        "last_activity_id": latest_activity_id(board) if kind == "activity_csv" else 0,
+    }
+    job = ExportJob.objects.filter(**lookup).first()
+    if job is None:
+        try:
+            with transaction.atomic():
+                job = ExportJob.objects.create(requested_by=user, **lookup)
+        except IntegrityError:
+            # Otra petición creó el mismo trabajo a la vez.
+            job = ExportJob.objects.get(**lookup)
+    if job.status == "failed":
+        ExportJob.objects.filter(pk=job.pk, status="failed").update(status="pending", error="")
+        job.status = "pending"
+    return job
+
+
+def latest_activity_id(board):
+    return board.activities.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+# Escribo la exportación en un temporal (gzip opcional) y la guardo bajo MEDIA_ROOT.
+def build_export_file(job):
+    content = iter_export_content(job.board, job.kind, job.params)
+    with tempfile.TemporaryFile() as tmp:
+        if job.compressed:
+            with gzip.GzipFile(fileobj=tmp, mode="wb") as out:
+                for chunk in content:
+                    out.write(chunk.encode("utf-8"))
+        else:
+            for chunk in content:
+                tmp.write(chunk.encode("utf-8"))
+        tmp.seek(0)
+        job.file.save(f"{job.pk}_{export_filename(job)}", File(tmp), save=False)
+
+
+# Reservo el siguiente trabajo pendiente; SKIP LOCKED permite varios workers a la vez.
+def claim_export_job():
+    now = timezone.now()
+    stale_lock = now - timedelta(
+        seconds=getattr(settings, "EXPORT_JOB_LOCK_TIMEOUT", 30 * 60)
+    )
+    with transaction.atomic():
+        job = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status="pending") | Q(status="running", started_at__lt=stale_lock))
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = "running"
+        job.started_at = now
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+# Borro artefactos de versiones anteriores: ya no se van a servir.
+def prune_export_artifacts(job):
+    stale = ExportJob.objects.filter(
+        board_id=job.board_id,
+        kind=job.kind,
+        params=job.params,
+        compressed=job.compressed,
+    ).filter(
+        Q(change_version__lt=job.change_version)
+        | Q(change_version=job.change_version, last_activity_id__lt=job.last_activity_id)
+    ).exclude(status="running")
+    # El fichero lo borra el post_delete de ExportJob al confirmarse el borrado.
+    stale.delete()
+
+
+def run_export_job(job):
+    try:
+        build_export_file(job)
+    except Exception as exc:
+        logger.exception("Fallo al generar la exportación %s", job.pk)
+        job.status = "failed"
+        job.error = str(exc) or exc.__class__.__name__
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return False
+    job.status = "done"
+    job.error = ""
+    job.finished_at = timezone.now()
+    job.save(update_fields=["file", "status", "error", "finished_at"])
+    prune_export_artifacts(job)
+    return True
+
+
+# Proceso hasta `limit` trabajos y devuelvo (generados, fallidos).
+def process_export_jobs(limit=10):
+    done = failed = 0
+    for _ in range(limit):
+        job = claim_export_job()
+        if job is None:
+            break
+        if run_export_job(job):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
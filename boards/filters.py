@@ -0,0 +1,174 @@
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import urlencode
+
+from .models import Task
+
+TAG_MODE_ANY = "any"
+TAG_MODE_ALL = "all"
+TAG_MODES = [
+    (TAG_MODE_ANY, "Alguna"),
+    (TAG_MODE_ALL, "Todas"),
+]
+
+PRIORITIES = {choice for choice, _ in Task.PRIORITY_CHOICES}
+
+
+def _ids(values):
+    return sorted({int(value) for value in values if value.isdigit()})
+
+
+def _date(value):
+    try:
+        return parse_date(value or "")
+    except ValueError:
+        return None
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+# Filtros de tareas leídos de la query string. Los de relaciones (asignados, etiquetas) van
+# con EXISTS para no duplicar filas al unir tablas.
+@dataclass
+class TaskFilters:
+    assignees: list = field(default_factory=list)
+    priorities: list = field(default_factory=list)
+    tags: list = field(default_factory=list)
+    tag_mode: str = TAG_MODE_ANY
+    due_from: object = None
+    due_to: object = None
+    creators: list = field(default_factory=list)
+    lists: list = field(default_factory=list)
+
+    # Ignoro valores mal formados: un enlace antiguo no debe romper el tablero.
+    @classmethod
+    def from_query(cls, params):
+        tag_mode = params.get("tag_mode")
+        return cls(
+            assignees=_ids(params.getlist("assignee")),
+            priorities=sorted(set(params.getlist("priority")) & PRIORITIES),
+            tags=_ids(params.getlist("tag")),
+            tag_mode=tag_mode if tag_mode == TAG_MODE_ALL else TAG_MODE_ANY,
+            due_from=_date(params.get("due_from")),
+            due_to=_date(params.get("due_to")),
+            creators=_ids(params.getlist("created_by")),
+            lists=_ids(params.getlist("list")),
+        )
+
+    def __bool__(self):
+        return any(getattr(self, f.name) for f in fields(self) if f.name != "tag_mode")
+
+    # Copia sin un filtro de lista: cada faceta cuenta con todos los filtros menos el suyo.
+    def without(self, name):
+        return replace(self, **{name: []})
+
+    # Copia con un valor añadido o quitado de un filtro de lista (enlaces de las facetas).
+    def toggled(self, name, value):
+        values = getattr(self, name)
+        values = [v for v in values if v != value] if value in values else sorted([*values, value])
+        return replace(self, **{name: values})
+
+    def apply(self, tasks):
+        if self.assignees:
+            Assigned = Task.assigned_to.through
+            tasks = tasks.filter(
+                Exists(Assigned.objects.filter(task=OuterRef("pk"), user_id__in=self.assignees))
+            )
+        if self.tags:
+            Tagged = Task.tags.through
+            if self.tag_mode == TAG_MODE_ALL:
+                for tag_id in self.tags:
+                    tasks = tasks.filter(
+                        Exists(Tagged.objects.filter(task=OuterRef("pk"), tag_id=tag_id))
+                    )
+            else:
+                tasks = tasks.filter(
+                    Exists(Tagged.objects.filter(task=OuterRef("pk"), tag_id__in=self.tags))
+                )
+        if self.priorities:
+            tasks = tasks.filter(priority__in=self.priorities)
+        if self.creators:
+            tasks = tasks.filter(created_by_id__in=self.creators)
+        if self.lists:
+            tasks = tasks.filter(task_list_id__in=self.lists)
+        # Comparo con el inicio de cada día (y no con __date) para poder usar el índice.
+        if self.due_from:
+            tasks = tasks.filter(due_date__gte=_day_start(self.due_from))
+        if self.due_to:
+            tasks = tasks.filter(due_date__lt=_day_start(self.due_to + timedelta(days=1)))
+        return tasks
+
+    # Query string equivalente, para la carga diferida de columnas y los enlaces del feed.
+    def querystring(self):
+        params = [
+            *(("assignee", value) for value in self.assignees),
+            *(("priority", value) for value in self.priorities),
+            *(("tag", value) for value in self.tags),
+            *(("created_by", value) for value in self.creators),
+            *(("list", value) for value in self.lists),
+        ]
+        if len(self.tags) > 1 and self.tag_mode == TAG_MODE_ALL:
+            params.append(("tag_mode", self.tag_mode))
+        if self.due_from:
+            params.append(("due_from", self.due_from.isoformat()))
+        if self.due_to:
+            params.append(("due_to", self.due_to.isoformat()))
+        return urlencode(params)
+
+
+# Cuento tareas por prioridad, etiqueta y asignado con consultas agrupadas. Cada faceta
+# aplica el resto de filtros, así muestra cuántas tareas quedarían al elegir otro valor.
+def task_facets(board, filters):
+    board_tasks = Task.objects.filter(task_list__board=board)
+    priorities = dict(
+        filters.without("priorities")
+        .apply(board_tasks)
+        .order_by()
+        .values_list("priority")
+        .annotate(total=Count("id"))
+    )
+    tag_filters = filters.without("tags")
+    if tag_filters:
+        tags = (
+            Task.tags.through.objects.filter(task__in=tag_filters.apply(board_tasks))
+            .values("tag_id", "tag__name", "tag__color")
+            .annotate(total=Count("task_id"))
+        )
+    else:
+        # Sin otros filtros, el uso de cada etiqueta ya está materializado por tablero.
+        tags = (
+            board.tag_usage.filter(task_count__gt=0)
+            .values("tag_id", "tag__name", "tag__color")
+            .annotate(total=F("task_count"))
+        )
+    tags = list(tags.order_by("tag__name"))
+    assignees = list(
+        Task.assigned_to.through.objects.filter(
+            task__in=filters.without("assignees").apply(board_tasks)
+        )
+        .values("user_id", "user__username")
+        .annotate(total=Count("task_id"))
+        .order_by("user__username")
+    )
+    return {
+        "priority": {choice: priorities.get(choice, 0) for choice, _ in Task.PRIORITY_CHOICES},
+        "tags": [
+            {
+                "id": row["tag_id"],
+                "name": row["tag__name"],
+                "color": row["tag__color"],
+                "total": row["total"],
+            }
+            for row in tags
+        ],
+        "assignees": [
+            {"id": row["user_id"], "username": row["user__username"], "total": row["total"]}
+            for row in assignees
+        ],
+    }
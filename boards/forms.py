@@ -1,15 +1,12 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordResetForm
 from django.core.exceptions import ValidationError
-from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
-from email.mime.image import MIMEImage
-import os
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.contrib.auth.models import User
 from .models import Board, TaskList, Task, UserProfile
+from .emails import send_html_email
 
 
 # ---------------------------------------------------------------------
@@ -207,21 +204,9 @@ class CustomPasswordResetForm(PasswordResetForm):
         if html_email_template_name:
             html_body = render_to_string(html_email_template_name, context)
 
-        email = EmailMultiAlternatives(subject, text_body, from_email, [to_email])
-        if html_body:
-            email.attach_alternative(html_body, "text/html")
-
-        logo_path = os.path.join(settings.BASE_DIR, "static", "img", "taskmaster.png")
-        try:
-            with open(logo_path, "rb") as f:
-                img = MIMEImage(f.read())
-                img.add_header("Content-ID", "<taskmaster-logo>")
-                img.add_header("Content-Disposition", "inline", filename="taskmaster.png")
-                email.attach(img)
-        except FileNotFoundError:
-            pass
-
-        email.send(fail_silently=False)
+        # Reutilizo la cola de emails para no bloquear la request con SMTP; el worker borra
+        # el cuerpo (con el enlace de reset) en cuanto lo envía.
+        send_html_email(subject, text_body, html_body, [to_email], from_email=from_email)
 
 
 # ---------------------------------------------------------------------
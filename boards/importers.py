@@ -0,0 +1,261 @@
+import csv
+import io
+import json
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .activity import save_activities
+from .models import Activity, Tag, Task, TaskList, TaskSearchDocument
+from .positions import POSITION_GAP
+from .search import search_document
+from .utils import get_list_status_key
+
+# Tareas insertadas por cada bulk_create (y por cada aviso de progreso).
+IMPORT_BATCH_SIZE = 1000
+
+PRIORITIES = {choice for choice, _ in Task.PRIORITY_CHOICES}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+# Resumen de lo que se ha creado, para la respuesta de la vista y el comando.
+@dataclass
+class ImportResult:
+    tasks: int = 0
+    lists: int = 0
+    tags: int = 0
+    assignments: int = 0
+    skipped_assignees: int = 0
+
+
+def _split_names(value):
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+# Normalizo una tarea del JSON de exportación al formato interno del importador.
+def _record_from_json(item):
+    task_list = item.get("list") or {}
+    created_by = item.get("created_by") or {}
+    return {
+        "title": item.get("title") or "",
+        "description": item.get("description") or "",
+        "priority": item.get("priority"),
+        "due_date": item.get("due_date"),
+        "list_title": task_list.get("title") or "",
+        "created_by": created_by.get("username"),
+        "assigned_to": [u.get("username") for u in item.get("assigned_to") or []],
+        "tags": [tag.get("name") for tag in item.get("tags") or []],
+        "position": item.get("position") or 0,
+    }
+
+
+def _record_from_csv(row):
+    return {
+        "title": row.get("title") or "",
+        "description": row.get("description") or "",
+        "priority": row.get("priority"),
+        "due_date": row.get("due_date"),
+        "list_title": row.get("list") or "",
+        "created_by": row.get("created_by"),
+        "assigned_to": _split_names(row.get("assigned_to")),
+        "tags": _split_names(row.get("tags")),
+        "position": row.get("position") or 0,
+    }
+
+
+# Acepto exactamente lo que producen las exportaciones: JSON, NDJSON o CSV. Toda tarea exportada
+# tiene título; sin él (p. ej. un objeto JSON suelto sin "tasks") el fichero no es válido.
+def parse_task_export(content):
+    records = _parse_records(content)
+    for number, record in enumerate(records, start=1):
+        if not record["title"].strip():
+            raise ImportFormatError(f"La tarea {number} del fichero no tiene título.")
+    return records
+
+
+def _parse_records(content):
+    if isinstance(content, bytes):
+        try:
+            content = content.decode("utf-8-sig")
+        except UnicodeDecodeError as exc:
+            raise ImportFormatError("El fichero debe estar codificado en UTF-8.") from exc
+    text = content.lstrip()
+    if not text:
+        return []
+    if text.startswith("{"):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = None
+        # Un elemento con otra forma (una cadena en vez de un objeto) es un fichero no válido,
+        # no un error del servidor.
+        try:
+            if isinstance(data, dict) and "tasks" in data:
+                return [_record_from_json(item) for item in data["tasks"]]
+            return [_record_from_json(json.loads(line)) for line in text.splitlines() if line.strip()]
+        except (json.JSONDecodeError, AttributeError, TypeError) as exc:
+            raise ImportFormatError("JSON de importación no válido.") from exc
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or "title" not in reader.fieldnames or "list" not in reader.fieldnames:
+        raise ImportFormatError("El CSV debe tener al menos las columnas title y list.")
+    return [_record_from_csv(row) for row in reader]
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _parse_due_date(value):
+    if not value:
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        return None
+
+
+# Creo las listas que falten, en el orden en que aparecen en la exportación.
+def _resolve_lists(board, records, version):
+    lists = {task_list.title: task_list for task_list in board.lists.all()}
+    next_position = len(lists)
+    new_lists = []
+    for record in records:
+        # Recorto antes de buscar: el título guardado es el recortado.
+        title = (record["list_title"] or "Importadas")[:100]
+        record["list_title"] = title
+        if title in lists:
+            continue
+        task_list = TaskList(
+            board=board,
+            title=title,
+            position=next_position,
+            status_key=get_list_status_key(title),
+            changed_version=version,
+        )
+        lists[title] = task_list
+        new_lists.append(task_list)
+        next_position += 1
+    TaskList.objects.bulk_create(new_lists)
+    return lists, len(new_lists)
+
+
+# Reutilizo las etiquetas del tablero (o globales, si no hay una propia con ese nombre) y
+# creo en el tablero las que falten.
+def _resolve_tags(board, records):
+    names = {name[:50] for record in records for name in record["tags"] if name}
+    tags = {}
+    for tag in Tag.for_board(board).filter(name__in=names):
+        if tag.board_id is not None or tag.name not in tags:
+            tags[tag.name] = tag
+    missing = [Tag(board=board, name=name) for name in sorted(names - tags.keys())]
+    Tag.objects.bulk_create(missing)
+    tags.update((tag.name, tag) for tag in missing)
+    return tags, len(missing)
+
+
+# Recreo listas, tareas, etiquetas y asignaciones con inserciones masivas en una transacción.
+def import_tasks(board, records, user=None, batch_size=None, progress=None):
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    result = ImportResult()
+    with transaction.atomic():
+        # Tomo la versión al principio para marcar cada fila al insertarla (sincronización).
+        version = board.bump_change_version()
+        lists, result.lists = _resolve_lists(board, records, version)
+        tags, result.tags = _resolve_tags(board, records)
+        # Como en add_task, solo asigno (o atribuyo) tareas a miembros del tablero.
+        members = dict(board.memberships.values_list("user__username", "user_id"))
+
+        base_positions = dict(
+            TaskList.objects.filter(board=board)
+            .annotate(last=Max("tasks__position"))
+            .values_list("id", "last")
+        )
+        next_positions = {
+            list_id: (last or 0) + POSITION_GAP for list_id, last in base_positions.items()
+        }
+        ordered = sorted(
+            records,
+            key=lambda record: (lists[record["list_title"]].position, _to_int(record["position"])),
+        )
+
+        Assigned = Task.assigned_to.through
+        Tagged = Task.tags.through
+        total = len(ordered)
+        for start in range(0, total, batch_size):
+            chunk = ordered[start:start + batch_size]
+            tasks = []
+            for record in chunk:
+                task_list = lists[record["list_title"]]
+                position = next_positions.get(task_list.id, POSITION_GAP)
+                next_positions[task_list.id] = position + POSITION_GAP
+                priority = record["priority"] if record["priority"] in PRIORITIES else "medium"
+                tasks.append(
+                    Task(
+                        task_list_id=task_list.id,
+                        title=record["title"][:200],
+                        description=record["description"],
+                        priority=priority,
+                        due_date=_parse_due_date(record["due_date"]),
+                        position=position,
+                        created_by_id=members.get(record["created_by"], getattr(user, "pk", None)),
+                        changed_version=version,
+                    )
+                )
+            Task.objects.bulk_create(tasks)
+
+            assigned_rows = []
+            tagged_rows = []
+            documents = []
+            for task, record in zip(tasks, chunk):
+                usernames = []
+                for username in dict.fromkeys(record["assigned_to"]):
+                    user_id = members.get(username)
+                    if user_id is None:
+                        result.skipped_assignees += 1
+                        continue
+                    assigned_rows.append(Assigned(task_id=task.pk, user_id=user_id))
+                    usernames.append(username)
+                tag_names = []
+                for name in dict.fromkeys(filter(None, record["tags"])):
+                    tag = tags.get(name[:50])
+                    if tag is not None:
+                        tagged_rows.append(Tagged(task_id=task.pk, tag_id=tag.pk))
+                        tag_names.append(tag.name)
+                # El documento de búsqueda sale de los datos que ya tengo en memoria.
+                documents.append(
+                    search_document(
+                        task.pk, board.pk, task.title, task.description, tag_names, usernames
+                    )
+                )
+            Assigned.objects.bulk_create(assigned_rows, batch_size=batch_size)
+            Tagged.objects.bulk_create(tagged_rows, batch_size=batch_size)
+            TaskSearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+
+            result.tasks += len(tasks)
+            result.assignments += len(assigned_rows)
+            if progress:
+                progress(result.tasks, total)
+
+        # Los contadores materializados no se tocan con bulk_create: los recalculo una vez.
+        board.recount_tasks()
+        board.recount_tag_usage()
+        TaskList.objects.filter(board=board).update(changed_version=version)
+        save_activities(
+            [
+                Activity(
+                    board=board,
+                    user=user,
+                    action=Activity.TASKS_IMPORTED,
+                    details=f"{result.tasks} tareas, {result.lists} listas nuevas",
+                )
+            ]
+        )
+    return result
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from boards.archive import ARCHIVE_BATCH_SIZE, archive_activity, retention_cutoff
+
+
+# Expongo este comando para sacar de la tabla la actividad más antigua que la retención.
+class Command(BaseCommand):
+    help = "Archiva en ficheros comprimidos (por tablero y mes) la actividad antigua."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help=f"Días de actividad que se quedan en la tabla (por defecto {settings.ACTIVITY_RETENTION_DAYS}).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help="Filas movidas por transacción.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = retention_cutoff(options["days"])
+        total = archive_activity(
+            cutoff,
+            batch_size=options["batch_size"],
+            progress=lambda done: self.stdout.write(f"Archivadas {done}..."),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Actividad archivada. Filas: {total} (anteriores a {cutoff:%Y-%m-%d})"
+            )
+        )
@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from boards.importers import IMPORT_BATCH_SIZE, ImportFormatError, import_tasks, parse_task_export
+from boards.models import Board
+
+
+# Expongo la importación masiva para migrar tableros entre instancias.
+class Command(BaseCommand):
+    help = "Importa tareas en un tablero desde una exportación CSV, JSON o NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("board_id", type=int)
+        parser.add_argument("path")
+        parser.add_argument(
+            "--user",
+            help="Usuario al que se atribuyen las tareas cuyo creador no es miembro.",
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            board = Board.objects.get(pk=options["board_id"])
+        except Board.DoesNotExist:
+            raise CommandError(f"No existe el tablero {options['board_id']}.")
+        user = None
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"No existe el usuario {options['user']}.")
+
+        with open(options["path"], "rb") as f:
+            content = f.read()
+        try:
+            records = parse_task_export(content)
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        def progress(done, total):
+            self.stdout.write(f"  {done}/{total} tareas")
+
+        result = import_tasks(
+            board,
+            records,
+            user=user,
+            batch_size=max(1, options["batch_size"]),
+            progress=progress,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Importadas {result.tasks} tareas, {result.lists} listas y "
+                f"{result.tags} etiquetas nuevas ({result.assignments} asignaciones, "
+                f"{result.skipped_assignees} asignados omitidos por no ser miembros)."
+            )
+        )
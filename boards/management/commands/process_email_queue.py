@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from boards.emails import process_email_queue, prune_email_queue
+
+
+# Expongo este worker para vaciar la cola de emails (cron o proceso continuo).
+class Command(BaseCommand):
+    help = "Envía los emails pendientes de la cola con reintentos y backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "EMAIL_QUEUE_WORKERS", 4),
+            help="Hilos SMTP en paralelo por lote.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=getattr(settings, "EMAIL_QUEUE_MAX_ATTEMPTS", 5),
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Sigue esperando emails nuevos en lugar de salir al vaciar la cola.",
+        )
+        parser.add_argument("--interval", type=float, default=5.0)
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=getattr(settings, "EMAIL_QUEUE_RETENTION_DAYS", 7),
+            help="Días que se conservan los emails enviados o fallidos.",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = pruned = 0
+        while True:
+            sent, failed = process_email_queue(
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                max_attempts=options["max_attempts"],
+            )
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            pruned += prune_email_queue(options["retention_days"])
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Cola procesada. Enviados: {total_sent}, Fallidos: {total_failed}, "
+                f"Purgados: {pruned}"
+            )
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from boards.exports import process_export_jobs
+
+
+# Expongo este worker para generar las exportaciones pedidas desde el tablero.
+class Command(BaseCommand):
+    help = "Genera los ficheros de exportación pendientes (CSV/JSON/actividad)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10, help="Trabajos por pasada.")
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Sigue esperando trabajos nuevos en lugar de salir al vaciar la cola.",
+        )
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        total_done = total_failed = 0
+        while True:
+            done, failed = process_export_jobs(limit=options["limit"])
+            total_done += done
+            total_failed += failed
+            if done or failed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exportaciones procesadas. Generadas: {total_done}, Fallidas: {total_failed}"
+            )
+        )
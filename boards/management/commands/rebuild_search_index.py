@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from boards.models import Task, TaskSearchDocument
+from boards.search import INDEX_BATCH_SIZE, index_task_queryset
+
+
+# Expongo este comando para regenerar los documentos de búsqueda (tras una carga masiva
+# por SQL o si el índice quedó desincronizado).
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de texto completo de las tareas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=INDEX_BATCH_SIZE,
+            help="Tareas reindexadas por lote.",
+        )
+
+    def handle(self, *args, **options):
+        # Los documentos huérfanos se borran en cascada; solo rehago los existentes y los que faltan.
+        total = index_task_queryset(
+            Task.objects.all(),
+            batch_size=options["batch_size"],
+            progress=lambda done: self.stdout.write(f"Indexadas {done}..."),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Índice reconstruido. Tareas: {total} (documentos: {TaskSearchDocument.objects.count()})"
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from boards.models import Board
+
+
+# Expongo este comando para reparar contadores de tareas si se editan datos fuera de las vistas.
+class Command(BaseCommand):
+    help = "Recalcula los contadores materializados de tareas (por tablero y lista) y el uso de etiquetas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("board_ids", nargs="*", type=int)
+
+    def handle(self, *args, **options):
+        boards = Board.objects.all()
+        if options["board_ids"]:
+            boards = boards.filter(id__in=options["board_ids"])
+
+        total = 0
+        for board in boards.iterator():
+            board.recount_tasks()
+            board.recount_tag_usage()
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados en {total} tableros."))
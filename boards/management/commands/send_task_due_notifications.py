@@ -1,70 +1,129 @@
+from itertools import islice
+
+from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 
+from boards.emails import EmailBatch
 from boards.models import Task, UserProfile
 from boards.utils import build_board_url
 from boards.views import send_task_due_soon_email, send_task_overdue_email
 
 
+# Filtro igual que los índices parciales task_due_soon_pending_idx / task_overdue_pending_idx
+# (due_date no nulo y aviso sin marcar) para que el planificador pueda usarlos.
+def due_soon_tasks(now, soon_limit):
+    return Task.objects.filter(
+        due_date__isnull=False,
+        due_soon_notified_at__isnull=True,
+        due_date__gt=now,
+        due_date__lte=soon_limit,
+    )
+
+
+def overdue_tasks(now):
+    return Task.objects.filter(
+        due_date__isnull=False,
+        overdue_notified_at__isnull=True,
+        due_date__lt=now,
+    )
+
+
 # Expongo este comando para que pueda ejecutarse por cron y enviar avisos de vencimiento.
 class Command(BaseCommand):
     help = "Envia notificaciones por vencimiento de tareas (próximas y vencidas)."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Tareas procesadas por bloque (consultas y emails se agrupan por bloque).",
+        )
+
     def handle(self, *args, **options):
         # Tomo una ventana de 24h para avisos "por vencer" y separo también las vencidas.
         now = timezone.now()
         soon_limit = now + timezone.timedelta(hours=24)
+        batch_size = max(1, options["batch_size"])
 
-        due_soon_qs = (
-            Task.objects.filter(due_date__isnull=False)
-            .filter(due_date__gt=now, due_date__lte=soon_limit)
-            .filter(due_soon_notified_at__isnull=True)
-            .select_related("task_list__board")
-            .prefetch_related("assigned_to")
+        due_soon_sent = self.notify(
+            due_soon_tasks(now, soon_limit),
+            "due_soon_notified_at",
+            send_task_due_soon_email,
+            now,
+            batch_size,
         )
-        overdue_qs = (
-            Task.objects.filter(due_date__isnull=False)
-            .filter(due_date__lt=now)
-            .filter(overdue_notified_at__isnull=True)
-            .select_related("task_list__board")
-            .prefetch_related("assigned_to")
+        overdue_sent = self.notify(
+            overdue_tasks(now),
+            "overdue_notified_at",
+            send_task_overdue_email,
+            now,
+            batch_size,
         )
 
-        due_soon_sent = 0
-        overdue_sent = 0
-
-        # Recorro tareas próximas y solo notifico a usuarios asignados con opt-in activo.
-        for task in due_soon_qs:
-            board_url = build_board_url(task.task_list.board_id)
-            sent_any = False
-            for user in task.assigned_to.exclude(email=""):
-                profile, _ = UserProfile.objects.get_or_create(user=user)
-                if not profile.notify_task_due:
-                    continue
-                send_task_due_soon_email(task, user, board_url)
-                sent_any = True
-                due_soon_sent += 1
-            if sent_any:
-                task.due_soon_notified_at = now
-                task.save(update_fields=["due_soon_notified_at"])
-
-        # Recorro tareas ya vencidas y marco timestamp para evitar duplicar avisos.
-        for task in overdue_qs:
-            board_url = build_board_url(task.task_list.board_id)
-            sent_any = False
-            for user in task.assigned_to.exclude(email=""):
-                profile, _ = UserProfile.objects.get_or_create(user=user)
-                if not profile.notify_task_due:
-                    continue
-                send_task_overdue_email(task, user, board_url)
-                sent_any = True
-                overdue_sent += 1
-            if sent_any:
-                task.overdue_notified_at = now
-                task.save(update_fields=["overdue_notified_at"])
-
         self.stdout.write(
             self.style.SUCCESS(
                 f"Notificaciones enviadas. Próximas: {due_soon_sent}, Vencidas: {overdue_sent}"
             )
         )
+
+    # Recorro las tareas en streaming y resuelvo cada bloque con un número fijo de consultas.
+    def notify(self, queryset, stamp_field, send_email, now, batch_size):
+        tasks = (
+            queryset.select_related("task_list__board")
+            .order_by("pk")
+            .iterator(chunk_size=batch_size)
+        )
+        sent = 0
+        while True:
+            chunk = list(islice(tasks, batch_size))
+            if not chunk:
+                break
+            sent += self.notify_chunk(chunk, stamp_field, send_email, now)
+        return sent
+
+    def notify_chunk(self, chunk, stamp_field, send_email, now):
+        task_ids = [task.pk for task in chunk]
+
+        # Cargo asignaciones directamente de la tabla intermedia, sin una consulta por tarea.
+        assignees = {}
+        for task_id, user_id in Task.assigned_to.through.objects.filter(
+            task_id__in=task_ids
+        ).values_list("task_id", "user_id"):
+            assignees.setdefault(task_id, []).append(user_id)
+        user_ids = {user_id for ids in assignees.values() for user_id in ids}
+        if not user_ids:
+            return 0
+
+        users = User.objects.exclude(email="").in_bulk(user_ids)
+        # Sin perfil se aplica el valor por defecto (avisos activados), así que solo leo bajas.
+        opted_out = set(
+            UserProfile.objects.filter(
+                user_id__in=user_ids, notify_task_due=False
+            ).values_list("user_id", flat=True)
+        )
+
+        sent = 0
+        notified_ids = []
+        batch = EmailBatch()
+        for task in chunk:
+            recipients = [
+                users[user_id]
+                for user_id in assignees.get(task.pk, [])
+                if user_id in users and user_id not in opted_out
+            ]
+            if not recipients:
+                continue
+            board_url = build_board_url(task.task_list.board_id)
+            for user in recipients:
+                send_email(task, user, board_url, batch=batch)
+            sent += len(recipients)
+            notified_ids.append(task.pk)
+
+        # Encolo los emails y marco las tareas juntos para no duplicar avisos si algo falla.
+        with transaction.atomic():
+            batch.flush()
+            Task.objects.filter(pk__in=notified_ids).update(**{stamp_field: now})
+        return sent
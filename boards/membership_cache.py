@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import BoardMembership
+
+
+# Devuelvo el backend configurado para la caché de roles.
+def _roles_cache():
+    return caches[getattr(settings, "BOARD_ROLES_CACHE_ALIAS", "default")]
+
+
+def _cache_key(user_id):
+    return f"boards:roles:{user_id}"
+
+
+# Devuelvo el mapa board_id -> rol del usuario; solo consulto la BD si no está en caché.
+def get_user_board_roles(user_id):
+    cache = _roles_cache()
+    key = _cache_key(user_id)
+    roles = cache.get(key)
+    if roles is None:
+        roles = dict(
+            BoardMembership.objects.filter(user_id=user_id).values_list("board_id", "role")
+        )
+        cache.set(key, roles, getattr(settings, "BOARD_ROLES_CACHE_TIMEOUT", 300))
+    return roles
+
+
+def get_user_board_role(user_id, board_id):
+    return get_user_board_roles(user_id).get(board_id)
+
+
+def invalidate_user_board_roles(user_id):
+    _roles_cache().delete(_cache_key(user_id))
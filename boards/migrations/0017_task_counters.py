@@ -0,0 +1,69 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:01
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from boards.utils import get_list_status_key
+
+
+# Relleno estado y contadores de listas y tableros existentes.
+def backfill_task_counters(apps, schema_editor):
+    Board = apps.get_model("boards", "Board")
+    TaskList = apps.get_model("boards", "TaskList")
+    status_fields = {"todo": "todo_count", "doing": "doing_count", "done": "done_count"}
+
+    for board in Board.objects.all().iterator():
+        lists = list(TaskList.objects.filter(board=board).annotate(num_tasks=Count("tasks")))
+        board.task_count = 0
+        for field in status_fields.values():
+            setattr(board, field, 0)
+        for task_list in lists:
+            task_list.status_key = get_list_status_key(task_list.title)
+            task_list.task_count = task_list.num_tasks
+            board.task_count += task_list.num_tasks
+            field = status_fields.get(task_list.status_key)
+            if field:
+                setattr(board, field, getattr(board, field) + task_list.num_tasks)
+        TaskList.objects.bulk_update(lists, ["status_key", "task_count"])
+        board.save(update_fields=["task_count", *status_fields.values()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0016_userprofile_cookie_consent_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='doing_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='done_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='todo_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='status_key',
+            field=models.CharField(choices=[('todo', 'Por hacer'), ('doing', 'En proceso'), ('done', 'Completadas'), ('other', 'Otro')], default='other', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0018_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['task_list', 'position', 'id'], name='task_list_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), ('due_soon_notified_at__isnull', True)), fields=['due_date'], name='task_due_soon_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), ('overdue_notified_at__isnull', True)), fields=['due_date'], name='task_overdue_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklist',
+            index=models.Index(fields=['board', 'position'], name='tasklist_board_position_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0020_export_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='changed_version',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='changed_version',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.CreateModel(
+            name='BoardTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('list', 'Lista'), ('task', 'Tarea')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('version', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='boards.board')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'version'], name='boards_boar_board_i_daf354_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+POSITION_GAP = 1024
+
+
+# Renumero cada columna con huecos (1024, 2048, ...) respetando el orden actual.
+def spread_task_positions(apps, schema_editor):
+    Task = apps.get_model("boards", "Task")
+    TaskList = apps.get_model("boards", "TaskList")
+    for list_id in TaskList.objects.values_list("id", flat=True).iterator():
+        tasks = list(Task.objects.filter(task_list_id=list_id).order_by("position", "id").only("id"))
+        for i, task in enumerate(tasks, start=1):
+            task.position = i * POSITION_GAP
+        Task.objects.bulk_update(tasks, ["position"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("boards", "0021_board_sync"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            code=spread_task_positions,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
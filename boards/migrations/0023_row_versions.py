@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0022_task_gap_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
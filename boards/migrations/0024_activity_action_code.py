@@ -0,0 +1,93 @@
+from django.db import migrations, models
+
+ACTION_CODES = {
+    "Tablero creado": 1,
+    "Tablero actualizado": 2,
+    "Lista creada": 10,
+    "Lista eliminada": 11,
+    "Tarea creada": 20,
+    "Tarea actualizada": 21,
+    "Tarea movida": 22,
+    "Tarea eliminada": 23,
+    "Tareas importadas": 24,
+    "Miembro añadido/actualizado": 30,
+    "Rol actualizado": 31,
+    "Miembro eliminado": 32,
+    "Invitación enviada": 40,
+    "Invitación aceptada": 41,
+    "Invitación revocada": 42,
+}
+
+
+# Paso cada texto conocido a su código; lo desconocido queda como "Otra" conservando el
+# texto original al principio del detalle.
+def actions_to_codes(apps, schema_editor):
+    Activity = apps.get_model("boards", "Activity")
+    for label, code in ACTION_CODES.items():
+        Activity.objects.filter(action=label).update(action_code=code)
+    unknown = Activity.objects.exclude(action__in=ACTION_CODES).only("id", "action", "details")
+    for activity in unknown.iterator():
+        activity.details = f"{activity.action}: {activity.details}" if activity.details else activity.action
+        activity.save(update_fields=["details"])
+
+
+def codes_to_actions(apps, schema_editor):
+    Activity = apps.get_model("boards", "Activity")
+    for label, code in ACTION_CODES.items():
+        Activity.objects.filter(action_code=code).update(action=label)
+    Activity.objects.filter(action_code=0).update(action="Otra")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("boards", "0023_row_versions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activity",
+            name="action_code",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="activity",
+            name="action",
+            field=models.CharField(max_length=120, default=""),
+        ),
+        migrations.RunPython(code=actions_to_codes, reverse_code=codes_to_actions),
+        migrations.RemoveField(
+            model_name="activity",
+            name="action",
+        ),
+        migrations.RenameField(
+            model_name="activity",
+            old_name="action_code",
+            new_name="action",
+        ),
+        migrations.AlterField(
+            model_name="activity",
+            name="action",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, "Otra"),
+                    (1, "Tablero creado"),
+                    (2, "Tablero actualizado"),
+                    (10, "Lista creada"),
+                    (11, "Lista eliminada"),
+                    (20, "Tarea creada"),
+                    (21, "Tarea actualizada"),
+                    (22, "Tarea movida"),
+                    (23, "Tarea eliminada"),
+                    (24, "Tareas importadas"),
+                    (30, "Miembro añadido/actualizado"),
+                    (31, "Rol actualizado"),
+                    (32, "Miembro eliminado"),
+                    (40, "Invitación enviada"),
+                    (41, "Invitación aceptada"),
+                    (42, "Invitación revocada"),
+                ],
+                default=0,
+            ),
+        ),
+    ]
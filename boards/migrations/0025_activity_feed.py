@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:32
+
+from django.db import migrations, models
+
+
+# Calculo el conjunto de acciones de cada tablero a partir de su actividad actual.
+def fill_activity_actions(apps, schema_editor):
+    Activity = apps.get_model("boards", "Activity")
+    Board = apps.get_model("boards", "Board")
+    masks = {}
+    for board_id, action in Activity.objects.values_list("board_id", "action").distinct():
+        masks[board_id] = masks.get(board_id, 0) | (1 << action)
+    for board_id, mask in masks.items():
+        Board.objects.filter(pk=board_id).update(activity_actions=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0024_activity_action_code'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='activity',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='activity_actions',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['board', '-created_at', '-id'], name='activity_board_feed_idx'),
+        ),
+        migrations.RunPython(fill_activity_actions, migrations.RunPython.noop),
+    ]
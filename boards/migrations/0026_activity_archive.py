@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0025_activity_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('file', models.FileField(upload_to='activity_archive/')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('first_created_at', models.DateTimeField()),
+                ('last_created_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_archives', to='boards.board')),
+            ],
+            options={
+                'ordering': ['-last_created_at', '-id'],
+                'indexes': [models.Index(fields=['board', '-last_created_at'], name='boards_acti_board_i_f21371_idx')],
+            },
+        ),
+    ]
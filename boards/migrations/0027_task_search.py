@@ -0,0 +1,126 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE boards_task_fts USING fts5(
+        title, content,
+        content='boards_tasksearchdocument', content_rowid='task_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER boards_task_fts_ai AFTER INSERT ON boards_tasksearchdocument BEGIN
+        INSERT INTO boards_task_fts(rowid, title, content)
+        VALUES (new.task_id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER boards_task_fts_ad AFTER DELETE ON boards_tasksearchdocument BEGIN
+        INSERT INTO boards_task_fts(boards_task_fts, rowid, title, content)
+        VALUES ('delete', old.task_id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER boards_task_fts_au AFTER UPDATE ON boards_tasksearchdocument BEGIN
+        INSERT INTO boards_task_fts(boards_task_fts, rowid, title, content)
+        VALUES ('delete', old.task_id, old.title, old.content);
+        INSERT INTO boards_task_fts(rowid, title, content)
+        VALUES (new.task_id, new.title, new.content);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS boards_task_fts_au",
+    "DROP TRIGGER IF EXISTS boards_task_fts_ad",
+    "DROP TRIGGER IF EXISTS boards_task_fts_ai",
+    "DROP TABLE IF EXISTS boards_task_fts",
+]
+# El título pesa más que el resto (A frente a B) al ordenar por ts_rank.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE boards_tasksearchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX boards_task_search_vector_idx ON boards_tasksearchdocument USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS boards_task_search_vector_idx",
+    "ALTER TABLE boards_tasksearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+# Creo el índice de texto completo propio de cada base de datos (en otras, búsqueda simple).
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRES_BACKWARD)
+
+
+# Indexo las tareas existentes (luego se mantienen al guardar).
+def index_existing_tasks(apps, schema_editor):
+    Task = apps.get_model("boards", "Task")
+    TaskSearchDocument = apps.get_model("boards", "TaskSearchDocument")
+    tasks = (
+        Task.objects.select_related("task_list")
+        .prefetch_related("tags", "assigned_to")
+        .order_by("id")
+    )
+    batch = []
+    for task in tasks.iterator(chunk_size=1000):
+        words = [task.description]
+        words += [tag.name for tag in task.tags.all()]
+        words += [user.username for user in task.assigned_to.all()]
+        batch.append(
+            TaskSearchDocument(
+                task_id=task.id,
+                board_id=task.task_list.board_id,
+                title=task.title,
+                content=" ".join(filter(None, words)),
+            )
+        )
+        if len(batch) >= 1000:
+            TaskSearchDocument.objects.bulk_create(batch)
+            batch = []
+    TaskSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0026_activity_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchDocument',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='boards.task')),
+                ('title', models.CharField(max_length=200)),
+                ('content', models.TextField(blank=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='boards.board')),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(index_existing_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:46
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+# Relleno el uso por tablero y paso al tablero las etiquetas que solo se usan en uno; las
+# compartidas (o con nombre repetido en ese tablero) siguen globales.
+def scope_existing_tags(apps, schema_editor):
+    Tag = apps.get_model("boards", "Tag")
+    Task = apps.get_model("boards", "Task")
+    BoardTagUsage = apps.get_model("boards", "BoardTagUsage")
+
+    usage = list(
+        Task.tags.through.objects.values_list("task__task_list__board_id", "tag_id")
+        .annotate(total=Count("task_id"))
+        .order_by()
+    )
+    BoardTagUsage.objects.bulk_create(
+        [
+            BoardTagUsage(board_id=board_id, tag_id=tag_id, task_count=total)
+            for board_id, tag_id, total in usage
+        ],
+        batch_size=1000,
+    )
+
+    boards_by_tag = {}
+    for board_id, tag_id, _ in usage:
+        boards_by_tag.setdefault(tag_id, set()).add(board_id)
+    taken = set()
+    scoped = []
+    for tag in Tag.objects.filter(pk__in=boards_by_tag).order_by("pk"):
+        board_ids = boards_by_tag[tag.pk]
+        if len(board_ids) != 1:
+            continue
+        board_id = next(iter(board_ids))
+        if (board_id, tag.name) in taken:
+            continue
+        taken.add((board_id, tag.name))
+        tag.board_id = board_id
+        scoped.append(tag)
+    Tag.objects.bulk_update(scoped, ["board"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0027_task_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardTagUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='board',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='boards.board'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('board', 'name'), name='unique_tag_name_per_board'),
+        ),
+        migrations.AddField(
+            model_name='boardtagusage',
+            name='board',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_usage', to='boards.board'),
+        ),
+        migrations.AddField(
+            model_name='boardtagusage',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='board_usage', to='boards.tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='boardtagusage',
+            constraint=models.UniqueConstraint(fields=('board', 'tag'), name='unique_board_tag_usage'),
+        ),
+        migrations.RunPython(scope_existing_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0028_board_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='from_email',
+            field=models.CharField(blank=True, max_length=254),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0031_task_tasklist_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='exportjob',
+            name='unique_export_artifact',
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='last_activity_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='exportjob',
+            constraint=models.UniqueConstraint(fields=('board', 'kind', 'params', 'compressed', 'change_version', 'last_activity_id'), name='unique_export_artifact'),
+        ),
+    ]
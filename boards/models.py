@@ -1,5 +1,18 @@
+from collections import defaultdict
+
 from django.db import models
+from django.db.models import Count, F, Q
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .utils import get_list_status_key
+
+# Relaciono cada estado de lista con su contador materializado en Board.
+STATUS_COUNTER_FIELDS = {
+    "todo": "todo_count",
+    "doing": "doing_count",
+    "done": "done_count",
+}
 
 
 # Defino aquí la entidad principal del proyecto: tablero Kanban.
@@ -10,10 +23,132 @@ class Board(models.Model):
         User, on_delete=models.CASCADE, related_name="owned_boards"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Mantengo contadores de tareas por estado para leer el progreso en O(1).
+    task_count = models.PositiveIntegerField(default=0)
+    todo_count = models.PositiveIntegerField(default=0)
+    doing_count = models.PositiveIntegerField(default=0)
+    done_count = models.PositiveIntegerField(default=0)
+    # Subo esta versión con cada cambio registrado; identifica exportaciones ya generadas.
+    change_version = models.PositiveBigIntegerField(default=0)
+    # Conjunto de acciones presentes en su actividad (bit 1 << código) para el filtro del panel.
+    activity_actions = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
         return self.title
 
+    # Añado acciones al conjunto con un OR atómico, sin leer la fila.
+    def add_activity_actions(self, actions):
+        mask = 0
+        for action in actions:
+            mask |= 1 << action
+        if mask & ~self.activity_actions:
+            Board.objects.filter(pk=self.pk).update(
+                activity_actions=F("activity_actions").bitor(mask)
+            )
+            self.activity_actions |= mask
+
+    # Recalculo el conjunto desde las filas que quedan (tras archivar o borrar actividad).
+    def recount_activity_actions(self):
+        mask = 0
+        for action in self.activities.order_by().values_list("action", flat=True).distinct():
+            mask |= 1 << action
+        Board.objects.filter(pk=self.pk).update(activity_actions=mask)
+        self.activity_actions = mask
+
+    @property
+    def activity_action_choices(self):
+        return [
+            (code, label)
+            for code, label in Activity.ACTION_CHOICES
+            if self.activity_actions & (1 << code)
+        ]
+
+    @property
+    def progress(self):
+        if not self.task_count:
+            return 0
+        return int((self.done_count / self.task_count) * 100)
+
+    # Marco el tablero como modificado con un incremento atómico y devuelvo la nueva versión.
+    # Dentro de una transacción el UPDATE bloquea la fila, así que la lectura es la nuestra.
+    def bump_change_version(self):
+        Board.objects.filter(pk=self.pk).update(change_version=F("change_version") + 1)
+        self.change_version = (
+            Board.objects.filter(pk=self.pk).values_list("change_version", flat=True).get()
+        )
+        return self.change_version
+
+    # Sumo (o resto) tareas a los contadores del tablero sin leer la fila.
+    def adjust_task_counters(self, status_key, delta):
+        if not delta:
+            return
+        updates = {"task_count": F("task_count") + delta}
+        field = STATUS_COUNTER_FIELDS.get(status_key)
+        if field:
+            updates[field] = F(field) + delta
+        Board.objects.filter(pk=self.pk).update(**updates)
+
+    # Paso tareas de un contador de estado a otro sin tocar el total.
+    def shift_status_counters(self, from_key, to_key, amount):
+        updates = {}
+        from_field = STATUS_COUNTER_FIELDS.get(from_key)
+        to_field = STATUS_COUNTER_FIELDS.get(to_key)
+        if from_field == to_field or not amount:
+            return
+        if from_field:
+            updates[from_field] = F(from_field) - amount
+        if to_field:
+            updates[to_field] = F(to_field) + amount
+        Board.objects.filter(pk=self.pk).update(**updates)
+
+    # Sumo o resto usos de etiquetas ({tag_id: delta}); creo antes las filas que falten y
+    # agrupo por delta para hacer un UPDATE por valor (casi siempre +1 o -1).
+    def adjust_tag_usage(self, deltas):
+        deltas = {tag_id: delta for tag_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        added = [tag_id for tag_id, delta in deltas.items() if delta > 0]
+        BoardTagUsage.objects.bulk_create(
+            [BoardTagUsage(board=self, tag_id=tag_id) for tag_id in added],
+            ignore_conflicts=True,
+        )
+        by_delta = defaultdict(list)
+        for tag_id, delta in deltas.items():
+            by_delta[delta].append(tag_id)
+        for delta, tag_ids in by_delta.items():
+            BoardTagUsage.objects.filter(board=self, tag_id__in=tag_ids).update(
+                task_count=F("task_count") + delta
+            )
+
+    # Recalculo el uso de etiquetas desde las tareas (reparación o cargas masivas).
+    def recount_tag_usage(self):
+        counts = BoardTagUsage.count_tags(Task.objects.filter(task_list__board=self))
+        self.tag_usage.exclude(tag_id__in=counts).delete()
+        BoardTagUsage.objects.bulk_create(
+            [
+                BoardTagUsage(board=self, tag_id=tag_id, task_count=total)
+                for tag_id, total in counts.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["board", "tag"],
+            update_fields=["task_count"],
+        )
+
+    # Recalculo todos los contadores desde cero (reparación o cargas masivas).
+    def recount_tasks(self):
+        lists = list(self.lists.annotate(num_tasks=Count("tasks")))
+        totals = {field: 0 for field in STATUS_COUNTER_FIELDS.values()}
+        for task_list in lists:
+            task_list.task_count = task_list.num_tasks
+            field = STATUS_COUNTER_FIELDS.get(task_list.status_key)
+            if field:
+                totals[field] += task_list.num_tasks
+        TaskList.objects.bulk_update(lists, ["task_count"])
+        self.task_count = sum(task_list.task_count for task_list in lists)
+        for field, value in totals.items():
+            setattr(self, field, value)
+        self.save(update_fields=["task_count", *totals.keys()])
+
 
 # Defino la relacion usuario-tablero con rol de permisos.
 class BoardMembership(models.Model):
@@ -58,18 +193,74 @@ class BoardInvite(models.Model):
 
 # Defino columnas/listas dentro del tablero (por hacer, en curso, done, etc.).
 class TaskList(models.Model):
+    STATUS_CHOICES = [
+        ("todo", "Por hacer"),
+        ("doing", "En proceso"),
+        ("done", "Completadas"),
+        ("other", "Otro"),
+    ]
+
     board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="lists")
     title = models.CharField(max_length=100)
     position = models.PositiveIntegerField(default=0)  # Para el orden visual
+    # Guardo el estado derivado del título para no recalcularlo en cada consulta.
+    status_key = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default="other", editable=False
+    )
+    task_count = models.PositiveIntegerField(default=0)
+    # Versión del tablero en la que cambió la lista por última vez (sincronización incremental).
+    changed_version = models.PositiveBigIntegerField(default=0, db_index=True)
+    # Versión de la lista para control optimista (título y renumeración de posiciones).
+    version = models.PositiveIntegerField(default=1)
+    # Cambia con cada save() (vistas, admin o shell); entra en la clave de la cabecera cacheada.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["position"]
+        indexes = [
+            models.Index(fields=["board", "position"], name="tasklist_board_position_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.board.title})"
 
-
-# Mantengo un catálogo de etiquetas reutilizables para clasificar tareas.
+    def save(self, *args, **kwargs):
+        status_key = get_list_status_key(self.title)
+        previous = None
+        if self.pk and status_key != self.status_key:
+            previous = (
+                TaskList.objects.filter(pk=self.pk)
+                .values_list("status_key", "task_count")
+                .first()
+            )
+        self.status_key = status_key
+        update_fields = kwargs.get("update_fields")
+        if update_fields:
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
+            if "title" in update_fields:
+                kwargs["update_fields"].add("status_key")
+        super().save(*args, **kwargs)
+        # Si cambia el estado de la lista, muevo sus tareas entre contadores del tablero.
+        if previous and previous[0] != status_key and previous[1]:
+            self.board.shift_status_counters(previous[0], status_key, previous[1])
+
+    # Actualizo el contador de la lista y los del tablero en la misma operación.
+    def adjust_task_count(self, delta):
+        TaskList.objects.filter(pk=self.pk).update(task_count=F("task_count") + delta)
+        self.board.adjust_task_counters(self.status_key, delta)
+
+    # Traslado tareas entre dos listas del mismo tablero ajustando ambos contadores.
+    @staticmethod
+    def transfer_task_count(from_list, to_list, amount=1):
+        if from_list.pk == to_list.pk:
+            return
+        TaskList.objects.filter(pk=from_list.pk).update(task_count=F("task_count") - amount)
+        TaskList.objects.filter(pk=to_list.pk).update(task_count=F("task_count") + amount)
+        to_list.board.shift_status_counters(from_list.status_key, to_list.status_key, amount)
+
+
+# Mantengo las etiquetas de cada tablero; las que no tienen tablero son globales y se
+# ofrecen en todos.
 class Tag(models.Model):
     # Defino una paleta de colores simple para etiquetas.
     COLOR_CHOICES = [
@@ -80,12 +271,48 @@ class Tag(models.Model):
         ("#e2e3e5", "Gris"),
         ("#f3e5f5", "Morado"),
     ]
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, null=True, blank=True, related_name="tags"
+    )
     name = models.CharField(max_length=50)
     color = models.CharField(max_length=7, choices=COLOR_CHOICES, default="#cff4fc")
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["board", "name"], name="unique_tag_name_per_board"),
+        ]
+
     def __str__(self):
         return self.name
 
+    # Etiquetas que se pueden usar en un tablero: las suyas y las globales.
+    @classmethod
+    def for_board(cls, board):
+        return cls.objects.filter(Q(board=board) | Q(board__isnull=True)).order_by("name")
+
+
+# Cuento cuántas tareas de cada tablero llevan cada etiqueta; lo mantienen las vistas al
+# etiquetar, desetiquetar, borrar e importar, y lo leen la barra de etiquetas y las facetas.
+class BoardTagUsage(models.Model):
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="tag_usage")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="board_usage")
+    task_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["board", "tag"], name="unique_board_tag_usage"),
+        ]
+
+    # Devuelvo {tag_id: tareas} de un queryset de tareas con una consulta agrupada.
+    @staticmethod
+    def count_tags(tasks):
+        return dict(
+            Task.tags.through.objects.filter(task__in=tasks)
+            .values_list("tag_id")
+            .annotate(total=Count("task_id"))
+            .order_by()
+        )
+
 
 # Represento una tarea individual dentro de una columna del tablero.
 class Task(models.Model):
@@ -121,9 +348,52 @@ class Task(models.Model):
     position = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     tags = models.ManyToManyField(Tag, blank=True, related_name="tasks")
+    changed_version = models.PositiveBigIntegerField(default=0, db_index=True)
+    # Versión de la fila para control optimista: cada escritura exige la versión leída.
+    version = models.PositiveIntegerField(default=1)
+    # Cambia con cada save() (vistas, admin o shell); entra en la clave de la tarjeta cacheada.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["position"]
+        indexes = [
+            # Sirve el orden de cada columna y la paginación por cursor (position, id).
+            models.Index(
+                fields=["task_list", "position", "id"], name="task_list_position_idx"
+            ),
+            # Índices parciales: solo contienen tareas con aviso pendiente, que son pocas.
+            models.Index(
+                fields=["due_date"],
+                condition=Q(due_date__isnull=False, due_soon_notified_at__isnull=True),
+                name="task_due_soon_pending_idx",
+            ),
+            models.Index(
+                fields=["due_date"],
+                condition=Q(due_date__isnull=False, overdue_notified_at__isnull=True),
+                name="task_overdue_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    # Un guardado parcial también escribe updated_at, para que la tarjeta cacheada caduque.
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields:
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
+        super().save(*args, **kwargs)
+
+
+# Guardo el texto buscable de cada tarea (título aparte para puntuarlo más); el índice de
+# texto completo (FTS5 en SQLite, tsvector + GIN en PostgreSQL) lo crea la migración 0027.
+class TaskSearchDocument(models.Model):
+    task = models.OneToOneField(
+        Task, on_delete=models.CASCADE, primary_key=True, related_name="search_document"
+    )
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="+")
+    title = models.CharField(max_length=200)
+    content = models.TextField(blank=True)
 
     def __str__(self):
         return self.title
@@ -167,14 +437,194 @@ class UserProfile(models.Model):
 
 # Registro eventos para el feed de actividad por tablero.
 class Activity(models.Model):
+    # Guardo la acción como código pequeño; el texto visible sale de ACTION_CHOICES.
+    OTHER = 0
+    BOARD_CREATED = 1
+    BOARD_UPDATED = 2
+    LIST_CREATED = 10
+    LIST_DELETED = 11
+    TASK_CREATED = 20
+    TASK_UPDATED = 21
+    TASK_MOVED = 22
+    TASK_DELETED = 23
+    TASKS_IMPORTED = 24
+    MEMBER_SAVED = 30
+    ROLE_UPDATED = 31
+    MEMBER_REMOVED = 32
+    INVITE_SENT = 40
+    INVITE_ACCEPTED = 41
+    INVITE_REVOKED = 42
+
+    ACTION_CHOICES = [
+        (OTHER, "Otra"),
+        (BOARD_CREATED, "Tablero creado"),
+        (BOARD_UPDATED, "Tablero actualizado"),
+        (LIST_CREATED, "Lista creada"),
+        (LIST_DELETED, "Lista eliminada"),
+        (TASK_CREATED, "Tarea creada"),
+        (TASK_UPDATED, "Tarea actualizada"),
+        (TASK_MOVED, "Tarea movida"),
+        (TASK_DELETED, "Tarea eliminada"),
+        (TASKS_IMPORTED, "Tareas importadas"),
+        (MEMBER_SAVED, "Miembro añadido/actualizado"),
+        (ROLE_UPDATED, "Rol actualizado"),
+        (MEMBER_REMOVED, "Miembro eliminado"),
+        (INVITE_SENT, "Invitación enviada"),
+        (INVITE_ACCEPTED, "Invitación aceptada"),
+        (INVITE_REVOKED, "Invitación revocada"),
+    ]
+
     board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="activities")
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
-    action = models.CharField(max_length=120)
+    action = models.PositiveSmallIntegerField(choices=ACTION_CHOICES, default=OTHER)
     details = models.TextField(blank=True)
+    # Sin auto_now_add: la hora se fija al crear la instancia y se guarda tal cual, así el
+    # evento en tiempo real (que sale antes del INSERT diferido) lleva la misma que la fila.
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # Sirve el feed por cursor (created_at, id) de cada tablero sin ordenar en memoria.
+            models.Index(
+                fields=["board", "-created_at", "-id"], name="activity_board_feed_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} ({self.board.title})"
+
+    # Acepto el código o el texto de la acción (filtros y enlaces antiguos); None si no existe.
+    @classmethod
+    def parse_action(cls, value):
+        labels = dict(cls.ACTION_CHOICES)
+        try:
+            code = int(value)
+        except (TypeError, ValueError):
+            code = next((c for c, label in cls.ACTION_CHOICES if label == value), None)
+        return code if code in labels else None
+
+
+# Encolo emails salientes para enviarlos fuera del ciclo request/response.
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pendiente"),
+        ("sending", "Enviando"),
+        ("sent", "Enviado"),
+        ("failed", "Fallido"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+    to_emails = models.JSONField(default=list)
+    from_email = models.CharField(max_length=254, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["next_attempt_at", "id"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to_emails)} ({self.status})"
+
+
+# Guardo exportaciones generadas en segundo plano; se reutilizan mientras el tablero no cambie.
+class ExportJob(models.Model):
+    KIND_CHOICES = [
+        ("tasks_csv", "Tareas CSV"),
+        ("tasks_json", "Tareas JSON"),
+        ("tasks_ndjson", "Tareas NDJSON"),
+        ("activity_csv", "Actividad CSV"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pendiente"),
+        ("running", "Generando"),
+        ("done", "Lista"),
+        ("failed", "Fallida"),
+    ]
+
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="export_jobs")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Parámetros que cambian el contenido (p. ej. el filtro de actividad).
+    params = models.CharField(max_length=255, blank=True, default="")
+    change_version = models.PositiveBigIntegerField()
+    # Última actividad del tablero al pedir una exportación de actividad (0 en las de tareas):
+    # las filas de actividad se guardan al final de la petición, después de subir la versión.
+    last_activity_id = models.PositiveBigIntegerField(default=0)
+    compressed = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    file = models.FileField(upload_to="exports/", blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "board",
+                    "kind",
+                    "params",
+                    "compressed",
+                    "change_version",
+                    "last_activity_id",
+                ],
+                name="unique_export_artifact",
+            ),
+        ]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.board.title} (v{self.change_version})"
+
+
+# Guardo fuera de Activity la actividad antigua: un NDJSON comprimido por tablero y mes
+# (puede haber varias partes del mismo mes si se archiva en pasadas distintas).
+class ActivityArchive(models.Model):
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name="activity_archives"
+    )
+    month = models.DateField()  # Primer día del mes archivado
+    file = models.FileField(upload_to="activity_archive/")
+    row_count = models.PositiveIntegerField(default=0)
+    # Rango de fechas de la parte: ordena las partes al leerlas sin abrir los ficheros.
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-last_created_at", "-id"]
+        indexes = [models.Index(fields=["board", "-last_created_at"])]
+
+    def __str__(self):
+        return f"{self.board.title} {self.month:%Y-%m} ({self.row_count})"
+
+
+# Recuerdo listas y tareas borradas para que los clientes las quiten al sincronizar.
+class BoardTombstone(models.Model):
+    KIND_CHOICES = [
+        ("list", "Lista"),
+        ("task", "Tarea"),
+    ]
+
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="tombstones")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    version = models.PositiveBigIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["board", "version"])]
 
     def __str__(self):
-        return f"{self.action} ({self.board.title})"
+        return f"{self.kind} {self.object_id} - {self.board.title} (v{self.version})"
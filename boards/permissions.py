@@ -0,0 +1,82 @@
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404
+
+from .membership_cache import get_user_board_role
+from .models import Board, Task, TaskList
+
+# Roles con permiso para crear, editar y mover contenido del tablero.
+EDITOR_ROLES = ("owner", "editor")
+
+
+# Represento el acceso del usuario actual a un tablero ya resuelto.
+class BoardAccess:
+    def __init__(self, board, role):
+        self.board = board
+        self.role = role
+
+    @property
+    def is_member(self):
+        return self.role is not None
+
+    @property
+    def can_edit(self):
+        return self.role in EDITOR_ROLES
+
+    @property
+    def is_owner(self):
+        return self.role == "owner"
+
+    def require_member(self):
+        if not self.is_member:
+            raise PermissionDenied
+        return self
+
+    def require_editor(self):
+        if not self.can_edit:
+            raise PermissionDenied
+        return self
+
+    def require_owner(self):
+        if not self.is_owner:
+            raise PermissionDenied
+        return self
+
+
+# Memorizo el acceso en la request para que cada tablero se resuelva una sola vez.
+def remember_board_access(request, board, role):
+    cache = request.__dict__.setdefault("_board_access", {})
+    access = BoardAccess(board, role)
+    cache[board.pk] = access
+    return access
+
+
+# Tomo el rol de la caché por usuario: en el caso habitual no cuesta consultas.
+def get_board_access(request, board):
+    cache = request.__dict__.setdefault("_board_access", {})
+    if board.pk not in cache:
+        role = get_user_board_role(request.user.pk, board.pk)
+        remember_board_access(request, board, role)
+    return cache[board.pk]
+
+
+# Cargo tablero, lista o tarea con su tablero en una consulta; el rol sale de la caché.
+def load_board(request, board_id):
+    board = get_object_or_404(Board, pk=board_id)
+    return board, get_board_access(request, board)
+
+
+def load_task_list(request, list_id):
+    task_list = get_object_or_404(TaskList.objects.select_related("board"), pk=list_id)
+    return task_list, get_board_access(request, task_list.board)
+
+
+def load_task(request, task_id):
+    queryset = Task.objects.select_related("task_list__board", "created_by")
+    task = get_object_or_404(queryset, pk=task_id)
+    return task, get_board_access(request, task.task_list.board)
+
+
+# Doy a las vistas basadas en clase los mismos helpers de permisos.
+class BoardAccessMixin:
+    def get_board_access(self, board):
+        return get_board_access(self.request, board)
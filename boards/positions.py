@@ -0,0 +1,128 @@
+from django.db.models import F, Max, Q
+
+from .models import Task, TaskList
+
+# Separación entre posiciones consecutivas: cada hueco admite ~10 inserciones por
+# bisección antes de tener que renumerar la columna.
+POSITION_GAP = 1024
+# Al pasar de este valor renumero la columna en lugar de seguir sumando huecos: las altas al
+# final crecen sin límite y Task.position es un PositiveIntegerField (máximo 2**31 - 1).
+POSITION_LIMIT = 2**30
+
+
+# La fila cambió desde que el cliente la leyó (control optimista de concurrencia).
+class VersionConflict(Exception):
+    def __init__(self, model, pk):
+        super().__init__(f"{model.__name__} {pk} cambió mientras se editaba")
+        self.model = model
+        self.pk = pk
+
+
+# Posición al final de la columna, sin COUNT y sin repetir tras borrados. Si pasaría de
+# POSITION_LIMIT renumero antes la columna. Devuelvo (posición, ids de tareas renumeradas).
+def next_position(task_list):
+    last = task_list.tasks.aggregate(last=Max("position"))["last"]
+    position = (last or 0) + POSITION_GAP
+    if position <= POSITION_LIMIT:
+        return position, []
+    shifted = rebalance_list(task_list)
+    return (task_list.tasks.count() + 1) * POSITION_GAP, shifted
+
+
+def _free_position(before, after):
+    if before is None and after is None:
+        return POSITION_GAP
+    if after is None:
+        return before + POSITION_GAP
+    low = before if before is not None else 0
+    middle = (low + after) // 2
+    if low < middle < after:
+        return middle
+    return None
+
+
+# Renumero la columna con huecos uniformes dejando la tarea (si la hay) en `index`, o al final
+# si es None. Solo escribo las filas cuya posición cambia; devuelvo sus ids. Antes reservo la
+# renumeración subiendo la versión de la lista: si otra petición renumeró a la vez, hay
+# conflicto en lugar de mezcla.
+def rebalance_list(task_list, task=None, index=None):
+    claimed = TaskList.objects.filter(pk=task_list.pk, version=task_list.version).update(
+        version=F("version") + 1
+    )
+    if not claimed:
+        raise VersionConflict(TaskList, task_list.pk)
+    task_list.version += 1
+    ordered = task_list.tasks.order_by("position", "id").only("id", "position")
+    if task is not None:
+        ordered = ordered.exclude(pk=task.pk)
+    ordered = list(ordered)
+    if task is not None:
+        index = len(ordered) if index is None else min(index, len(ordered))
+        ordered.insert(index, task)
+    changed = []
+    for i, item in enumerate(ordered, start=1):
+        position = i * POSITION_GAP
+        if item is task:
+            task.position = position
+        elif item.position != position:
+            item.position = position
+            changed.append(item)
+    Task.objects.bulk_update(changed, ["position"], batch_size=500)
+    return [item.pk for item in changed]
+
+
+# Índice equivalente a "justo después de la tarea `after_id`" (None: al principio).
+def index_after(task_list, task, after_id):
+    if after_id is None:
+        return 0
+    anchor = task_list.tasks.exclude(pk=task.pk).filter(pk=after_id).values_list(
+        "position", "id"
+    ).first()
+    if anchor is None:
+        return None
+    position, anchor_id = anchor
+    return (
+        task_list.tasks.exclude(pk=task.pk)
+        .filter(Q(position__lt=position) | Q(position=position, id__lte=anchor_id))
+        .count()
+    )
+
+
+# Coloco la tarea en la columna destino en el índice pedido (None: al final). Normalmente
+# solo se escribe la propia tarea; si no queda hueco entre sus vecinas (o la posición pasaría
+# de POSITION_LIMIT), renumero la columna.
+# La escritura es condicional a `version`, la que leyó el cliente: si la tarea cambió entretanto
+# lanzo VersionConflict. Devuelvo los ids de otras tareas cuya posición ha cambiado.
+def place_task(task, task_list, index=None, *, version):
+    others = task_list.tasks.exclude(pk=task.pk).order_by("position", "id")
+    if index is None:
+        before = others.aggregate(last=Max("position"))["last"]
+        after = None
+    else:
+        index = max(0, index)
+        neighbours = list(others.values_list("position", flat=True)[max(index - 1, 0):index + 1])
+        if index == 0:
+            before = None
+            after = neighbours[0] if neighbours else None
+        elif neighbours:
+            before = neighbours[0]
+            after = neighbours[1] if len(neighbours) > 1 else None
+        else:
+            # Índice más allá del final: la dejo la última.
+            before = others.aggregate(last=Max("position"))["last"]
+            after = None
+
+    task.task_list = task_list
+    position = _free_position(before, after)
+    shifted = []
+    if position is None or position > POSITION_LIMIT:
+        shifted = rebalance_list(task_list, task, index)
+    else:
+        task.position = position
+    updated = Task.objects.filter(pk=task.pk, version=version).update(
+        task_list=task_list, position=task.position, version=F("version") + 1
+    )
+    if not updated:
+        raise VersionConflict(Task, task.pk)
+    task.version = version + 1
+    return shifted
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import logging
+import re
+import select
+import threading
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from .membership_cache import get_user_board_role
+from .models import Activity
+
+logger = logging.getLogger(__name__)
+
+BOARD_SOCKET_PATH = re.compile(r"^/ws/boards/(?P<board_id>\d+)/$")
+
+# Traduzco la acción registrada en Activity al tipo de evento que consume el frontend.
+ACTIVITY_EVENT_TYPES = {
+    Activity.TASK_CREATED: "task.created",
+    Activity.TASK_MOVED: "task.moved",
+    Activity.TASK_UPDATED: "task.edited",
+    Activity.TASK_DELETED: "task.deleted",
+    Activity.LIST_CREATED: "list.created",
+    Activity.LIST_DELETED: "list.deleted",
+}
+
+
+def board_channel(board_id):
+    return f"board:{board_id}"
+
+
+# Interfaz de pub/sub: publish() se llama desde vistas síncronas y subscribe() desde el
+# servidor ASGI. Para varios nodos basta con otra implementación (ver PostgresBroker).
+class BaseBroker:
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def unsubscribe(self, channel, queue):
+        raise NotImplementedError
+
+
+# Reparto en memoria para un solo proceso: cada socket tiene su cola en su event loop.
+class InMemoryBroker(BaseBroker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=getattr(settings, "BOARD_EVENTS_QUEUE_SIZE", 100))
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add((loop, queue))
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(channel, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    # Entrego en el loop de cada suscriptor; es seguro llamarlo desde cualquier hilo.
+    def deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, message)
+
+
+def _offer(queue, message):
+    # Un cliente lento no bloquea al resto: si su cola está llena descarto el evento
+    # (el cliente se pone al día con /changes en cuanto procesa el siguiente).
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        pass
+
+
+# Varios nodos con PostgreSQL: publico con pg_notify y un hilo por proceso escucha con
+# LISTEN y reparte localmente. NOTIFY se entrega al confirmar la transacción.
+class PostgresBroker(InMemoryBroker):
+    pg_channel = "board_events"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, channel, message):
+        payload = json.dumps({"channel": channel, "message": message})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.pg_channel, payload])
+
+    def subscribe(self, channel):
+        self._ensure_listener()
+        return super().subscribe(channel)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+
+        db = settings.DATABASES["default"]
+        conn = psycopg2.connect(
+            dbname=db["NAME"],
+            user=db.get("USER") or None,
+            password=db.get("PASSWORD") or None,
+            host=db.get("HOST") or None,
+            port=db.get("PORT") or None,
+        )
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.pg_channel}")
+        try:
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        data = json.loads(notify.payload)
+                    except ValueError:
+                        continue
+                    self.deliver(data["channel"], data["message"])
+        except Exception:
+            logger.exception("Se cayó el listener de eventos de tablero")
+        finally:
+            conn.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            backend = getattr(settings, "BOARD_EVENTS_BACKEND", "boards.realtime.InMemoryBroker")
+            _broker = import_string(backend)()
+        return _broker
+
+
+# Publico el evento al confirmar la transacción: nadie recibe cambios que luego se deshacen.
+def publish_board_event(board_id, message):
+    def send():
+        try:
+            get_broker().publish(board_channel(board_id), message)
+        except Exception:
+            logger.exception("No se pudo publicar el evento del tablero %s", board_id)
+
+    transaction.on_commit(send)
+
+
+def activity_event(activity, version):
+    return {
+        "type": ACTIVITY_EVENT_TYPES.get(activity.action, "activity"),
+        "version": version,
+        "activity": {
+            "action": activity.get_action_display(),
+            "details": activity.details,
+            "user": activity.user.username if activity.user else None,
+            "created_at": activity.created_at.isoformat(),
+        },
+    }
+
+
+# ---------------------------------------------------------------------
+# Aquí sirvo el WebSocket por tablero directamente sobre ASGI
+# ---------------------------------------------------------------------
+def _header(scope, name):
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin1")
+    return ""
+
+
+# Evito conexiones desde otros orígenes (cross-site WebSocket hijacking).
+def _origin_allowed(scope):
+    origin = _header(scope, b"origin")
+    if not origin:
+        return True
+    return urlsplit(origin).netloc == _header(scope, b"host")
+
+
+def _session_user_id(scope):
+    cookie = SimpleCookie()
+    cookie.load(_header(scope, b"cookie"))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    user = get_user(SimpleNamespace(session=engine.SessionStore(morsel.value)))
+    return user.pk if user.is_authenticated else None
+
+
+# Evento de control: se publica al quitar una membresía para cerrar los sockets de ese usuario.
+MEMBER_REMOVED_EVENT = "member.removed"
+
+
+def member_removed_event(user_id):
+    return {"type": MEMBER_REMOVED_EVENT, "user_id": user_id}
+
+
+@sync_to_async
+def _authorize(scope, board_id):
+    user_id = _session_user_id(scope)
+    if user_id is None or get_user_board_role(user_id, board_id) is None:
+        return None
+    return user_id
+
+
+# Vuelvo a mirar el rol antes de cada envío (sale de la caché de roles, que se invalida al
+# cambiar la membresía): un miembro expulsado deja de recibir eventos aunque siga conectado.
+@sync_to_async
+def _is_member(user_id, board_id):
+    return get_user_board_role(user_id, board_id) is not None
+
+
+async def board_socket(scope, receive, send):
+    match = BOARD_SOCKET_PATH.match(scope.get("path", ""))
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if match is None or not _origin_allowed(scope):
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    board_id = int(match["board_id"])
+    user_id = await _authorize(scope, board_id)
+    if user_id is None:
+        await send({"type": "websocket.close", "code": 4403})
+        return
+
+    broker = get_broker()
+    channel = board_channel(board_id)
+    queue = broker.subscribe(channel)
+    await send({"type": "websocket.accept"})
+    incoming = asyncio.ensure_future(receive())
+    outgoing = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {incoming, outgoing}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if incoming in done:
+                if incoming.result()["type"] == "websocket.disconnect":
+                    break
+                # El canal es de solo lectura: ignoro lo que mande el cliente.
+                incoming = asyncio.ensure_future(receive())
+            if outgoing in done:
+                event = outgoing.result()
+                if event.get("type") == MEMBER_REMOVED_EVENT:
+                    if event.get("user_id") == user_id:
+                        await send({"type": "websocket.close", "code": 4403})
+                        break
+                elif not await _is_member(user_id, board_id):
+                    await send({"type": "websocket.close", "code": 4403})
+                    break
+                else:
+                    await send({"type": "websocket.send", "text": json.dumps(event)})
+                outgoing = asyncio.ensure_future(queue.get())
+    finally:
+        incoming.cancel()
+        outgoing.cancel()
+        broker.unsubscribe(channel, queue)
@@ -0,0 +1,138 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Task, TaskSearchDocument
+
+SEARCH_RESULTS_LIMIT = 20
+# Tareas reindexadas por lote al reconstruir o al renombrar etiquetas y usuarios.
+INDEX_BATCH_SIZE = 1000
+# Términos máximos por consulta: evita consultas patológicas desde el cuadro de búsqueda.
+SEARCH_MAX_TERMS = 8
+
+
+# El contenido buscable junta descripción, nombres de etiqueta y usuarios asignados.
+def search_document(task_id, board_id, title, description, tag_names, usernames):
+    words = [description, *tag_names, *usernames]
+    return TaskSearchDocument(
+        task_id=task_id,
+        board_id=board_id,
+        title=title,
+        content=" ".join(filter(None, words)),
+    )
+
+
+# Construyo el documento de una tarea ya cargada con etiquetas y asignados.
+def task_search_document(task):
+    return search_document(
+        task.id,
+        task.task_list.board_id,
+        task.title,
+        task.description,
+        [tag.name for tag in task.tags.all()],
+        [user.username for user in task.assigned_to.all()],
+    )
+
+
+# Rehago los documentos de las tareas indicadas con un upsert en bloque; el índice de texto
+# (GIN o FTS5) lo actualiza la base de datos.
+def index_tasks(task_ids):
+    task_ids = list(task_ids)
+    if not task_ids:
+        return 0
+    tasks = (
+        Task.objects.filter(pk__in=task_ids)
+        .select_related("task_list")
+        .prefetch_related("tags", "assigned_to")
+    )
+    documents = [task_search_document(task) for task in tasks]
+    TaskSearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=["task"],
+        update_fields=["board", "title", "content"],
+    )
+    return len(documents)
+
+
+# Reindexo por lotes las tareas de un queryset (p. ej. las de una etiqueta renombrada).
+def index_task_queryset(tasks, batch_size=None, progress=None):
+    batch_size = batch_size or INDEX_BATCH_SIZE
+    task_ids = tasks.order_by("pk").values_list("pk", flat=True)
+    indexed = 0
+    last_id = 0
+    while True:
+        batch = list(task_ids.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return indexed
+        indexed += index_tasks(batch)
+        last_id = batch[-1]
+        if progress:
+            progress(indexed)
+
+
+def search_terms(query):
+    return re.findall(r"\w+", (query or "").lower())[:SEARCH_MAX_TERMS]
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+# PostgreSQL: coincidencia por prefijo sobre la columna tsvector (índice GIN), por ts_rank.
+def _search_postgresql(terms, board_ids, limit):
+    query = " & ".join(f"{term}:*" for term in terms)
+    sql = """
+        SELECT d.task_id, ts_rank(d.search_vector, q) AS rank
+        FROM boards_tasksearchdocument d, to_tsquery('simple', %s) q
+        WHERE d.search_vector @@ q AND d.board_id = ANY(%s)
+        ORDER BY rank DESC, d.task_id DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, list(board_ids), limit])
+        return cursor.fetchall()
+
+
+# SQLite: tabla FTS5 con bm25 (menor es mejor); el título pesa más que el contenido.
+def _search_sqlite(terms, board_ids, limit):
+    query = " ".join(f'"{term}"*' for term in terms)
+    sql = f"""
+        SELECT d.task_id, -bm25(boards_task_fts, 10.0, 1.0) AS rank
+        FROM boards_task_fts
+        JOIN boards_tasksearchdocument d ON d.task_id = boards_task_fts.rowid
+        WHERE boards_task_fts MATCH %s AND d.board_id IN ({_placeholders(board_ids)})
+        ORDER BY rank DESC, d.task_id DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, *board_ids, limit])
+        return cursor.fetchall()
+
+
+# Otras bases de datos: sin índice de texto, filtro por subcadena y sin ranking.
+def _search_fallback(terms, board_ids, limit):
+    documents = TaskSearchDocument.objects.filter(board_id__in=board_ids)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(content__icontains=term))
+    task_ids = documents.order_by("-task_id").values_list("task_id", flat=True)[:limit]
+    return [(task_id, 0.0) for task_id in task_ids]
+
+
+# Devuelvo [(tarea, rank)] de los tableros indicados, de más a menos relevante.
+def search_tasks(query, board_ids, limit=SEARCH_RESULTS_LIMIT):
+    terms = search_terms(query)
+    board_ids = sorted(board_ids)
+    if not terms or not board_ids:
+        return []
+    if connection.vendor == "postgresql":
+        ranked = _search_postgresql(terms, board_ids, limit)
+    elif connection.vendor == "sqlite":
+        ranked = _search_sqlite(terms, board_ids, limit)
+    else:
+        ranked = _search_fallback(terms, board_ids, limit)
+    tasks = Task.objects.select_related("task_list__board").in_bulk(
+        [task_id for task_id, _ in ranked]
+    )
+    return [(tasks[task_id], rank) for task_id, rank in ranked if task_id in tasks]
@@ -0,0 +1,135 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .membership_cache import invalidate_user_board_roles
+from .models import ActivityArchive, BoardMembership, ExportJob, Tag, Task
+from .realtime import member_removed_event, publish_board_event
+from .search import index_task_queryset, index_tasks
+from .sync import record_task_changes
+
+
+# Invalido la caché de roles cuando cambia una membresía (alta, rol, baja o invitación aceptada).
+@receiver(post_save, sender=BoardMembership)
+@receiver(post_delete, sender=BoardMembership)
+def invalidate_membership_roles(sender, instance, **kwargs):
+    invalidate_user_board_roles(instance.user_id)
+
+
+# Al quitar una membresía cierro los sockets abiertos de ese usuario en el tablero.
+@receiver(post_delete, sender=BoardMembership)
+def close_removed_member_sockets(sender, instance, **kwargs):
+    publish_board_event(instance.board_id, member_removed_event(instance.user_id))
+
+
+# Un usuario nuevo no puede heredar roles cacheados de un id reutilizado.
+@receiver(post_save, sender=User)
+def reset_new_user_roles(sender, instance, created, **kwargs):
+    if created:
+        invalidate_user_board_roles(instance.pk)
+
+
+# Guardo el nombre anterior para saber en post_save si ha cambiado (los guardados parciales
+# como el de last_login no lo tocan y no consultan nada).
+@receiver(pre_save, sender=User)
+def remember_previous_username(sender, instance, update_fields=None, **kwargs):
+    if instance.pk and (update_fields is None or "username" in update_fields):
+        instance._previous_username = (
+            User.objects.filter(pk=instance.pk).values_list("username", flat=True).first()
+        )
+
+
+# El nombre de usuario aparece en el documento de búsqueda de sus tareas asignadas y en las
+# tarjetas de las que creó o tiene asignadas: las reindexo y las marco como cambiadas.
+@receiver(post_save, sender=User)
+def refresh_user_tasks(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_username", None)
+    if created or previous is None or previous == instance.username:
+        return
+    index_task_queryset(instance.assigned_tasks.all())
+    record_task_changes(
+        Task.objects.filter(
+            Q(pk__in=instance.assigned_tasks.values("pk")) | Q(created_by=instance)
+        )
+    )
+
+
+# Igual con el nombre o el color de una etiqueta.
+@receiver(post_save, sender=Tag)
+def refresh_tagged_tasks(sender, instance, created, **kwargs):
+    if not created:
+        index_task_queryset(instance.tasks.all())
+        record_task_changes(instance.tasks.all())
+
+
+# Al borrar una etiqueta o un usuario sus filas intermedias se van en cascada, sin señales de
+# m2m ni save() de las tareas: antes de borrar marco sus tarjetas como cambiadas y después
+# reindexo las tareas afectadas.
+@receiver(pre_delete, sender=Tag)
+def remember_tagged_tasks(sender, instance, **kwargs):
+    instance._affected_task_ids = list(instance.tasks.values_list("pk", flat=True))
+    record_task_changes(Task.objects.filter(pk__in=instance._affected_task_ids))
+
+
+@receiver(pre_delete, sender=User)
+def remember_user_tasks(sender, instance, **kwargs):
+    instance._affected_task_ids = list(instance.assigned_tasks.values_list("pk", flat=True))
+    record_task_changes(
+        Task.objects.filter(Q(pk__in=instance._affected_task_ids) | Q(created_by=instance))
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=User)
+def reindex_affected_tasks(sender, instance, **kwargs):
+    index_tasks(getattr(instance, "_affected_task_ids", []))
+
+
+# Mantengo el documento de búsqueda al guardar cualquier tarea (vistas, admin o shell); las
+# cargas masivas con bulk_create (el importador) escriben sus documentos ellas mismas.
+@receiver(post_save, sender=Task)
+def index_saved_task(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_tasks([instance.pk])
+
+
+# Campo de Task de cada tabla intermedia que entra en el documento de búsqueda.
+INDEXED_RELATIONS = {
+    Task.tags.through: "tags",
+    Task.assigned_to.through: "assigned_to",
+}
+
+
+# Y al cambiar etiquetas o asignados, desde la tarea (task.tags.set) o desde el otro lado
+# (tag.tasks.add). Antes de un clear inverso guardo las tareas afectadas.
+@receiver(m2m_changed, sender=Task.tags.through)
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+def index_task_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            index_tasks([instance.pk])
+    elif action == "pre_clear":
+        field = INDEXED_RELATIONS[sender]
+        instance._cleared_task_ids = list(
+            Task.objects.filter(**{field: instance}).values_list("pk", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        index_tasks(pk_set)
+    elif action == "post_clear":
+        index_tasks(getattr(instance, "_cleared_task_ids", []))
+
+
+# Borro el fichero de un registro eliminado (también en cascada al borrar su tablero) cuando se
+# confirma la transacción: si hay rollback la fila vuelve y el fichero tiene que seguir ahí.
+def delete_file_on_commit(field_file):
+    if field_file:
+        storage, name = field_file.storage, field_file.name
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_delete, sender=ActivityArchive)
+@receiver(post_delete, sender=ExportJob)
+def delete_stored_file(sender, instance, **kwargs):
+    delete_file_on_commit(instance.file)
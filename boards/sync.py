@@ -0,0 +1,124 @@
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+
+from .card_cache import render_task_cards
+from .exports import task_json_dict
+from .models import Board, BoardTombstone, Task, TaskList
+
+
+# Subo la versión del tablero y marco con ella lo que ha cambiado, todo en una transacción:
+# así ningún cliente ve la nueva versión sin ver también las filas que la acompañan.
+def record_change(board, tasks=(), lists=(), deleted_tasks=(), deleted_lists=()):
+    with transaction.atomic():
+        version = board.bump_change_version()
+        if tasks:
+            Task.objects.filter(pk__in=tasks).update(changed_version=version)
+        if lists:
+            TaskList.objects.filter(pk__in=lists).update(changed_version=version)
+        tombstones = [
+            BoardTombstone(board=board, kind="task", object_id=pk, version=version)
+            for pk in deleted_tasks
+        ] + [
+            BoardTombstone(board=board, kind="list", object_id=pk, version=version)
+            for pk in deleted_lists
+        ]
+        if tombstones:
+            BoardTombstone.objects.bulk_create(tombstones)
+    return version
+
+
+# Marco como cambiadas las tareas de un queryset, tablero a tablero. Lo uso cuando cambia algo
+# que se ve en sus tarjetas sin tocar la fila (una etiqueta o un usuario renombrado).
+def record_task_changes(tasks):
+    rows = tasks.order_by("task_list__board_id", "pk").values_list("task_list__board_id", "pk")
+    for board_id, group in groupby(rows, key=itemgetter(0)):
+        record_change(Board(pk=board_id), tasks=[pk for _, pk in group])
+
+
+def board_etag(board, since, role=None):
+    # El HTML de las tarjetas depende del rol (botones de edición), así que entra en la clave.
+    suffix = f"-{role}" if role else ""
+    return f'"board-{board.pk}-v{board.change_version}-s{since}{suffix}"'
+
+
+def list_sync_dict(task_list):
+    return {
+        "id": task_list.id,
+        "title": task_list.title,
+        "position": task_list.position,
+        "status_key": task_list.status_key,
+        "task_count": task_list.task_count,
+        "version": task_list.version,
+        "changed_version": task_list.changed_version,
+    }
+
+
+def task_sync_dict(task):
+    data = task_json_dict(task)
+    data["list_id"] = task.task_list_id
+    # `version` es la que el cliente devuelve al editar; `changed_version`, la del tablero.
+    data["version"] = task.version
+    data["changed_version"] = task.changed_version
+    return data
+
+
+# Estado actual de una tarea para responder a un conflicto (None si ya no existe).
+def current_task_state(task_id):
+    task = (
+        Task.objects.select_related("task_list", "created_by")
+        .prefetch_related("assigned_to", "tags")
+        .filter(pk=task_id)
+        .first()
+    )
+    return task_sync_dict(task) if task else None
+
+
+# Devuelvo lo cambiado desde `since`; sin `since` (o si es de otro historial) el estado completo.
+# La versión se toma del tablero ya cargado, antes de leer filas: como mucho se repite algún
+# cambio en la siguiente consulta, nunca se pierde.
+def collect_board_changes(board, since=0, render_role=None, request=None):
+    version = board.change_version
+    full = not since or since > version
+
+    lists = board.lists.order_by("position", "id")
+    tasks = (
+        Task.objects.filter(task_list__board=board)
+        .select_related("task_list", "created_by")
+        .prefetch_related("assigned_to", "tags")
+        .order_by("task_list__position", "position", "id")
+    )
+    deleted = {"lists": [], "tasks": []}
+    if not full:
+        lists = lists.filter(changed_version__gt=since)
+        tasks = tasks.filter(changed_version__gt=since)
+        for kind, object_id in BoardTombstone.objects.filter(
+            board=board, version__gt=since
+        ).values_list("kind", "object_id"):
+            deleted[f"{kind}s"].append(object_id)
+
+    tasks = list(tasks)
+    cards = render_task_cards(request, tasks, render_role) if render_role is not None else {}
+    task_payload = []
+    for task in tasks:
+        data = task_sync_dict(task)
+        if task.pk in cards:
+            data["html"] = cards[task.pk]
+        task_payload.append(data)
+
+    return {
+        "board": {
+            "id": board.id,
+            "title": board.title,
+            "task_count": board.task_count,
+            "done_count": board.done_count,
+            "progress": board.progress,
+        },
+        "version": version,
+        "since": since,
+        "full": full,
+        "lists": [list_sync_dict(task_list) for task_list in lists],
+        "tasks": task_payload,
+        "deleted": deleted,
+    }
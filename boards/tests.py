@@ -1,12 +1,66 @@
+import csv
+import gzip
+import json
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Max
+from django.http import QueryDict
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+
+from .activity import buffered_activities, queue_activity
+from .archive import archive_activity, retention_cutoff
+from .emails import EmailBatch, get_logo_bytes, process_email_queue, send_html_email
+from .filters import TaskFilters, task_facets
+from .forms import CustomPasswordResetForm
+from .importers import import_tasks, parse_task_export
+from .management.commands.send_task_due_notifications import due_soon_tasks, overdue_tasks
+from .models import (
+    Activity,
+    ActivityArchive,
+    Board,
+    BoardMembership,
+    BoardTagUsage,
+    ExportJob,
+    OutboundEmail,
+    Tag,
+    Task,
+    TaskList,
+    TaskSearchDocument,
+    UserProfile,
+)
+from .membership_cache import get_user_board_roles
+from .permissions import get_board_access, load_task
+from .positions import POSITION_GAP, POSITION_LIMIT, VersionConflict, place_task
+from .realtime import activity_event, board_channel, board_socket, get_broker, member_removed_event
+from .search import search_tasks
+from .sync import record_change
 
-from .models import Board, BoardMembership
+
+# Limpio la caché entre tests: el rollback de cada test no dispara señales de invalidación.
+class BoardsTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
 
 
 # En esta suite valido permisos mínimos del CRUD de tableros para evitar regresiones.
-class BoardCrudPermissionsTests(TestCase):
+class BoardCrudPermissionsTests(BoardsTestCase):
     @classmethod
     def setUpTestData(cls):
         # Preparo cuatro perfiles para cubrir owner/editor/viewer y usuario externo.
@@ -84,3 +138,1696 @@ class BoardCrudPermissionsTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertIn("/accounts/login/", response.url)
         self.assertTrue(Board.objects.filter(pk=self.board.pk).exists())
+
+
+# Compruebo que el detalle del tablero mantiene un presupuesto fijo de consultas.
+class BoardDetailQueryBudgetTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.editor = User.objects.create_user(username="editor", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        BoardMembership.objects.create(board=cls.board, user=cls.editor, role="editor")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.done = TaskList.objects.create(board=cls.board, title="Hecho", position=1)
+        cls.tags = [Tag.objects.create(name=f"tag{i}") for i in range(3)]
+
+    def _create_tasks(self, count):
+        for i in range(count):
+            task = Task.objects.create(
+                task_list=self.todo if i % 2 else self.done,
+                title=f"Tarea {i}",
+                created_by=self.owner if i % 2 else self.editor,
+                position=i,
+            )
+            task.assigned_to.set([self.owner, self.editor])
+            task.tags.set(self.tags)
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("boards:board_detail", args=[self.board.pk]))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    # Sin caché de tarjetas, para medir el render completo.
+    @override_settings(CARD_CACHE_TIMEOUT=0)
+    def test_query_count_is_constant_as_tasks_grow(self):
+        self.client.login(username="owner", password="pass12345")
+        self._create_tasks(2)
+        # Caliento la caché de roles para medir el caso habitual.
+        self._count_queries()
+        small_board_queries = self._count_queries()
+        self._create_tasks(30)
+        big_board_queries = self._count_queries()
+        self.assertEqual(small_board_queries, big_board_queries)
+
+    def test_non_member_is_forbidden(self):
+        User.objects.create_user(username="outsider", password="pass12345")
+        self.client.login(username="outsider", password="pass12345")
+        response = self.client.get(reverse("boards:board_detail", args=[self.board.pk]))
+        self.assertEqual(response.status_code, 403)
+
+
+# Valido la paginación por cursor de las columnas del Kanban.
+class ListTasksPageTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.outsider = User.objects.create_user(username="outsider", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        cls.task_list = TaskList.objects.create(board=cls.board, title="Por hacer")
+        cls.tasks = [
+            Task.objects.create(task_list=cls.task_list, title=f"Tarea {i}", position=i)
+            for i in range(25)
+        ]
+        cls.board.recount_tasks()
+
+    def test_board_page_ships_only_first_page(self):
+        self.client.login(username="owner", password="pass12345")
+        response = self.client.get(reverse("boards:board_detail", args=[self.board.pk]))
+        board_list = response.context["board_lists"][0]
+        self.assertEqual(len(board_list.page_tasks), 10)
+        self.assertEqual(board_list.task_total, 25)
+        self.assertEqual(board_list.next_cursor, f"9:{self.tasks[9].id}")
+
+    def test_cursor_walks_through_all_pages(self):
+        self.client.login(username="owner", password="pass12345")
+        url = reverse("boards:list_tasks_page", args=[self.task_list.pk])
+        seen = []
+        cursor = None
+        while True:
+            params = {"after": cursor} if cursor else {}
+            data = self.client.get(url, params).json()
+            seen.append(data["count"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, [10, 10, 5])
+
+    def test_non_member_cannot_fetch_page(self):
+        self.client.login(username="outsider", password="pass12345")
+        response = self.client.get(reverse("boards:list_tasks_page", args=[self.task_list.pk]))
+        self.assertEqual(response.status_code, 403)
+
+
+# Verifico que los contadores materializados siguen a las vistas que mutan tareas y listas.
+class TaskCountersTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.done = TaskList.objects.create(board=cls.board, title="Terminado", position=1)
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="owner", password="pass12345")
+
+    def _add_task(self, task_list, title="Tarea"):
+        self.client.post(
+            reverse("boards:add_task", args=[task_list.pk]),
+            data={"title": title, "priority": "medium"},
+        )
+        return Task.objects.get(title=title)
+
+    def _counters(self):
+        self.board.refresh_from_db()
+        return (
+            self.board.task_count,
+            self.board.todo_count,
+            self.board.doing_count,
+            self.board.done_count,
+        )
+
+    def test_list_status_key_is_stored(self):
+        self.assertEqual(self.todo.status_key, "todo")
+        self.assertEqual(self.done.status_key, "done")
+
+    def test_add_move_and_delete_task_keep_counters(self):
+        task = self._add_task(self.todo)
+        self._add_task(self.todo, "Otra")
+        self.assertEqual(self._counters(), (2, 2, 0, 0))
+
+        self.client.post(
+            reverse("boards:move_task"),
+            data={"task_id": task.pk, "new_list_id": self.done.pk, "version": task.version},
+            content_type="application/json",
+        )
+        self.assertEqual(self._counters(), (2, 1, 0, 1))
+        self.assertEqual(self.board.progress, 50)
+
+        self.client.post(reverse("boards:delete_task", args=[task.pk]))
+        self.assertEqual(self._counters(), (1, 1, 0, 0))
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.task_count, 0)
+
+    def test_delete_list_and_rename_update_counters(self):
+        self._add_task(self.todo)
+        self._add_task(self.done, "Hecha")
+
+        self.todo.title = "En proceso"
+        self.todo.save()
+        self.assertEqual(self._counters(), (2, 0, 1, 1))
+
+        self.client.post(reverse("boards:delete_list", args=[self.done.pk]))
+        self.assertEqual(self._counters(), (1, 0, 1, 0))
+
+    def test_recount_matches_incremental_counters(self):
+        self._add_task(self.todo)
+        self._add_task(self.done, "Hecha")
+        expected = self._counters()
+        Board.objects.filter(pk=self.board.pk).update(task_count=0, todo_count=0, done_count=0)
+        self.board.recount_tasks()
+        self.assertEqual(self._counters(), expected)
+
+
+# Compruebo el orden con huecos: mover escribe una fila y solo se renumera sin hueco libre.
+class TaskOrderingTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.viewer = User.objects.create_user(username="viewer", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        BoardMembership.objects.create(board=cls.board, user=cls.viewer, role="viewer")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.done = TaskList.objects.create(board=cls.board, title="Hecho", position=1)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+        self.tasks = [
+            Task.objects.create(task_list=self.todo, title=f"T{i}", position=(i + 1) * POSITION_GAP)
+            for i in range(4)
+        ]
+        self.board.recount_tasks()
+
+    # Completo cada movimiento con la versión actual de la tarea, como hace el tablero.
+    def move(self, *moves):
+        versions = dict(Task.objects.values_list("id", "version"))
+        moves = [{"version": versions.get(move["task_id"]), **move} for move in moves]
+        return self.client.post(
+            reverse("boards:move_task"),
+            data=json.dumps({"moves": moves}),
+            content_type="application/json",
+        )
+
+    def titles(self, task_list):
+        return list(task_list.tasks.order_by("position", "id").values_list("title", flat=True))
+
+    def test_add_task_appends_after_last_position(self):
+        self.tasks[1].delete()
+        self.client.post(
+            reverse("boards:add_task", args=[self.todo.id]),
+            {"title": "Nueva", "priority": "low"},
+        )
+        self.assertEqual(Task.objects.get(title="Nueva").position, 5 * POSITION_GAP)
+
+    def test_reorder_writes_only_the_moved_task(self):
+        before = dict(Task.objects.values_list("title", "position"))
+        response = self.move({"task_id": self.tasks[3].id, "list_id": self.todo.id, "index": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(self.todo), ["T0", "T3", "T1", "T2"])
+        after = dict(Task.objects.values_list("title", "position"))
+        self.assertEqual({t for t in after if after[t] != before[t]}, {"T3"})
+        self.assertEqual(response.json()["tasks"][0]["position"], after["T3"])
+
+    def test_batch_moves_across_lists_keep_order_and_counters(self):
+        self.move(
+            {"task_id": self.tasks[0].id, "list_id": self.done.id, "index": 0},
+            {"task_id": self.tasks[2].id, "list_id": self.done.id, "index": 0},
+        )
+        self.assertEqual(self.titles(self.done), ["T2", "T0"])
+        self.assertEqual(self.titles(self.todo), ["T1", "T3"])
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.task_count, 2)
+
+    def test_rebalances_when_gap_is_exhausted(self):
+        Task.objects.filter(pk=self.tasks[1].pk).update(position=POSITION_GAP + 1)
+        self.move({"task_id": self.tasks[3].id, "list_id": self.todo.id, "index": 1})
+        self.assertEqual(self.titles(self.todo), ["T0", "T3", "T1", "T2"])
+        positions = list(self.todo.tasks.order_by("position").values_list("position", flat=True))
+        self.assertEqual(positions, [POSITION_GAP * i for i in range(1, 5)])
+
+    def test_positions_past_the_limit_are_renumbered(self):
+        Task.objects.filter(pk=self.tasks[3].pk).update(position=POSITION_LIMIT)
+        self.client.post(
+            reverse("boards:add_task", args=[self.todo.id]),
+            {"title": "Nueva", "priority": "low"},
+        )
+        self.assertEqual(self.titles(self.todo), ["T0", "T1", "T2", "T3", "Nueva"])
+        positions = list(self.todo.tasks.order_by("position").values_list("position", flat=True))
+        self.assertEqual(positions, [POSITION_GAP * i for i in range(1, 6)])
+
+        Task.objects.filter(title="Nueva").update(position=POSITION_LIMIT)
+        self.move({"task_id": self.tasks[0].id, "list_id": self.todo.id})
+        self.assertEqual(self.titles(self.todo), ["T1", "T2", "T3", "Nueva", "T0"])
+        self.assertEqual(self.todo.tasks.aggregate(last=Max("position"))["last"], 5 * POSITION_GAP)
+
+    def test_after_id_anchors_the_move(self):
+        self.move({"task_id": self.tasks[0].id, "list_id": self.todo.id, "after_id": self.tasks[2].id})
+        self.assertEqual(self.titles(self.todo), ["T1", "T2", "T0", "T3"])
+
+    def test_batch_is_rolled_back_when_a_move_is_denied(self):
+        other = Board.objects.create(title="Otro", owner=self.viewer)
+        foreign = TaskList.objects.create(board=other, title="Ajena", position=0)
+        response = self.move(
+            {"task_id": self.tasks[0].id, "list_id": self.done.id, "index": 0},
+            {"task_id": self.tasks[1].id, "list_id": foreign.id, "index": 0},
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.titles(self.todo), ["T0", "T1", "T2", "T3"])
+
+    def test_invalid_payload_is_rejected(self):
+        response = self.move({"task_id": "x", "list_id": self.todo.id})
+        self.assertEqual(response.status_code, 400)
+
+    def test_move_without_version_is_rejected(self):
+        response = self.client.post(
+            reverse("boards:move_task"),
+            data=json.dumps({"moves": [{"task_id": self.tasks[0].id, "list_id": self.done.id}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.titles(self.done), [])
+
+    def test_add_task_rebalance_conflict_redirects_form_posts(self):
+        with mock.patch("boards.views.next_position", side_effect=VersionConflict(TaskList, self.todo.pk)):
+            response = self.client.post(
+                reverse("boards:add_task", args=[self.todo.id]),
+                {"title": "Nueva", "priority": "low"},
+            )
+        self.assertRedirects(response, reverse("boards:board_detail", args=[self.board.id]))
+        self.assertFalse(Task.objects.filter(title="Nueva").exists())
+
+
+# Compruebo el control optimista: quien escribe con una versión vieja recibe 409 y el estado actual.
+class TaskConcurrencyTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.done = TaskList.objects.create(board=cls.board, title="Hecho", position=1)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+        self.task = Task.objects.create(task_list=self.todo, title="Original", position=POSITION_GAP)
+        self.board.recount_tasks()
+
+    def edit(self, title, version, **extra):
+        return self.client.post(
+            reverse("boards:edit_task", args=[self.task.id]),
+            {"title": title, "description": "", "priority": "low", "version": version},
+            **extra,
+        )
+
+    def test_edit_bumps_version(self):
+        response = self.edit("Primera", 1, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.version), ("Primera", 2))
+
+    def test_edit_without_version_is_rejected(self):
+        response = self.edit("Primera", "", HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.version), ("Original", 1))
+
+    def test_stale_edit_returns_conflict_with_current_state(self):
+        self.edit("Primera", 1)
+        response = self.edit("Segunda", 1, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["task"]["title"], "Primera")
+        self.assertEqual(response.json()["task"]["version"], 2)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Primera")
+
+    def test_stale_form_edit_redirects_with_message(self):
+        self.edit("Primera", 1)
+        response = self.edit("Segunda", 1, follow=True)
+        self.assertContains(response, "cambió mientras la editabas")
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Primera")
+
+    def test_stale_move_is_rejected_and_rolled_back(self):
+        self.edit("Primera", 1)
+        response = self.client.post(
+            reverse("boards:move_task"),
+            data=json.dumps({"moves": [{"task_id": self.task.id, "list_id": self.done.id, "version": 1}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["task"]["list_id"], self.todo.id)
+        self.done.refresh_from_db()
+        self.assertEqual(self.done.task_count, 0)
+
+    def test_concurrent_rebalance_conflicts_on_list_version(self):
+        other = Task.objects.create(task_list=self.todo, title="Otra", position=POSITION_GAP + 1)
+        stale_list = TaskList.objects.get(pk=self.todo.pk)
+        TaskList.objects.filter(pk=self.todo.pk).update(version=5)
+        with self.assertRaises(VersionConflict):
+            task = Task.objects.create(task_list=self.done, title="Nueva")
+            place_task(task, stale_list, 1, version=task.version)
+        self.assertEqual(Task.objects.get(pk=other.pk).position, POSITION_GAP + 1)
+
+
+# Compruebo que el listado de tableros resume cada tarjeta sin consultas por tablero.
+class BoardListSummaryTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.viewer = User.objects.create_user(username="viewer", password="pass12345")
+
+    def _create_board(self, index):
+        board = Board.objects.create(title=f"Tablero {index}", owner=self.owner)
+        BoardMembership.objects.create(board=board, user=self.owner, role="owner")
+        BoardMembership.objects.create(board=board, user=self.viewer, role="viewer")
+        todo = TaskList.objects.create(board=board, title="Por hacer")
+        done = TaskList.objects.create(board=board, title="Hecho")
+        yesterday = timezone.now() - timezone.timedelta(days=1)
+        Task.objects.create(task_list=todo, title="Vencida", due_date=yesterday)
+        Task.objects.create(task_list=todo, title="Pendiente")
+        Task.objects.create(task_list=done, title="Cerrada", due_date=yesterday)
+        board.recount_tasks()
+        return board
+
+    def _get_home(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("boards:board_list"))
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_cards_show_aggregates(self):
+        self._create_board(0)
+        self.client.login(username="viewer", password="pass12345")
+        response, _ = self._get_home()
+        board = response.context["boards"][0]
+        self.assertEqual(board.user_role, "viewer")
+        self.assertEqual(board.task_count, 3)
+        self.assertEqual(board.progress, 33)
+        self.assertEqual(board.overdue_count, 1)
+        self.assertEqual(board.member_count, 2)
+
+    def test_query_count_does_not_grow_with_boards(self):
+        self.client.login(username="owner", password="pass12345")
+        self._create_board(0)
+        _, few_boards_queries = self._get_home()
+        for index in range(1, 8):
+            self._create_board(index)
+        response, many_boards_queries = self._get_home()
+        self.assertEqual(len(response.context["boards"]), 8)
+        self.assertEqual(few_boards_queries, many_boards_queries)
+
+
+# Cubro la capa de permisos: rol resuelto junto al objeto y memorizado por request.
+class BoardPermissionLayerTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.viewer = User.objects.create_user(username="viewer", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        BoardMembership.objects.create(board=cls.board, user=cls.viewer, role="viewer")
+        cls.task_list = TaskList.objects.create(board=cls.board, title="Por hacer")
+        cls.task = Task.objects.create(task_list=cls.task_list, title="Tarea")
+
+    def test_task_board_and_role_load_in_one_query(self):
+        request = RequestFactory().get("/")
+        request.user = self.owner
+        get_user_board_roles(self.owner.pk)
+        with self.assertNumQueries(1):
+            task, access = load_task(request, self.task.pk)
+            self.assertEqual(task.task_list.board, self.board)
+            self.assertTrue(access.can_edit)
+        with self.assertNumQueries(0):
+            self.assertTrue(get_board_access(request, self.board).is_owner)
+
+    def test_viewer_cannot_add_task(self):
+        self.client.login(username="viewer", password="pass12345")
+        response = self.client.post(
+            reverse("boards:add_task", args=[self.task_list.pk]),
+            data={"title": "Nueva", "priority": "low"},
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Task.objects.filter(title="Nueva").exists())
+
+    def test_anonymous_redirected_from_add_task(self):
+        response = self.client.post(reverse("boards:add_task", args=[self.task_list.pk]))
+        self.assertEqual(response.status_code, 302)
+
+
+# Compruebo la caché de roles por usuario y su invalidación por señales.
+class MembershipCacheTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.member = User.objects.create_user(username="member", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+
+    def test_roles_are_served_from_cache(self):
+        get_user_board_roles(self.owner.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_board_roles(self.owner.pk), {self.board.pk: "owner"})
+
+    def test_membership_changes_invalidate_cache(self):
+        self.assertEqual(get_user_board_roles(self.member.pk), {})
+        membership = BoardMembership.objects.create(
+            board=self.board, user=self.member, role="viewer"
+        )
+        self.assertEqual(get_user_board_roles(self.member.pk), {self.board.pk: "viewer"})
+        membership.role = "editor"
+        membership.save()
+        self.assertEqual(get_user_board_roles(self.member.pk), {self.board.pk: "editor"})
+
+    def test_remove_member_revokes_access(self):
+        membership = BoardMembership.objects.create(
+            board=self.board, user=self.member, role="editor"
+        )
+        get_user_board_roles(self.member.pk)
+        self.client.login(username="owner", password="pass12345")
+        self.client.post(
+            reverse("boards:remove_member", args=[self.board.pk, membership.pk])
+        )
+        self.client.login(username="member", password="pass12345")
+        response = self.client.get(reverse("boards:board_detail", args=[self.board.pk]))
+        self.assertEqual(response.status_code, 403)
+
+
+# Valido que las vistas solo encolan emails y que el worker los envía con reintentos.
+class EmailQueueTests(BoardsTestCase):
+    def test_send_html_email_only_enqueues(self):
+        send_html_email("Asunto", "Texto", "<p>HTML</p>", ["a@example.com"])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().status, "pending")
+
+    def test_worker_drains_queue(self):
+        for i in range(3):
+            send_html_email(f"Asunto {i}", "Texto", "<p>HTML</p>", [f"u{i}@example.com"])
+        call_command("process_email_queue", "--workers", "2", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboundEmail.objects.exclude(status="sent").exists())
+
+    def test_failed_delivery_is_retried_later(self):
+        send_html_email("Asunto", "Texto", "", ["a@example.com"])
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=OSError("smtp caído"),
+        ):
+            process_email_queue(max_attempts=2)
+        outbound = OutboundEmail.objects.get()
+        self.assertEqual(outbound.status, "pending")
+        self.assertEqual(outbound.attempts, 1)
+        self.assertGreater(outbound.next_attempt_at, timezone.now())
+        # No se reintenta hasta que vence el backoff.
+        self.assertEqual(process_email_queue(), (0, 0))
+
+    def test_batch_enqueues_in_one_insert(self):
+        with self.assertNumQueries(1):
+            with EmailBatch() as batch:
+                for i in range(5):
+                    send_html_email(f"Asunto {i}", "Texto", "", [f"u{i}@example.com"], batch=batch)
+        self.assertEqual(OutboundEmail.objects.filter(status="pending").count(), 5)
+
+    def test_password_reset_keeps_sender_and_drops_body_once_sent(self):
+        User.objects.create_user(username="ana", password="pass12345", email="ana@example.com")
+        form = CustomPasswordResetForm(data={"username": "ana", "email": "ana@example.com"})
+        self.assertTrue(form.is_valid())
+        form.save(from_email="soporte@example.com", domain_override="testserver")
+        outbound = OutboundEmail.objects.get()
+        self.assertEqual(outbound.from_email, "soporte@example.com")
+        self.assertIn("/accounts/reset/", outbound.text_body)
+
+        process_email_queue()
+        self.assertEqual(mail.outbox[0].from_email, "soporte@example.com")
+        self.assertIn("/accounts/reset/", mail.outbox[0].body)
+        outbound.refresh_from_db()
+        self.assertEqual((outbound.status, outbound.text_body, outbound.html_body), ("sent", "", ""))
+
+    def test_worker_prunes_resolved_emails_after_retention(self):
+        for i in range(3):
+            send_html_email(f"Asunto {i}", "Texto", "", [f"u{i}@example.com"])
+        process_email_queue()
+        pending = send_html_email("Pendiente", "Texto", "", ["p@example.com"])
+        OutboundEmail.objects.update(created_at=timezone.now() - timezone.timedelta(days=30))
+        OutboundEmail.objects.filter(pk=pending.pk).update(next_attempt_at=timezone.now() + timezone.timedelta(hours=1))
+        out = StringIO()
+        call_command("process_email_queue", "--retention-days", "7", stdout=out)
+        self.assertIn("Purgados: 3", out.getvalue())
+        self.assertEqual(list(OutboundEmail.objects.values_list("pk", flat=True)), [pending.pk])
+
+    @override_settings(EMAIL_QUEUE_ENABLED=False)
+    def test_synchronous_batch_reuses_one_connection(self):
+        get_logo_bytes.cache_clear()
+        with mock.patch(
+            "boards.emails.get_connection", wraps=get_connection
+        ) as connection_factory:
+            with EmailBatch() as batch:
+                for i in range(4):
+                    send_html_email(f"Asunto {i}", "Texto", "<p>HTML</p>", [f"u{i}@example.com"], batch=batch)
+        self.assertEqual(connection_factory.call_count, 1)
+        self.assertEqual(len(mail.outbox), 4)
+        # El logo se lee de disco una vez, pero cada mensaje lleva su propia parte MIME.
+        self.assertEqual(get_logo_bytes.cache_info().misses, 1)
+        first, last = mail.outbox[0].attachments[0], mail.outbox[3].attachments[0]
+        self.assertIsNot(first, last)
+        self.assertEqual(first.get_payload(decode=True), get_logo_bytes())
+        self.assertEqual(last.get_payload(decode=True), get_logo_bytes())
+
+
+class DueNotificationsCommandTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345", email="o@example.com")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        cls.task_list = TaskList.objects.create(board=cls.board, title="Por hacer")
+        cls.users = [
+            User.objects.create_user(username=f"u{i}", password="pass12345", email=f"u{i}@example.com")
+            for i in range(3)
+        ]
+        # Un usuario sin avisos y otro sin email no deben recibir nada.
+        UserProfile.objects.create(user=cls.users[2], notify_task_due=False)
+        cls.no_email = User.objects.create_user(username="sinmail", password="pass12345")
+
+    def create_tasks(self, count, due_date):
+        tasks = []
+        for i in range(count):
+            task = Task.objects.create(
+                task_list=self.task_list, title=f"Tarea {i}", position=i, due_date=due_date
+            )
+            task.assigned_to.set([*self.users, self.no_email])
+            tasks.append(task)
+        return tasks
+
+    def run_command(self, *args):
+        call_command("send_task_due_notifications", *args, stdout=StringIO())
+
+    def test_notifies_opted_in_assignees_and_stamps_tasks(self):
+        soon = self.create_tasks(2, timezone.now() + timezone.timedelta(hours=2))
+        late = self.create_tasks(1, timezone.now() - timezone.timedelta(hours=2))
+        self.run_command("--batch-size", "2")
+
+        self.assertEqual(OutboundEmail.objects.count(), 6)
+        self.assertFalse(
+            Task.objects.filter(pk__in=[t.pk for t in soon], due_soon_notified_at__isnull=True).exists()
+        )
+        self.assertIsNotNone(Task.objects.get(pk=late[0].pk).overdue_notified_at)
+
+        # Una segunda pasada no duplica avisos.
+        self.run_command()
+        self.assertEqual(OutboundEmail.objects.count(), 6)
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        due = timezone.now() + timezone.timedelta(hours=2)
+        self.create_tasks(3, due)
+        with CaptureQueriesContext(connection) as small:
+            self.run_command()
+        Task.objects.update(due_soon_notified_at=None)
+        self.create_tasks(12, due)
+        with CaptureQueriesContext(connection) as large:
+            self.run_command()
+        self.assertEqual(len(small), len(large))
+
+
+# Compruebo con EXPLAIN que las consultas calientes usan los índices de la migración 0019.
+class QueryPlanIndexTests(BoardsTestCase):
+    def explain(self, queryset):
+        if connection.vendor == "postgresql":
+            # Con tablas casi vacías PostgreSQL prefiere el seq scan; lo desactivo para ver el índice.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        elif connection.vendor != "sqlite":
+            self.skipTest("Solo se comprueban planes en SQLite y PostgreSQL.")
+        return queryset.explain()
+
+    def test_due_notification_scans_use_partial_indexes(self):
+        now = timezone.now()
+        soon_plan = self.explain(due_soon_tasks(now, now + timezone.timedelta(hours=24)))
+        overdue_plan = self.explain(overdue_tasks(now))
+        self.assertIn("task_due_soon_pending_idx", soon_plan)
+        self.assertIn("task_overdue_pending_idx", overdue_plan)
+
+    def test_column_ordering_uses_position_indexes(self):
+        task_plan = self.explain(Task.objects.filter(task_list_id=1).order_by("position", "id"))
+        list_plan = self.explain(TaskList.objects.filter(board_id=1).order_by("position"))
+        self.assertIn("task_list_position_idx", task_plan)
+        self.assertIn("tasklist_board_position_idx", list_plan)
+
+    def test_activity_feed_uses_feed_index(self):
+        plan = self.explain(
+            Activity.objects.filter(board_id=1, created_at__lt=timezone.now()).order_by("-created_at", "-id")[:11]
+        )
+        self.assertIn("activity_board_feed_idx", plan)
+
+
+@override_settings(EXPORT_JOBS_ENABLED=False)
+class StreamingExportTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        cls.task_list = TaskList.objects.create(board=cls.board, title="Por hacer")
+        tag = Tag.objects.create(name="urgente")
+        for i in range(7):
+            task = Task.objects.create(task_list=cls.task_list, title=f"Tarea {i}", position=i)
+            task.assigned_to.add(cls.owner)
+            task.tags.add(tag)
+            Activity.objects.create(board=cls.board, user=cls.owner, action=Activity.TASK_CREATED, details=task.title)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        return list(csv.reader(StringIO(content)))
+
+    def test_tasks_csv_is_streamed_in_chunks(self):
+        url = reverse("boards:export_tasks_csv", args=[self.board.id])
+        with mock.patch("boards.exports.EXPORT_CHUNK_SIZE", 3):
+            response = self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                rows = self.read_csv(response)
+        self.assertEqual(rows[0][:2], ["id", "title"])
+        self.assertEqual([row[1] for row in rows[1:]], [f"Tarea {i}" for i in range(7)])
+        self.assertEqual(rows[1][9], "owner")
+        self.assertEqual(rows[1][11], "urgente")
+        # Un cursor de tareas leído por bloques más dos prefetch por cada bloque de 3.
+        self.assertEqual(len(queries), 7)
+
+    def test_activity_csv_is_streamed(self):
+        url = reverse("boards:export_activity_csv", args=[self.board.id])
+        rows = self.read_csv(self.client.get(url))
+        self.assertEqual(rows[0], ["id", "action", "details", "user", "created_at"])
+        self.assertEqual(len(rows), 8)
+
+    def test_tasks_json_keeps_envelope_while_streaming(self):
+        url = reverse("boards:export_tasks_json", args=[self.board.id])
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(data["board"], "Tablero")
+        self.assertEqual([t["title"] for t in data["tasks"]], [f"Tarea {i}" for i in range(7)])
+        self.assertEqual(data["tasks"][0]["assigned_to"], [{"id": self.owner.id, "username": "owner"}])
+
+    def test_tasks_ndjson_emits_one_task_per_line(self):
+        url = reverse("boards:export_tasks_json", args=[self.board.id])
+        response = self.client.get(url, {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(json.loads(lines[-1])["tags"][0]["name"], "urgente")
+
+
+@override_settings(EXPORT_JOBS_ENABLED=True)
+class ExportJobTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.viewer = User.objects.create_user(username="viewer", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        BoardMembership.objects.create(board=cls.board, user=cls.viewer, role="viewer")
+        cls.task_list = TaskList.objects.create(board=cls.board, title="Por hacer")
+        for i in range(3):
+            Task.objects.create(task_list=cls.task_list, title=f"Tarea {i}", position=i)
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client.force_login(self.owner)
+        self.url = reverse("boards:export_tasks_csv", args=[self.board.id])
+
+    def test_export_is_generated_once_and_served_from_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertIn("status_url", response.json())
+
+        call_command("process_export_jobs", stdout=StringIO())
+        status = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual(status["status"], "done")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    def test_board_change_creates_new_version_and_prunes_old_file(self):
+        self.client.get(self.url)
+        call_command("process_export_jobs", stdout=StringIO())
+        old_job = ExportJob.objects.get()
+
+        self.client.post(reverse("boards:add_list", args=[self.board.id]), {"title": "Hecho"})
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("process_export_jobs", stdout=StringIO())
+
+        new_job = ExportJob.objects.get()
+        self.assertGreater(new_job.change_version, old_job.change_version)
+        self.assertFalse(old_job.file.storage.exists(old_job.file.name))
+
+    def test_deleting_board_removes_export_files(self):
+        self.client.get(self.url)
+        call_command("process_export_jobs", stdout=StringIO())
+        name = ExportJob.objects.get().file.name
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            Board.objects.get(pk=self.board.pk).delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_activity_export_waits_for_buffered_activity(self):
+        url = reverse("boards:export_activity_csv", args=[self.board.id])
+        self.client.get(url)
+        call_command("process_export_jobs", stdout=StringIO())
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # La actividad llega después de servir el fichero, con el tablero en la misma versión.
+        Activity.objects.create(board=self.board, action=Activity.TASK_MOVED, details="tarde")
+        self.assertEqual(self.client.get(url).status_code, 202)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("process_export_jobs", stdout=StringIO())
+        response = self.client.get(url)
+        self.assertIn("tarde", b"".join(response.streaming_content).decode())
+        self.assertEqual(ExportJob.objects.filter(kind="activity_csv").count(), 1)
+
+    def test_gzip_artifact(self):
+        self.client.get(self.url, {"compress": "gzip"})
+        call_command("process_export_jobs", stdout=StringIO())
+        response = self.client.get(self.url, {"compress": "gzip"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertTrue(content.startswith("id,title"))
+
+    def test_viewer_cannot_read_job_status(self):
+        job_url = self.client.get(self.url).json()["status_url"]
+        self.client.force_login(self.viewer)
+        self.assertEqual(self.client.get(job_url).status_code, 403)
+
+
+@override_settings(EXPORT_JOBS_ENABLED=False)
+class TaskImportTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.editor = User.objects.create_user(username="editor", password="pass12345")
+        cls.source = Board.objects.create(title="Origen", owner=cls.owner)
+        cls.target = Board.objects.create(title="Destino", owner=cls.owner)
+        for board in (cls.source, cls.target):
+            BoardMembership.objects.create(board=board, user=cls.owner, role="owner")
+        BoardMembership.objects.create(board=cls.source, user=cls.editor, role="editor")
+        todo = TaskList.objects.create(board=cls.source, title="Por hacer", position=0)
+        done = TaskList.objects.create(board=cls.source, title="Hecho", position=1)
+        tag = Tag.objects.create(name="urgente")
+        for i in range(5):
+            task = Task.objects.create(
+                task_list=todo if i < 3 else done,
+                title=f"Tarea {i}",
+                position=i,
+                priority="high",
+                created_by=cls.owner,
+            )
+            task.assigned_to.add(cls.owner, cls.editor)
+            task.tags.add(tag)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(name, args=[self.source.id]), params)
+        return b"".join(response.streaming_content)
+
+    def assert_imported(self):
+        lists = list(self.target.lists.order_by("position"))
+        self.assertEqual([(l.title, l.status_key, l.task_count) for l in lists], [
+            ("Por hacer", "todo", 3),
+            ("Hecho", "done", 2),
+        ])
+        tasks = Task.objects.filter(task_list__board=self.target).order_by("task_list__position", "position")
+        self.assertEqual([t.title for t in tasks], [f"Tarea {i}" for i in range(5)])
+        first = tasks[0]
+        self.assertEqual(first.priority, "high")
+        self.assertEqual(list(first.tags.values_list("name", flat=True)), ["urgente"])
+        # "editor" no es miembro del destino: solo se conserva la asignación de owner.
+        self.assertEqual(list(first.assigned_to.values_list("username", flat=True)), ["owner"])
+        self.target.refresh_from_db()
+        self.assertEqual((self.target.task_count, self.target.done_count), (5, 2))
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_import_json_export_through_endpoint(self):
+        content = self.export("boards:export_tasks_json")
+        upload = SimpleUploadedFile("tareas.json", content)
+        response = self.client.post(
+            reverse("boards:import_tasks", args=[self.target.id]),
+            {"file": upload},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.json()["tasks"], 5)
+        self.assertEqual(response.json()["skipped_assignees"], 5)
+        self.assert_imported()
+
+    def test_import_csv_export_with_command(self):
+        content = self.export("boards:export_tasks_csv")
+        with tempfile.NamedTemporaryFile(suffix=".csv") as f:
+            f.write(content)
+            f.flush()
+            out = StringIO()
+            call_command("import_tasks", self.target.id, f.name, "--batch-size", "2", stdout=out)
+        self.assertIn("5/5 tareas", out.getvalue())
+        self.assert_imported()
+
+    def test_import_query_count_does_not_grow_with_tasks(self):
+        records = parse_task_export(self.export("boards:export_tasks_json", format="ndjson"))
+        # La primera importación crea listas y etiquetas y anota la acción en el tablero;
+        # mido a partir de la segunda.
+        import_tasks(self.target, records, user=self.owner)
+        with CaptureQueriesContext(connection) as small:
+            import_tasks(self.target, records[:2], user=self.owner)
+        with CaptureQueriesContext(connection) as large:
+            import_tasks(self.target, records * 8, user=self.owner)
+        self.assertEqual(len(small), len(large))
+
+    def test_malformed_uploads_are_form_errors(self):
+        uploads = [
+            b"title,list\n\xff\xfe,Por hacer\n",
+            b'{"tasks": ["x"]}',
+            b'{"tasks": [{"title": "A", "tags": ["a"]}]}',
+            b'{"title": "A", "assigned_to": ["owner"]}\n',
+            b'{"name": "Sin tareas"}',
+            b"title,list\n,Por hacer\n",
+        ]
+        for content in uploads:
+            with self.subTest(content=content):
+                response = self.client.post(
+                    reverse("boards:import_tasks", args=[self.target.id]),
+                    {"file": SimpleUploadedFile("tareas.json", content)},
+                    HTTP_ACCEPT="application/json",
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["status"], "error")
+        self.assertFalse(Task.objects.filter(task_list__board=self.target).exists())
+
+    def test_long_list_titles_are_reused_on_reimport(self):
+        content = json.dumps({"tasks": [{"title": "A", "list": {"title": "L" * 120}}]})
+        for _ in range(2):
+            import_tasks(self.target, parse_task_export(content))
+        self.assertEqual(
+            list(self.target.lists.filter(title__startswith="L").values_list("title", flat=True)),
+            ["L" * 100],
+        )
+
+    def test_command_reports_non_utf8_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv") as f:
+            f.write(b"title,list\n\xff,Por hacer\n")
+            f.flush()
+            with self.assertRaisesMessage(CommandError, "UTF-8"):
+                call_command("import_tasks", self.target.id, f.name, stdout=StringIO())
+
+    def test_viewer_cannot_import(self):
+        viewer = User.objects.create_user(username="viewer", password="pass12345")
+        BoardMembership.objects.create(board=self.target, user=viewer, role="viewer")
+        self.client.force_login(viewer)
+        upload = SimpleUploadedFile("tareas.csv", b"title,list\nA,Por hacer\n")
+        response = self.client.post(reverse("boards:import_tasks", args=[self.target.id]), {"file": upload})
+        self.assertEqual(response.status_code, 403)
+
+
+class BoardChangesApiTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.outsider = User.objects.create_user(username="outsider", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.done = TaskList.objects.create(board=cls.board, title="Hecho", position=1)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+        self.url = reverse("boards:board_changes", args=[self.board.id])
+
+    def changes(self, since=0, **headers):
+        return self.client.get(self.url, {"since": since}, **headers)
+
+    def add_task(self, title):
+        response = self.client.post(
+            reverse("boards:add_task", args=[self.todo.id]),
+            {"title": title, "priority": "low"},
+            HTTP_ACCEPT="application/json",
+        )
+        return response.json()["version"]
+
+    def test_full_state_then_only_changes_and_tombstones(self):
+        self.add_task("Primera")
+        full = self.changes().json()
+        self.assertTrue(full["full"])
+        self.assertEqual([l["title"] for l in full["lists"]], ["Por hacer", "Hecho"])
+        self.assertEqual([t["title"] for t in full["tasks"]], ["Primera"])
+
+        since = full["version"]
+        second_version = self.add_task("Segunda")
+        self.assertGreater(second_version, since)
+        first = Task.objects.get(title="Primera")
+        self.client.post(reverse("boards:delete_task", args=[first.id]))
+
+        delta = self.changes(since).json()
+        self.assertFalse(delta["full"])
+        self.assertEqual([t["title"] for t in delta["tasks"]], ["Segunda"])
+        self.assertEqual(delta["deleted"]["tasks"], [first.id])
+        self.assertEqual([(l["id"], l["task_count"]) for l in delta["lists"]], [(self.todo.id, 1)])
+
+    def test_move_marks_task_and_both_lists(self):
+        self.add_task("Mover")
+        since = self.changes().json()["version"]
+        task = Task.objects.get()
+        self.client.post(
+            reverse("boards:move_task"),
+            data=json.dumps({"task_id": task.id, "new_list_id": self.done.id, "version": task.version}),
+            content_type="application/json",
+        )
+        delta = self.changes(since).json()
+        self.assertEqual(delta["tasks"][0]["list_id"], self.done.id)
+        self.assertEqual({l["id"] for l in delta["lists"]}, {self.todo.id, self.done.id})
+        self.assertEqual(delta["board"]["done_count"], 1)
+
+    def test_etag_returns_304_until_something_changes(self):
+        first = self.changes()
+        etag = first["ETag"]
+        self.assertEqual(self.changes(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.add_task("Nueva")
+        self.assertEqual(self.changes(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_html_cards_rendered_on_request(self):
+        self.add_task("Con HTML")
+        task = self.client.get(self.url, {"html": "1"}).json()["tasks"][0]
+        self.assertIn('data-taskid="%d"' % task["id"], task["html"])
+
+    def test_non_member_is_denied(self):
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.changes().status_code, 403)
+
+
+class BoardRealtimeTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.outsider = User.objects.create_user(username="outsider", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        cls.task_list = TaskList.objects.create(board=cls.board, title="Por hacer")
+
+    def session_cookie(self, user):
+        # Un cliente por usuario: un segundo login en el mismo cliente borraría la sesión.
+        client = Client()
+        client.force_login(user)
+        return f"sessionid={client.cookies['sessionid'].value}".encode()
+
+    def socket(self, cookie):
+        return ApplicationCommunicator(
+            board_socket,
+            {
+                "type": "websocket",
+                "path": f"/ws/boards/{self.board.id}/",
+                "headers": [(b"cookie", cookie), (b"host", b"testserver")],
+            },
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.owner_cookie = self.session_cookie(self.owner)
+        self.outsider_cookie = self.session_cookie(self.outsider)
+
+    async def test_member_receives_published_events(self):
+        socket = self.socket(self.owner_cookie)
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output())["type"], "websocket.accept")
+
+        get_broker().publish(board_channel(self.board.id), {"type": "task.created", "version": 3})
+        message = await socket.receive_output()
+        self.assertEqual(json.loads(message["text"]), {"type": "task.created", "version": 3})
+
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait()
+
+    async def test_removed_member_stops_receiving_events(self):
+        socket = self.socket(self.owner_cookie)
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output())["type"], "websocket.accept")
+
+        await sync_to_async(BoardMembership.objects.filter(user=self.owner).delete)()
+        get_broker().publish(board_channel(self.board.id), {"type": "task.created", "version": 4})
+        message = await socket.receive_output()
+        self.assertEqual((message["type"], message["code"]), ("websocket.close", 4403))
+        await socket.wait()
+
+    async def test_member_removed_event_closes_only_that_user(self):
+        socket = self.socket(self.owner_cookie)
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output())["type"], "websocket.accept")
+
+        channel = board_channel(self.board.id)
+        get_broker().publish(channel, member_removed_event(self.outsider.id))
+        self.assertTrue(await socket.receive_nothing())
+        get_broker().publish(channel, member_removed_event(self.owner.id))
+        message = await socket.receive_output()
+        self.assertEqual((message["type"], message["code"]), ("websocket.close", 4403))
+        await socket.wait()
+
+    def test_membership_delete_publishes_member_removed(self):
+        with mock.patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                BoardMembership.objects.filter(user=self.owner).delete()
+        publish.assert_called_once_with(
+            board_channel(self.board.id), member_removed_event(self.owner.id)
+        )
+
+    async def test_non_member_is_rejected(self):
+        socket = self.socket(self.outsider_cookie)
+        await socket.send_input({"type": "websocket.connect"})
+        message = await socket.receive_output()
+        self.assertEqual((message["type"], message["code"]), ("websocket.close", 4403))
+
+    def test_mutations_publish_after_commit(self):
+        self.client.force_login(self.owner)
+        with mock.patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    reverse("boards:add_task", args=[self.task_list.id]),
+                    {"title": "En vivo", "priority": "low"},
+                )
+        channel, event = publish.call_args.args
+        self.assertEqual(channel, board_channel(self.board.id))
+        self.assertEqual(event["type"], "task.created")
+        self.assertEqual(event["activity"]["details"], "En vivo")
+
+
+# Compruebo el buffer de actividad y el código compacto de acción.
+class ActivityLogTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+
+    def queue(self, action, details=""):
+        return queue_activity(
+            Activity(board=self.board, user=self.owner, action=action, details=details)
+        )
+
+    def test_request_activities_are_saved_in_one_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with buffered_activities():
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.queue(Activity.LIST_CREATED, "A")
+                    self.queue(Activity.TASK_CREATED, "B")
+                self.assertEqual(Activity.objects.count(), 0)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT") and "boards_activity" in q["sql"]]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            sorted(Activity.objects.values_list("action", flat=True)),
+            [Activity.LIST_CREATED, Activity.TASK_CREATED],
+        )
+
+    def test_saved_timestamp_matches_the_realtime_event(self):
+        with buffered_activities():
+            with self.captureOnCommitCallbacks(execute=True):
+                activity = self.queue(Activity.TASK_CREATED, "A")
+                event = activity_event(activity, 1)
+        saved = Activity.objects.get()
+        self.assertEqual(saved.created_at, activity.created_at)
+        self.assertEqual(event["activity"]["created_at"], saved.created_at.isoformat())
+
+    def test_rolled_back_activity_is_discarded(self):
+        with buffered_activities():
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    self.queue(Activity.TASK_DELETED)
+                    raise RuntimeError
+        self.assertFalse(Activity.objects.exists())
+
+    def test_filter_accepts_code_and_legacy_label(self):
+        Activity.objects.create(board=self.board, action=Activity.TASK_MOVED, details="movida")
+        Activity.objects.create(board=self.board, action=Activity.LIST_CREATED, details="lista")
+        self.client.force_login(self.owner)
+        url = reverse("boards:board_detail", args=[self.board.id])
+        for value in (Activity.TASK_MOVED, "Tarea movida"):
+            response = self.client.get(url, {"activity": value})
+            self.assertEqual([a.details for a in response.context["activities"]], ["movida"])
+
+    def test_activity_csv_uses_label(self):
+        Activity.objects.create(board=self.board, action=Activity.TASK_MOVED, details="movida")
+        self.client.force_login(self.owner)
+        with override_settings(EXPORT_JOBS_ENABLED=False):
+            response = self.client.get(
+                reverse("boards:export_activity_csv", args=[self.board.id]),
+                {"activity": Activity.TASK_MOVED},
+            )
+        rows = list(csv.reader(StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][1:3], ["Tarea movida", "movida"])
+
+
+# Compruebo la paginación por cursor del panel de actividad y el conjunto de acciones.
+class ActivityFeedTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        Activity.objects.bulk_create(
+            Activity(board=cls.board, action=Activity.TASK_CREATED, details=f"A{i:02d}")
+            for i in range(25)
+        )
+        # Varias filas con la misma fecha: el id desempata el cursor.
+        Activity.objects.update(created_at=timezone.now())
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+        self.url = reverse("boards:board_detail", args=[self.board.id])
+
+    def page(self, **params):
+        context = self.client.get(self.url, params).context
+        return (
+            [a.details for a in context["activities"]],
+            context["activity_older_cursor"],
+            context["activity_newer_cursor"],
+        )
+
+    def test_walks_the_whole_feed_without_gaps(self):
+        seen = []
+        details, older, newer = self.page()
+        self.assertIsNone(newer)
+        seen += details
+        while older:
+            details, older, newer = self.page(activity_before=older)
+            self.assertIsNotNone(newer)
+            seen += details
+        self.assertEqual(seen, [f"A{i:02d}" for i in reversed(range(25))])
+
+    def test_newer_cursor_returns_to_previous_page(self):
+        first, older, _ = self.page()
+        second, older, newer = self.page(activity_before=older)
+        _, _, newer = self.page(activity_before=older)
+        back, _, newer = self.page(activity_after=newer)
+        self.assertEqual(back, second)
+        self.assertEqual(self.page(activity_after=newer)[0], first)
+
+    def test_feed_does_not_count_history(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        activity_queries = [q["sql"] for q in ctx.captured_queries if "boards_activity" in q["sql"]]
+        self.assertEqual(len(activity_queries), 1)
+        self.assertNotIn("COUNT(", activity_queries[0])
+
+    def test_action_dropdown_comes_from_board_set(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_activity(Activity(board=self.board, action=Activity.TASK_MOVED))
+        self.board.refresh_from_db()
+        self.assertEqual(self.board.activity_action_choices, [(Activity.TASK_MOVED, "Tarea movida")])
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["activity_actions"], [(Activity.TASK_MOVED, "Tarea movida")])
+
+
+# Compruebo que archivar saca la actividad antigua de la tabla sin perderla en la exportación.
+@override_settings(EXPORT_JOBS_ENABLED=False)
+class ActivityArchiveTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        cls.other = Board.objects.create(title="Otro", owner=cls.owner)
+        now = timezone.now()
+        rows = []
+        for days, board, action in [
+            (400, cls.board, Activity.TASK_CREATED),
+            (370, cls.board, Activity.TASK_MOVED),
+            (365, cls.board, Activity.TASK_CREATED),
+            (300, cls.other, Activity.TASK_CREATED),
+            (1, cls.board, Activity.TASK_MOVED),
+        ]:
+            rows.append(Activity(board=board, user=cls.owner, action=action, details=f"hace {days}"))
+        Activity.objects.bulk_create(rows)
+        for activity, days in zip(Activity.objects.order_by("id"), [400, 370, 365, 300, 1]):
+            Activity.objects.filter(pk=activity.pk).update(created_at=now - timezone.timedelta(days=days))
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client.force_login(self.owner)
+
+    def export(self, **params):
+        response = self.client.get(reverse("boards:export_activity_csv", args=[self.board.id]), params)
+        return list(csv.reader(StringIO(b"".join(response.streaming_content).decode())))[1:]
+
+    def test_command_moves_old_rows_into_monthly_parts(self):
+        before = self.export()
+        out = StringIO()
+        call_command("archive_activity", days=200, batch_size=2, stdout=out)
+        self.assertIn("Filas: 4", out.getvalue())
+        self.assertEqual(list(Activity.objects.values_list("details", flat=True)), ["hace 1"])
+        archives = ActivityArchive.objects.all()
+        self.assertEqual(sum(a.row_count for a in archives), 4)
+        self.assertEqual({a.board_id for a in archives}, {self.board.id, self.other.id})
+        # La exportación sigue igual, en el mismo orden, al leer también lo archivado.
+        self.assertEqual(self.export(), before)
+        self.assertEqual([row[2] for row in before], ["hace 1", "hace 365", "hace 370", "hace 400"])
+
+    def test_archiving_recomputes_board_actions(self):
+        for board in (self.board, self.other):
+            board.add_activity_actions([Activity.TASK_CREATED, Activity.TASK_MOVED])
+        call_command("archive_activity", days=200, stdout=StringIO())
+        self.board.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.board.activity_action_choices, [(Activity.TASK_MOVED, "Tarea movida")])
+        self.assertEqual(self.other.activity_actions, 0)
+
+    def test_export_filter_applies_to_archived_rows(self):
+        call_command("archive_activity", days=200, stdout=StringIO())
+        rows = self.export(activity=Activity.TASK_MOVED)
+        self.assertEqual([row[2] for row in rows], ["hace 1", "hace 370"])
+        self.assertEqual({row[1] for row in rows}, {"Tarea movida"})
+
+    def test_deleting_board_removes_its_archive_files(self):
+        call_command("archive_activity", days=200, stdout=StringIO())
+        names = dict(ActivityArchive.objects.values_list("file", "board_id"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Board.objects.get(pk=self.board.pk).delete()
+        for name, board_id in names.items():
+            self.assertEqual(default_storage.exists(name), board_id == self.other.id)
+
+    def test_failed_batch_keeps_rows_and_removes_files(self):
+        from . import archive
+
+        written = []
+
+        def flaky_write(*args):
+            if written:
+                raise RuntimeError("disco lleno")
+            archive_part = write_archive(*args)
+            written.append(archive_part.file.name)
+            return archive_part
+
+        write_archive = archive._write_archive
+        with mock.patch("boards.archive._write_archive", side_effect=flaky_write):
+            with self.assertRaises(RuntimeError):
+                archive_activity(retention_cutoff(200))
+        self.assertEqual(Activity.objects.count(), 5)
+        self.assertFalse(ActivityArchive.objects.exists())
+        self.assertFalse(default_storage.exists(written[0]))
+
+
+class TaskSearchTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.ana = User.objects.create_user(username="anabel", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        BoardMembership.objects.create(board=cls.board, user=cls.ana, role="editor")
+        cls.other = Board.objects.create(title="Ajeno", owner=cls.ana)
+        BoardMembership.objects.create(board=cls.other, user=cls.ana, role="owner")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.foreign = TaskList.objects.create(board=cls.other, title="Otra", position=0)
+        cls.urgent = Tag.objects.create(name="urgente")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+
+    def add_task(self, title, **data):
+        self.client.post(
+            reverse("boards:add_task", args=[self.todo.id]),
+            {"title": title, "priority": "medium", **data},
+        )
+        return Task.objects.get(title=title)
+
+    def search(self, q, **params):
+        response = self.client.get(reverse("boards:search_tasks"), {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [result["title"] for result in response.json()["results"]]
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.add_task("Revisar informe", description="factura pendiente")
+        self.add_task("Factura de marzo")
+        self.assertEqual(self.search("factura"), ["Factura de marzo", "Revisar informe"])
+
+    def test_prefix_and_all_terms_must_match(self):
+        self.add_task("Migrar servidores")
+        self.add_task("Migrar base de datos")
+        self.assertEqual(self.search("migr serv"), ["Migrar servidores"])
+
+    def test_matches_tags_and_assignees(self):
+        self.add_task("Preparar demo", tags=[self.urgent.id], assigned_to=[self.ana.id])
+        self.assertEqual(self.search("urgente"), ["Preparar demo"])
+        self.assertEqual(self.search("anabel"), ["Preparar demo"])
+
+    def test_only_searches_member_boards(self):
+        self.add_task("Plan propio")
+        hidden = Task.objects.create(task_list=self.foreign, title="Plan ajeno", position=1)
+        self.assertEqual(self.search("plan"), ["Plan propio"])
+        self.assertEqual(self.search("plan", board=self.other.id), [])
+        self.assertEqual(search_tasks("plan", [self.other.id])[0][0], hidden)
+
+    def test_edit_and_delete_keep_index_in_sync(self):
+        task = self.add_task("Borrador")
+        self.client.post(
+            reverse("boards:edit_task", args=[task.id]),
+            {"title": "Definitivo", "description": "", "priority": "low", "version": task.version},
+        )
+        self.assertEqual(self.search("borrador"), [])
+        self.assertEqual(self.search("definitivo"), ["Definitivo"])
+
+        self.client.post(reverse("boards:delete_task", args=[task.id]))
+        self.assertFalse(TaskSearchDocument.objects.exists())
+        self.assertEqual(self.search("definitivo"), [])
+
+    def test_saves_outside_views_keep_index_in_sync(self):
+        task = Task.objects.create(task_list=self.todo, title="Desde shell", position=1)
+        self.assertEqual(self.search("shell"), ["Desde shell"])
+        task.description = "revisar factura"
+        task.save()
+        self.assertEqual(self.search("factura"), ["Desde shell"])
+
+        self.urgent.tasks.add(task)
+        self.assertEqual(self.search("urgente"), ["Desde shell"])
+        task.assigned_to.add(self.ana)
+        self.assertEqual(self.search("anabel"), ["Desde shell"])
+        self.urgent.tasks.clear()
+        self.ana.assigned_tasks.remove(task)
+        self.assertEqual(self.search("urgente"), [])
+        self.assertEqual(self.search("anabel"), [])
+
+    def test_renamed_tag_and_import_are_indexed(self):
+        self.add_task("Llamar cliente", tags=[self.urgent.id])
+        self.urgent.name = "prioritario"
+        self.urgent.save()
+        self.assertEqual(self.search("prioritario"), ["Llamar cliente"])
+
+        import_tasks(
+            self.board,
+            [
+                {
+                    "list_title": "Por hacer",
+                    "title": "Importada",
+                    "description": "desde csv",
+                    "priority": "low",
+                    "due_date": "",
+                    "position": 1,
+                    "created_by": "owner",
+                    "assigned_to": ["anabel"],
+                    "tags": ["csv"],
+                }
+            ],
+            user=self.owner,
+        )
+        self.assertEqual(self.search("csv anabel"), ["Importada"])
+
+
+class TaskFilterTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.ana = User.objects.create_user(username="ana", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        BoardMembership.objects.create(board=cls.board, user=cls.ana, role="editor")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.done = TaskList.objects.create(board=cls.board, title="Hecho", position=1)
+        cls.bug = Tag.objects.create(name="bug")
+        cls.ui = Tag.objects.create(name="ui")
+        due = timezone.make_aware(timezone.datetime(2026, 3, 10, 12, 0))
+        cls.both = cls.task(
+            "Ambas", cls.todo, "high", tags=[cls.bug, cls.ui], assigned=[cls.ana, cls.owner]
+        )
+        cls.bug_only = cls.task("Solo bug", cls.todo, "low", tags=[cls.bug], due_date=due)
+        cls.plain = cls.task("Sin nada", cls.done, "high", created_by=cls.ana)
+        cls.board.recount_tasks()
+
+    @classmethod
+    def task(cls, title, task_list, priority, tags=(), assigned=(), **fields):
+        fields.setdefault("created_by", cls.owner)
+        position = Task.objects.count()
+        task = Task.objects.create(
+            task_list=task_list, title=title, priority=priority, position=position, **fields
+        )
+        task.tags.set(tags)
+        task.assigned_to.set(assigned)
+        return task
+
+    def filtered(self, query):
+        params = QueryDict(query)
+        tasks = TaskFilters.from_query(params).apply(Task.objects.order_by("id"))
+        return [task.title for task in tasks]
+
+    def test_tag_modes_do_not_duplicate_rows(self):
+        query = f"tag={self.bug.id}&tag={self.ui.id}"
+        self.assertEqual(self.filtered(query), ["Ambas", "Solo bug"])
+        self.assertEqual(self.filtered(query + "&tag_mode=all"), ["Ambas"])
+        self.assertEqual(self.filtered(f"assignee={self.ana.id}&assignee={self.owner.id}"), ["Ambas"])
+
+    def test_filters_combine_and_ignore_bad_values(self):
+        self.assertEqual(self.filtered(f"priority=high&list={self.todo.id}"), ["Ambas"])
+        self.assertEqual(self.filtered(f"created_by={self.ana.id}"), ["Sin nada"])
+        self.assertEqual(self.filtered("due_from=2026-03-10&due_to=2026-03-10"), ["Solo bug"])
+        self.assertEqual(self.filtered("due_to=2026-03-09"), [])
+        self.assertEqual(len(self.filtered("tag=x&priority=urgent&due_from=2026-13-40")), 3)
+
+    def test_facets_skip_their_own_dimension(self):
+        filters = TaskFilters(priorities=["high"], tags=[self.bug.id])
+        with self.assertNumQueries(3):
+            facets = task_facets(self.board, filters)
+        self.assertEqual(facets["priority"], {"low": 1, "medium": 0, "high": 1})
+        self.assertEqual(
+            [(tag["name"], tag["total"]) for tag in facets["tags"]], [("bug", 1), ("ui", 1)]
+        )
+        self.assertEqual(
+            [(row["username"], row["total"]) for row in facets["assignees"]],
+            [("ana", 1), ("owner", 1)],
+        )
+
+    def test_board_page_and_json_use_server_filters(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(
+            reverse("boards:board_detail", args=[self.board.id]), {"priority": "high"}
+        )
+        totals = {lst.title: lst.task_total for lst in response.context["board_lists"]}
+        self.assertEqual(totals, {"Por hacer": 1, "Hecho": 1})
+        self.assertContains(response, "?priority=high")
+
+        data = self.client.get(
+            reverse("boards:board_tasks", args=[self.board.id]), {"tag": self.bug.id}
+        ).json()
+        self.assertEqual(
+            [(row["id"], row["total"]) for row in data["lists"]],
+            [(self.todo.id, 2), (self.done.id, 0)],
+        )
+        self.assertEqual(data["facets"]["priority"]["high"], 1)
+
+        page = self.client.get(
+            reverse("boards:list_tasks_page", args=[self.todo.id]), {"assignee": self.ana.id}
+        ).json()
+        self.assertEqual(page["count"], 1)
+
+    def test_tag_facet_links_keep_the_other_filters(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(
+            reverse("boards:board_detail", args=[self.board.id]),
+            {"priority": "high", "tag": self.bug.id},
+        )
+        self.assertContains(response, 'data-filter-query="priority=high&amp;tag=%d"' % self.bug.id)
+        # La etiqueta activa se quita al pulsarla; la otra se suma a las activas.
+        links = {tag["name"]: tag["query"] for tag in response.context["facets"]["tags"]}
+        self.assertEqual(links["bug"], "priority=high")
+        self.assertEqual(links["ui"], f"priority=high&tag={self.bug.id}&tag={self.ui.id}")
+
+
+class BoardTagTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        cls.other = Board.objects.create(title="Otro", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.other, user=cls.owner, role="owner")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.bug = Tag.objects.create(board=cls.board, name="bug")
+        cls.ui = Tag.objects.create(board=cls.board, name="ui")
+        cls.shared = Tag.objects.create(name="compartida")
+        cls.foreign = Tag.objects.create(board=cls.other, name="ajena")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+
+    def usage(self):
+        return dict(self.board.tag_usage.values_list("tag__name", "task_count"))
+
+    def add_task(self, title, tags):
+        self.client.post(
+            reverse("boards:add_task", args=[self.todo.id]),
+            {"title": title, "priority": "low", "tags": [tag.id for tag in tags]},
+        )
+        return Task.objects.get(title=title)
+
+    def test_modal_offers_board_and_global_tags_only(self):
+        response = self.client.get(reverse("boards:board_detail", args=[self.board.id]))
+        self.assertEqual(
+            [tag.name for tag in response.context["tags"]], ["bug", "compartida", "ui"]
+        )
+
+    def test_usage_follows_tagging_and_deletes(self):
+        first = self.add_task("Primera", [self.bug, self.foreign])
+        self.assertEqual(list(first.tags.all()), [self.bug])
+        second = self.add_task("Segunda", [self.bug, self.shared])
+        self.assertEqual(self.usage(), {"bug": 2, "compartida": 1})
+
+        self.client.post(
+            reverse("boards:edit_task", args=[second.id]),
+            {
+                "title": "Segunda",
+                "description": "",
+                "priority": "low",
+                "version": second.version,
+                "tags": [self.ui.id, self.shared.id],
+            },
+        )
+        self.assertEqual(self.usage(), {"bug": 1, "compartida": 1, "ui": 1})
+
+        self.client.post(reverse("boards:delete_task", args=[first.id]))
+        self.assertEqual(self.usage(), {"bug": 0, "compartida": 1, "ui": 1})
+        self.client.post(reverse("boards:delete_list", args=[self.todo.id]))
+        self.assertEqual(self.usage(), {"bug": 0, "compartida": 0, "ui": 0})
+
+    def test_summary_facets_read_usage_table(self):
+        self.add_task("Primera", [self.bug])
+        facets = task_facets(self.board, TaskFilters())
+        self.assertEqual([(tag["name"], tag["total"]) for tag in facets["tags"]], [("bug", 1)])
+        self.board.tag_usage.update(task_count=7)
+        facets = task_facets(self.board, TaskFilters())
+        self.assertEqual(facets["tags"][0]["total"], 7)
+        self.board.recount_tag_usage()
+        self.assertEqual(self.usage(), {"bug": 1})
+
+    def test_import_reuses_board_tags_and_scopes_new_ones(self):
+        import_tasks(
+            self.board,
+            [
+                {
+                    "list_title": "Por hacer",
+                    "title": f"Importada {i}",
+                    "description": "",
+                    "priority": "low",
+                    "due_date": "",
+                    "position": i,
+                    "created_by": "owner",
+                    "assigned_to": [],
+                    "tags": ["bug", "compartida", "ajena"],
+                }
+                for i in range(2)
+            ],
+            user=self.owner,
+        )
+        new_tag = Tag.objects.get(name="ajena", board=self.board)
+        self.assertEqual(Tag.objects.filter(name="bug").count(), 1)
+        self.assertEqual(self.usage(), {"bug": 2, "compartida": 2, "ajena": 2})
+        self.assertFalse(BoardTagUsage.objects.filter(board=self.other).exists())
+        self.assertEqual(new_tag.board_usage.get().task_count, 2)
+
+
+class TaskCardCacheTests(BoardsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="owner", password="pass12345")
+        cls.viewer = User.objects.create_user(username="viewer", password="pass12345")
+        cls.board = Board.objects.create(title="Tablero", owner=cls.owner)
+        BoardMembership.objects.create(board=cls.board, user=cls.owner, role="owner")
+        BoardMembership.objects.create(board=cls.board, user=cls.viewer, role="viewer")
+        cls.todo = TaskList.objects.create(board=cls.board, title="Por hacer", position=0)
+        cls.tag = Tag.objects.create(board=cls.board, name="bug")
+        for i in range(3):
+            task = Task.objects.create(task_list=cls.todo, title=f"Tarea {i}", position=i)
+            task.tags.set([cls.tag])
+            task.assigned_to.set([cls.owner])
+        cls.board.recount_tasks()
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.owner)
+        self.url = reverse("boards:board_detail", args=[self.board.id])
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        return response, len(ctx.captured_queries)
+
+    def test_warm_page_skips_card_prefetches_and_keeps_csrf_per_session(self):
+        get_user_board_roles(self.owner.id)
+        _, cold = self.count_queries()
+        response, warm = self.count_queries()
+        # Las tarjetas cacheadas no necesitan precargar asignados ni etiquetas.
+        self.assertEqual(cold - warm, 2)
+        self.assertNotContains(response, "<!--csrf-->")
+
+        task = Task.objects.first()
+        self.client.post(
+            reverse("boards:delete_task", args=[task.id]),
+            {"csrfmiddlewaretoken": response.context["csrf_token"]},
+        )
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+
+    def test_edits_and_tag_renames_render_fresh_cards(self):
+        self.client.get(self.url)
+        task = Task.objects.order_by("position").first()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Tarea 0")
+
+        Task.objects.filter(pk=task.pk).update(title="Sin versión nueva")
+        self.assertContains(self.client.get(self.url), "Tarea 0")
+        record_change(self.board, tasks=[task.pk])
+        self.assertContains(self.client.get(self.url), "Sin versión nueva")
+
+        self.tag.name = "defecto"
+        self.tag.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "DEFECTO")
+        self.assertNotContains(response, "BUG")
+
+    def test_saves_and_deletes_outside_views_render_fresh_cards(self):
+        self.client.get(self.url)
+        task = Task.objects.order_by("position").first()
+        task.title = "Desde el admin"
+        task.save()
+        self.todo.title = "Pendiente"
+        self.todo.save(update_fields=["title"])
+        response = self.client.get(self.url)
+        self.assertContains(response, "Desde el admin")
+        self.assertContains(response, "PENDIENTE")
+
+        Tag.objects.filter(pk=self.tag.pk).delete()
+        self.assertNotContains(self.client.get(self.url), "BUG")
+        self.assertEqual(search_tasks("bug", [self.board.id]), [])
+
+    def test_cards_are_cached_per_role(self):
+        self.client.get(self.url)
+        self.client.force_login(self.viewer)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, "btn-delete-task")
@@ -18,8 +18,11 @@ urlpatterns = [
     path("board/<int:board_id>/add-list/", views.add_list, name="add_list"),
     path("list/<int:list_id>/add-task/", views.add_task, name="add_task"),
     path("list/<int:list_id>/delete/", views.delete_list, name="delete_list"),
+    path("list/<int:list_id>/tasks/", views.list_tasks_page, name="list_tasks_page"),
+    path("board/<int:board_id>/tasks/", views.board_tasks, name="board_tasks"),
     path("task/<int:task_id>/delete/", views.delete_task, name="delete_task"),
     path("task/move/", views.move_task, name="move_task"),
+    path("search/", views.search_tasks_view, name="search_tasks"),
     path("task/<int:task_id>/edit/", views.edit_task, name="edit_task"),
     path("<int:board_id>/members/add/", views.add_member, name="add_member"),
     path(
@@ -42,4 +45,8 @@ urlpatterns = [
     path("<int:board_id>/export/csv/", views.export_tasks_csv, name="export_tasks_csv"),
     path("<int:board_id>/export/json/", views.export_tasks_json, name="export_tasks_json"),
     path("<int:board_id>/export/activity/", views.export_activity_csv, name="export_activity_csv"),
+    path("<int:board_id>/changes/", views.board_changes, name="board_changes"),
+    path("<int:board_id>/import/", views.import_tasks_view, name="import_tasks"),
+    path("export/<int:job_id>/", views.export_job_status, name="export_job_status"),
+    path("export/<int:job_id>/download/", views.export_job_download, name="export_job_download"),
 ]
@@ -7,8 +7,9 @@ from django.views.generic import (
     UpdateView,
     DeleteView,
 )
-from django.core.paginator import Paginator
-from django.db.models import Count, Q, Prefetch
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.contrib import messages
@@ -28,25 +29,57 @@ from django.urls import reverse_lazy
 from .forms import BoardForm, SignUpForm, CustomAuthenticationForm, ProfileForm, UserUpdateForm, CustomPasswordResetForm
 from .tokens import activation_token_generator
 from django.shortcuts import get_object_or_404, redirect
-from .models import Board, TaskList, Task, Tag, UserProfile, BoardMembership, BoardInvite, Activity
+from .models import Board, BoardTagUsage, TaskList, Task, Tag, UserProfile, BoardMembership, BoardInvite, Activity, ExportJob
 from .forms import TaskListForm, TaskForm
+from .membership_cache import get_user_board_roles
+from .permissions import BoardAccessMixin, get_board_access, load_board, load_task, load_task_list
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 import json
+from dataclasses import asdict
 from django.http import JsonResponse
-from django.http import HttpResponse
-import csv
-from django.core.mail import send_mail, EmailMultiAlternatives
-import os
+from django.http import FileResponse, Http404, StreamingHttpResponse
 import logging
-from email.mime.image import MIMEImage
 from django.templatetags.static import static
 from django.core import signing
 from django.utils import timezone
-from .utils import get_list_status_key, get_list_status_label, build_board_url
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.safestring import mark_safe
+from .utils import get_list_status_label, build_board_url
+from .emails import EmailBatch, send_html_email
+from .importers import ImportFormatError, import_tasks, parse_task_export
+from .positions import VersionConflict, index_after, next_position, place_task
+from .activity import queue_activity
+from .search import search_tasks
+from .filters import TAG_MODES, TaskFilters, task_facets
+from .card_cache import render_list_headers, render_task_cards
+from .realtime import activity_event, publish_board_event
+from .sync import (
+    board_etag,
+    collect_board_changes,
+    current_task_state,
+    list_sync_dict,
+    record_change,
+)
+from .exports import (
+    TASK_CSV_HEADER,
+    export_content_type,
+    export_filename,
+    export_tasks_queryset,
+    iter_activity_csv,
+    iter_csv,
+    iter_tasks_json,
+    iter_tasks_ndjson,
+    request_export,
+    task_csv_row,
+)
 
 logger = logging.getLogger(__name__)
 
+# Número de tareas por página en cada columna del Kanban.
+TASKS_PAGE_SIZE = 10
+
 
 # ---------------------------------------------------------------------
 # Aquí agrupo vistas de entrada y páginas públicas
@@ -149,8 +182,16 @@ class SignUpView(CreateView):
             return redirect(resend_url)
 
 
+# Envío de una vez los avisos acumulados; un fallo de correo no rompe la acción.
+def _flush_email_batch(batch):
+    try:
+        batch.flush()
+    except Exception:
+        logger.exception("Fallo al enviar lote de emails")
+
+
 # Envío el email inicial de activación de cuenta.
-def send_activation_email(request, user):
+def send_activation_email(request, user, batch=None):
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     token = activation_token_generator.make_token(user)
     activation_url = request.build_absolute_uri(
@@ -169,11 +210,12 @@ def send_activation_email(request, user):
         text_body=text_body,
         html_body=html_body,
         to_emails=[user.email],
+        batch=batch,
     )
 
 
 # Notifico al usuario que su cuenta ya quedo activada.
-def send_activation_success_email(request, user):
+def send_activation_success_email(request, user, batch=None):
     login_url = request.build_absolute_uri(reverse("login"))
     context = {"user": user, "login_url": login_url}
     subject = f"Task Master | Hola {user.username}, tu cuenta está activa"
@@ -184,11 +226,12 @@ def send_activation_success_email(request, user):
         text_body=text_body,
         html_body=html_body,
         to_emails=[user.email],
+        batch=batch,
     )
 
 
 # Envío la invitación a tablero por email.
-def send_invite_email(request, invite):
+def send_invite_email(request, invite, batch=None):
     invite_token = signing.dumps({"invite_id": invite.id})
     invite_url = request.build_absolute_uri(
         reverse("boards:accept_invite", args=[invite_token])
@@ -205,11 +248,12 @@ def send_invite_email(request, invite):
         text_body=text_body,
         html_body=html_body,
         to_emails=[invite.email],
+        batch=batch,
     )
 
 
 # Notifico la asignacion de una tarea.
-def send_task_assigned_email(request, task, user):
+def send_task_assigned_email(request, task, user, batch=None):
     board = task.task_list.board
     board_url = build_board_url(board.id, request=request)
     context = {
@@ -226,11 +270,12 @@ def send_task_assigned_email(request, task, user):
         text_body=text_body,
         html_body=html_body,
         to_emails=[user.email],
+        batch=batch,
     )
 
 
 # Notifico tareas que estan por vencer.
-def send_task_due_soon_email(task, user, board_url):
+def send_task_due_soon_email(task, user, board_url, batch=None):
     board = task.task_list.board
     context = {
         "user": user,
@@ -248,11 +293,12 @@ def send_task_due_soon_email(task, user, board_url):
         text_body=text_body,
         html_body=html_body,
         to_emails=[user.email],
+        batch=batch,
     )
 
 
 # Notifico tareas ya vencidas.
-def send_task_overdue_email(task, user, board_url):
+def send_task_overdue_email(task, user, board_url, batch=None):
     board = task.task_list.board
     context = {
         "user": user,
@@ -268,11 +314,12 @@ def send_task_overdue_email(task, user, board_url):
         text_body=text_body,
         html_body=html_body,
         to_emails=[user.email],
+        batch=batch,
     )
 
 
 # Notifico cambios de estado cuando una tarea cambia de columna.
-def send_task_status_changed_email(task, user, board_url, from_status, to_status):
+def send_task_status_changed_email(task, user, board_url, from_status, to_status, batch=None):
     board = task.task_list.board
     context = {
         "user": user,
@@ -295,11 +342,12 @@ def send_task_status_changed_email(task, user, board_url, from_status, to_status
         text_body=text_body,
         html_body=html_body,
         to_emails=[user.email],
+        batch=batch,
     )
 
 
 # Valido el flujo de verificacion para cambio de email del perfil.
-def send_email_change_verification(request, user, new_email, token):
+def send_email_change_verification(request, user, new_email, token, batch=None):
     confirm_url = request.build_absolute_uri(
         reverse("boards:email_change_confirm", args=[token])
     )
@@ -316,32 +364,10 @@ def send_email_change_verification(request, user, new_email, token):
         text_body=text_body,
         html_body=html_body,
         to_emails=[new_email],
+        batch=batch,
     )
 
 
-# Centralizo aquí el envío de emails HTML con logo embebido.
-def send_html_email(subject, text_body, html_body, to_emails):
-    email = EmailMultiAlternatives(
-        subject,
-        text_body,
-        settings.DEFAULT_FROM_EMAIL,
-        to_emails,
-    )
-    email.attach_alternative(html_body, "text/html")
-
-    logo_path = os.path.join(settings.BASE_DIR, "static", "img", "taskmaster.png")
-    try:
-        with open(logo_path, "rb") as f:
-            img = MIMEImage(f.read())
-            img.add_header("Content-ID", "<taskmaster-logo>")
-            img.add_header("Content-Disposition", "inline", filename="taskmaster.png")
-            email.attach(img)
-    except FileNotFoundError:
-        pass
-
-    email.send(fail_silently=False)
-
-
 # ---------------------------------------------------------------------
 # Aquí concentro login y recuperación de contraseña
 # ---------------------------------------------------------------------
@@ -587,10 +613,43 @@ class BoardListView(LoginRequiredMixin, ListView):
     model = Board
     template_name = "boards/home.html"
     context_object_name = "boards"
+    paginate_by = 12
 
     def get_queryset(self):
-        # Filtro solo tableros donde el usuario participa como miembro.
-        return Board.objects.filter(memberships__user=self.request.user).distinct()
+        # Tomo el conjunto de tableros y roles del usuario desde la caché de membresías.
+        self.board_roles = get_user_board_roles(self.request.user.pk)
+        overdue_tasks = (
+            Task.objects.filter(
+                task_list__board=OuterRef("pk"), due_date__lt=timezone.now()
+            )
+            .exclude(task_list__status_key="done")
+            .order_by()
+            .values("task_list__board")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        members = (
+            BoardMembership.objects.filter(board=OuterRef("pk"))
+            .order_by()
+            .values("board")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        # Resuelvo vencidas y miembros de todas las tarjetas en una sola consulta.
+        return (
+            Board.objects.filter(pk__in=list(self.board_roles))
+            .annotate(
+                overdue_count=Coalesce(Subquery(overdue_tasks), 0),
+                member_count=Coalesce(Subquery(members), 0),
+            )
+            .order_by("-created_at", "-id")
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for board in context["boards"]:
+            board.user_role = self.board_roles.get(board.pk)
+        return context
 
 
 # Uso esta vista para crear un tablero.
@@ -607,11 +666,11 @@ class BoardCreateView(LoginRequiredMixin, CreateView):
         BoardMembership.objects.get_or_create(
             board=board, user=self.request.user, defaults={"role": "owner"}
         )
-        _log_activity(board, self.request.user, "Tablero creado", board.title)
+        _log_activity(board, self.request.user, Activity.BOARD_CREATED, board.title)
         return redirect(self.success_url)
 
 
-class BoardUpdateView(LoginRequiredMixin, UpdateView):
+class BoardUpdateView(LoginRequiredMixin, BoardAccessMixin, UpdateView):
     model = Board
     form_class = BoardForm
     template_name = "boards/board_form.html"
@@ -619,109 +678,339 @@ class BoardUpdateView(LoginRequiredMixin, UpdateView):
 
     def get_object(self, queryset=None):
         board = super().get_object(queryset)
-        _require_owner(board, self.request.user)
+        self.get_board_access(board).require_owner()
         return board
 
     def form_valid(self, form):
         response = super().form_valid(form)
-        _log_activity(self.object, self.request.user, "Tablero actualizado", self.object.title)
+        _log_activity(self.object, self.request.user, Activity.BOARD_UPDATED, self.object.title)
         return response
 
 
 # Uso esta vista para mostrar el tablero en detalle.
-class BoardDetailView(LoginRequiredMixin, DetailView):
+class BoardDetailView(LoginRequiredMixin, BoardAccessMixin, DetailView):
     model = Board
     template_name = "boards/board_detail.html"
     context_object_name = "board"
 
     def get_object(self, queryset=None):
         board = super().get_object(queryset)
-        if not BoardMembership.objects.filter(
-            board=board, user=self.request.user
-        ).exists():
-            raise PermissionDenied
+        self.get_board_access(board).require_member()
         return board
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        board = self.get_object()
+        board = self.object
 
         # 1) Aplico filtros y preparo listas con sus tareas.
-        active_tag_id = self.request.GET.get("tag")
-        tasks_queryset = Task.objects.all()
-
-        if active_tag_id:
-            tasks_queryset = tasks_queryset.filter(tags__id=active_tag_id)
-            context["active_tag"] = get_object_or_404(Tag, id=active_tag_id)
+        filters = TaskFilters.from_query(self.request.GET)
+        tasks_queryset = filters.apply(Task.objects.all())
 
-        # Aquí preparo la variable intermedia para evitar errores de contexto.
-        lists_with_filtered_tasks = board.lists.prefetch_related(
-            Prefetch("tasks", queryset=tasks_queryset.order_by("position"))
+        # Cargo listas y solo la primera página de tareas de cada columna
+        # (con creador, asignados y etiquetas) en un número fijo de consultas.
+        lists_with_filtered_tasks = _board_lists_queryset(
+            board, tasks_queryset, filtered=bool(filters)
         )
-
-        # 2) Calculo progreso global del tablero.
-        all_tasks = Task.objects.filter(task_list__board=board)
-        total_count = all_tasks.count()
-
-        done_tasks = all_tasks.filter(
-            Q(task_list__title__icontains="hecho")
-            | Q(task_list__title__icontains="terminado")
-            | Q(task_list__title__icontains="done")
-            | Q(task_list__title__icontains="completa")
-            | Q(task_list__title__icontains="finalizada")
-        ).count()
-
-        progress = int((done_tasks / total_count) * 100) if total_count > 0 else 0
+        for task_list in lists_with_filtered_tasks:
+            _paginate_list_tasks(task_list, task_list.first_tasks)
+        role = self.get_board_access(board).role
+        _attach_task_cards(self.request, lists_with_filtered_tasks, role)
+        headers = render_list_headers(lists_with_filtered_tasks)
+        for task_list in lists_with_filtered_tasks:
+            task_list.header_html = headers[task_list.pk]
+
+        # Cuento facetas en base de datos: el navegador ya no tiene todas las tarjetas.
+        facets = task_facets(board, filters)
+        # Cada etiqueta enlaza a los filtros actuales con ella añadida o quitada.
+        for tag in facets["tags"]:
+            tag["query"] = filters.toggled("tags", tag["id"]).querystring()
+
+        # 2) Leo el progreso global de los contadores materializados del tablero.
+        progress = board.progress
 
         # 3) Paso datos listos al contexto de plantilla.
         context["board_lists"] = lists_with_filtered_tasks
+        context["filters"] = filters
+        context["filter_query"] = filters.querystring()
+        context["facets"] = facets
+        context["tag_modes"] = TAG_MODES
+        context["tasks_page_size"] = TASKS_PAGE_SIZE
+        context["export_jobs_enabled"] = settings.EXPORT_JOBS_ENABLED
         context["progress"] = progress
-        context["done_tasks"] = done_tasks
-        context["total_tasks"] = (
-            total_count
-        )
-        membership = BoardMembership.objects.filter(
-            board=board, user=self.request.user
-        ).first()
-        context["user_role"] = membership.role if membership else None
-        context["memberships"] = board.memberships.select_related("user").all()
+        context["done_tasks"] = board.done_count
+        context["total_tasks"] = board.task_count
+        context["user_role"] = role
+        memberships = list(board.memberships.select_related("user__profile"))
+        context["memberships"] = memberships
         context["invites"] = board.invites.filter(accepted_at__isnull=True)
-        activity_filter = self.request.GET.get("activity")
+        activity_filter = Activity.parse_action(self.request.GET.get("activity"))
         activities_qs = board.activities.select_related("user")
-        if activity_filter:
+        if activity_filter is not None:
             activities_qs = activities_qs.filter(action=activity_filter)
-        activity_page = self.request.GET.get("activity_page", 1)
-        activity_paginator = Paginator(activities_qs, 10)
-        activity_page_obj = activity_paginator.get_page(activity_page)
-        context["activities"] = activity_page_obj
-        context["activity_page_obj"] = activity_page_obj
+        feed = _activity_feed(
+            activities_qs,
+            before=self.request.GET.get("activity_before"),
+            after=self.request.GET.get("activity_after"),
+        )
+        context["activities"] = feed["activities"]
+        context["activity_older_cursor"] = feed["older"]
+        context["activity_newer_cursor"] = feed["newer"]
         context["activity_filter"] = activity_filter
-        context["activity_actions"] = (
-            board.activities.values_list("action", flat=True).distinct()
+        # Las acciones del desplegable salen del conjunto guardado en el tablero: sin DISTINCT.
+        context["activity_actions"] = board.activity_action_choices
+
+        # Cargo etiquetas del tablero (y globales) para el modal de tareas; las del resumen
+        # salen de las facetas.
+        context["tags"] = Tag.for_board(board)
+        # Reutilizo las membresías ya cargadas para el selector de asignados.
+        context["users"] = [m.user for m in memberships]
+
+        return context
+
+
+# Defino el plan de carga del Kanban: listas, tareas, creador, asignados y etiquetas.
+def _board_lists_queryset(board, tasks_queryset, filtered=False):
+    # Traigo una tarea de más por columna para saber si hay página siguiente.
+    first_page = Prefetch(
+        "tasks",
+        queryset=_task_cards_queryset(tasks_queryset)[: TASKS_PAGE_SIZE + 1],
+        to_attr="first_tasks",
+    )
+    if filtered:
+        # Con filtros, cuento las tareas que pasan por columna en una subconsulta agrupada.
+        totals = (
+            tasks_queryset.filter(task_list=OuterRef("pk"))
+            .order_by()
+            .values("task_list")
+            .annotate(total=Count("id"))
+            .values("total")
         )
+        lists = board.lists.annotate(task_total=Coalesce(Subquery(totals), 0))
+    else:
+        # Sin filtros, el total de cada columna ya está materializado.
+        lists = board.lists.annotate(task_total=F("task_count"))
+    return lists.prefetch_related(first_page)
+
+
+# Asignados y etiquetas no se precargan aquí: render_task_cards los carga solo para las
+# tarjetas que no están en caché.
+def _task_cards_queryset(tasks_queryset):
+    return tasks_queryset.select_related("created_by").order_by("position", "id")
 
-        # Cargo etiquetas para resumen superior y modal de tareas.
-        context["board_tags"] = (
-            Tag.objects.filter(tasks__task_list__board=board)
-            .annotate(num_tasks=Count("tasks", filter=Q(tasks__task_list__board=board)))
-            .distinct()
+
+# Renderizo de una vez las tarjetas de todas las columnas (una lectura de caché y, para las
+# que falten, una sola precarga) y dejo el HTML de cada columna en `cards_html`.
+def _attach_task_cards(request, board_lists, role):
+    cards = render_task_cards(
+        request, [task for task_list in board_lists for task in task_list.page_tasks], role
+    )
+    for task_list in board_lists:
+        task_list.cards_html = mark_safe(
+            "".join(cards[task.pk] for task in task_list.page_tasks)
         )
-        context["tags"] = Tag.objects.all()
-        member_ids = board.memberships.values_list("user_id", flat=True)
-        context["users"] = User.objects.filter(id__in=member_ids)
 
-        return context
+
+# Corto la página y calculo el cursor (posición:id) de la siguiente.
+def _paginate_list_tasks(task_list, tasks):
+    tasks = list(tasks)
+    task_list.page_tasks = tasks[:TASKS_PAGE_SIZE]
+    task_list.next_cursor = None
+    if len(tasks) > TASKS_PAGE_SIZE:
+        last = task_list.page_tasks[-1]
+        task_list.next_cursor = f"{last.position}:{last.id}"
+    return task_list
+
+
+ACTIVITY_PAGE_SIZE = 10
+
+
+def _activity_cursor(activity):
+    return f"{activity.created_at.isoformat()}_{activity.id}"
+
+
+def _parse_activity_cursor(cursor):
+    try:
+        created_at, activity_id = cursor.rsplit("_", 1)
+        created_at = parse_datetime(created_at)
+        activity_id = int(activity_id)
+    except (AttributeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, activity_id
+
+
+# Pagino la actividad por cursor (created_at, id) sobre activity_board_feed_idx: cada página
+# cuesta lo mismo al fondo del historial y no hace falta COUNT. `before` pide actividad más
+# antigua que el cursor y `after`, más reciente.
+def _activity_feed(queryset, before=None, after=None, size=ACTIVITY_PAGE_SIZE):
+    newer_than = _parse_activity_cursor(after) if after else None
+    if newer_than:
+        created_at, activity_id = newer_than
+        rows = list(
+            queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=activity_id)
+            ).order_by("created_at", "id")[: size + 1]
+        )
+        if len(rows) > size:
+            activities = rows[:size][::-1]
+            return {
+                "activities": activities,
+                "older": _activity_cursor(activities[-1]),
+                "newer": _activity_cursor(activities[0]),
+            }
+        # No queda más de una página por delante: muestro la más reciente.
+        before = None
+
+    older_than = _parse_activity_cursor(before) if before else None
+    if older_than:
+        created_at, activity_id = older_than
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=activity_id)
+        )
+    rows = list(queryset.order_by("-created_at", "-id")[: size + 1])
+    activities = rows[:size]
+    return {
+        "activities": activities,
+        "older": _activity_cursor(activities[-1]) if len(rows) > size else None,
+        "newer": _activity_cursor(activities[0]) if older_than and activities else None,
+    }
+
+
+def _parse_task_cursor(cursor):
+    try:
+        position, task_id = (int(part) for part in cursor.split(":", 1))
+    except (AttributeError, ValueError):
+        return None
+    return position, task_id
+
+
+# Devuelvo una página de tareas de una columna como fragmento HTML para carga diferida.
+@login_required
+def list_tasks_page(request, list_id):
+    task_list, access = load_task_list(request, list_id)
+    access.require_member()
+
+    filters = TaskFilters.from_query(request.GET)
+    tasks_queryset = filters.apply(Task.objects.filter(task_list=task_list))
+
+    cursor = request.GET.get("after")
+    if cursor:
+        parsed = _parse_task_cursor(cursor)
+        if parsed is None:
+            return JsonResponse({"detail": "Cursor inválido"}, status=400)
+        position, task_id = parsed
+        tasks_queryset = tasks_queryset.filter(
+            Q(position__gt=position) | Q(position=position, id__gt=task_id)
+        )
+
+    tasks = _task_cards_queryset(tasks_queryset)[: TASKS_PAGE_SIZE + 1]
+    _paginate_list_tasks(task_list, tasks)
+    return JsonResponse(
+        {
+            "html": _render_task_cards(request, task_list.page_tasks, access.role),
+            "count": len(task_list.page_tasks),
+            "next_cursor": task_list.next_cursor,
+        }
+    )
+
+
+def _render_task_cards(request, tasks, role):
+    return "".join(render_task_cards(request, tasks, role).values())
+
+
+# Devuelvo el tablero filtrado en el servidor: primera página de cada columna (con su total
+# y cursor) y las facetas, para refiltrar sin depender de las tarjetas ya cargadas.
+@login_required
+def board_tasks(request, board_id):
+    board, access = load_board(request, board_id)
+    access.require_member()
+
+    filters = TaskFilters.from_query(request.GET)
+    board_lists = _board_lists_queryset(
+        board, filters.apply(Task.objects.all()), filtered=bool(filters)
+    )
+    for task_list in board_lists:
+        _paginate_list_tasks(task_list, task_list.first_tasks)
+    _attach_task_cards(request, board_lists, access.role)
+    lists = [
+        {
+            "id": task_list.id,
+            "total": task_list.task_total,
+            "html": task_list.cards_html,
+            "count": len(task_list.page_tasks),
+            "next_cursor": task_list.next_cursor,
+        }
+        for task_list in board_lists
+    ]
+    return JsonResponse(
+        {"lists": lists, "facets": task_facets(board, filters), "query": filters.querystring()}
+    )
+
+
+# Busco tareas por texto (título, descripción, etiquetas y asignados) en los tableros del
+# usuario; con ?board= limito la búsqueda a uno de ellos.
+@login_required
+def search_tasks_view(request):
+    board_ids = set(get_user_board_roles(request.user.id))
+    board_param = request.GET.get("board")
+    if board_param:
+        try:
+            board_ids &= {int(board_param)}
+        except ValueError:
+            return JsonResponse({"detail": "Tablero inválido"}, status=400)
+
+    results = search_tasks(request.GET.get("q", ""), board_ids)
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": task.id,
+                    "title": task.title,
+                    "priority": task.priority,
+                    "board": {"id": task.task_list.board_id, "title": task.task_list.board.title},
+                    "list": {"id": task.task_list_id, "title": task.task_list.title},
+                    "url": build_board_url(task.task_list.board_id),
+                    "rank": round(rank, 4),
+                }
+                for task, rank in results
+            ]
+        }
+    )
+
+
+# Devuelvo el estado del tablero cambiado desde ?since=<versión> (sin since, el completo).
+# Con ETag/If-None-Match el cliente recibe 304 si no hay nada nuevo.
+@login_required
+def board_changes(request, board_id):
+    board, access = load_board(request, board_id)
+    access.require_member()
+    try:
+        since = max(0, int(request.GET.get("since") or 0))
+    except ValueError:
+        return JsonResponse({"detail": "Versión inválida"}, status=400)
+    render_role = access.role if request.GET.get("html") == "1" else None
+
+    etag = board_etag(board, since, render_role)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = JsonResponse(
+        collect_board_changes(board, since, render_role=render_role, request=request)
+    )
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 # ---------------------------------------------------------------------
 # Aquí concentro operaciones de listas y tareas
 # ---------------------------------------------------------------------
 # Uso esta vista para anadir una lista.
+@login_required
 def add_list(request, board_id):
-    board = get_object_or_404(Board, id=board_id)
-    membership = BoardMembership.objects.filter(board=board, user=request.user).first()
-    if not membership or membership.role not in ["owner", "editor"]:
-        raise PermissionDenied
+    board, access = load_board(request, board_id)
+    access.require_editor()
     if request.method == "POST":
         form = TaskListForm(request.POST)
         if form.is_valid():
@@ -730,45 +1019,71 @@ def add_list(request, board_id):
             # Calculo posicion inicial al final de la columna.
             new_list.position = board.lists.count()
             new_list.save()
-            _log_activity(board, request.user, "Lista creada", new_list.title)
-    return redirect("boards:board_detail", pk=board_id)
+            _log_activity(
+                board, request.user, Activity.LIST_CREATED, new_list.title, lists=[new_list.pk]
+            )
+    return _board_response(request, board)
+
+
+# Me quedo con las etiquetas enviadas que se pueden usar en el tablero.
+def _board_tag_ids(board, tag_ids):
+    tag_ids = [tag_id for tag_id in tag_ids if str(tag_id).isdigit()]
+    return list(Tag.for_board(board).filter(id__in=tag_ids).values_list("id", flat=True))
 
 
 # Uso esta vista para anadir una tarea.
+@login_required
 def add_task(request, list_id):
-    task_list = get_object_or_404(TaskList, id=list_id)
-    membership = BoardMembership.objects.filter(
-        board=task_list.board, user=request.user
-    ).first()
-    if not membership or membership.role not in ["owner", "editor"]:
-        raise PermissionDenied
+    task_list, access = load_task_list(request, list_id)
+    access.require_editor()
     if request.method == "POST":
         form = TaskForm(request.POST)
         if form.is_valid():
             task = form.save(commit=False)
             task.task_list = task_list
-            task.position = task_list.tasks.count()
             task.created_by = request.user
-            task.save()
+            try:
+                with transaction.atomic():
+                    task.position, shifted = next_position(task_list)
+                    task.save()
+                    task_list.adjust_task_count(1)
+            except VersionConflict as conflict:
+                if _wants_json(request):
+                    return _conflict_response(conflict)
+                messages.error(
+                    request,
+                    f"La lista '{task_list.title}' cambió mientras añadías la tarea. Vuelve a intentarlo.",
+                )
+                return redirect("boards:board_detail", pk=task_list.board_id)
             assigned_ids = request.POST.getlist("assigned_to")
             if assigned_ids:
                 valid_ids = BoardMembership.objects.filter(
                     board=task_list.board, user_id__in=assigned_ids
                 ).values_list("user_id", flat=True)
                 task.assigned_to.set(list(valid_ids))
+                batch = EmailBatch()
                 for user in User.objects.filter(id__in=valid_ids).exclude(email=""):
                     try:
                         profile, _ = UserProfile.objects.get_or_create(user=user)
                         if profile.notify_task_assigned:
-                            send_task_assigned_email(request, task, user)
+                            send_task_assigned_email(request, task, user, batch=batch)
                     except Exception:
                         logger.exception("Fallo al enviar email de asignación")
+                _flush_email_batch(batch)
 
-            # Guardo etiquetas asociadas desde checkboxes del modal.
-            selected_tags = request.POST.getlist("tags")
+            # Guardo etiquetas asociadas desde checkboxes del modal (solo las del tablero).
+            selected_tags = _board_tag_ids(task_list.board, request.POST.getlist("tags"))
             task.tags.set(selected_tags)
-            _log_activity(task_list.board, request.user, "Tarea creada", task.title)
-    return redirect("boards:board_detail", pk=task_list.board.id)
+            task_list.board.adjust_tag_usage(dict.fromkeys(selected_tags, 1))
+            _log_activity(
+                task_list.board,
+                request.user,
+                Activity.TASK_CREATED,
+                task.title,
+                tasks=[task.pk, *shifted],
+                lists=[task_list.pk],
+            )
+    return _board_response(request, task_list.board)
 
 
 # Uso esta vista para eliminar una lista.
@@ -776,16 +1091,28 @@ def add_task(request, list_id):
 @require_POST
 def delete_list(request, list_id):
     # Busco la lista y valido permisos sobre su tablero.
-    task_list = get_object_or_404(TaskList, id=list_id)
-    membership = BoardMembership.objects.filter(
-        board=task_list.board, user=request.user
-    ).first()
-    if not membership or membership.role not in ["owner", "editor"]:
-        raise PermissionDenied
-    _log_activity(task_list.board, request.user, "Lista eliminada", task_list.title)
-    board_id = task_list.board.id
-    task_list.delete()
-    return redirect("boards:board_detail", pk=board_id)
+    task_list, access = load_task_list(request, list_id)
+    access.require_editor()
+    _log_activity(
+        task_list.board,
+        request.user,
+        Activity.LIST_DELETED,
+        task_list.title,
+        deleted_lists=[task_list.pk],
+        deleted_tasks=list(task_list.tasks.values_list("id", flat=True)),
+    )
+    with transaction.atomic():
+        # Releo el contador dentro de la transacción para descontar el valor vigente.
+        task_count = (
+            TaskList.objects.select_for_update()
+            .values_list("task_count", flat=True)
+            .get(pk=task_list.pk)
+        )
+        tag_counts = BoardTagUsage.count_tags(task_list.tasks.all())
+        task_list.delete()
+        task_list.board.adjust_task_counters(task_list.status_key, -task_count)
+        task_list.board.adjust_tag_usage({tag_id: -total for tag_id, total in tag_counts.items()})
+    return _board_response(request, task_list.board)
 
 
 # Uso esta vista para eliminar una tarea.
@@ -793,70 +1120,148 @@ def delete_list(request, list_id):
 @require_POST
 def delete_task(request, task_id):
     # Busco la tarea y valido permisos sobre el tablero actual.
-    task = get_object_or_404(Task, id=task_id)
-    membership = BoardMembership.objects.filter(
-        board=task.task_list.board, user=request.user
-    ).first()
-    if not membership or membership.role not in ["owner", "editor"]:
+    task, access = load_task(request, task_id)
+    access.require_editor()
+    _log_activity(
+        task.task_list.board,
+        request.user,
+        Activity.TASK_DELETED,
+        task.title,
+        deleted_tasks=[task.pk],
+        lists=[task.task_list_id],
+    )
+    with transaction.atomic():
+        tag_ids = list(task.tags.values_list("id", flat=True))
+        task.delete()
+        task.task_list.adjust_task_count(-1)
+        task.task_list.board.adjust_tag_usage(dict.fromkeys(tag_ids, -1))
+    return _board_response(request, task.task_list.board)
+
+
+# Máximo de movimientos aceptados en una sola petición.
+MOVE_BATCH_LIMIT = 100
+
+
+def _parse_moves(data):
+    # Acepto un lote {"moves": [...]} o el formato antiguo de un solo movimiento.
+    moves = data.get("moves")
+    if moves is None:
+        moves = [
+            {
+                "task_id": data.get("task_id"),
+                "list_id": data.get("new_list_id"),
+                "index": data.get("index"),
+                "version": data.get("version"),
+            }
+        ]
+    if not isinstance(moves, list) or not 0 < len(moves) <= MOVE_BATCH_LIMIT:
+        return None
+    parsed = []
+    for move in moves:
+        try:
+            index = move.get("index")
+            parsed.append(
+                {
+                    "task_id": int(move["task_id"]),
+                    "list_id": int(move.get("list_id") or move["new_list_id"]),
+                    "index": None if index is None else int(index),
+                    "after_id": move.get("after_id"),
+                    "anchored": "after_id" in move,
+                    # Sin la versión leída no hay contra qué comparar (como en edit_task).
+                    "version": int(move["version"]),
+                }
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+    return parsed
+
+
+# Aplico un movimiento: colocación, contadores, actividad y avisos de cambio de estado.
+def _apply_move(request, move, batch):
+    task, access = load_task(request, move["task_id"])
+    access.require_editor()
+    new_list = get_object_or_404(TaskList, id=move["list_id"])
+    if new_list.board_id != task.task_list.board_id:
         raise PermissionDenied
-    _log_activity(task.task_list.board, request.user, "Tarea eliminada", task.title)
-    board_id = task.task_list.board.id
-    task.delete()
-    return redirect("boards:board_detail", pk=board_id)
+    new_list.board = access.board
+
+    old_list = task.task_list
+    from_list = old_list.title
+    from_status_key = old_list.status_key
+    to_status_key = new_list.status_key
+    index = move["index"]
+    with transaction.atomic():
+        if move["anchored"]:
+            # Con filtros en pantalla el cliente no ve toda la columna: se ancla a una vecina.
+            index = index_after(new_list, task, move["after_id"])
+        shifted = place_task(task, new_list, index, version=move["version"])
+        TaskList.transfer_task_count(old_list, new_list)
+    _log_activity(
+        new_list.board,
+        request.user,
+        Activity.TASK_MOVED,
+        f"{task.title} ({from_list} → {new_list.title})",
+        tasks=[task.pk, *shifted],
+        lists=[old_list.pk, new_list.pk],
+    )
+    if from_status_key != to_status_key:
+        board_url = build_board_url(new_list.board.id, request=request)
+        from_status = get_list_status_label(from_list)
+        to_status = get_list_status_label(new_list.title)
+        recipients = {u.id: u for u in task.assigned_to.exclude(email="")}
+        if task.created_by and task.created_by.email:
+            recipients[task.created_by.id] = task.created_by
+        for user in recipients.values():
+            try:
+                profile, _ = UserProfile.objects.get_or_create(user=user)
+                if profile.notify_task_status:
+                    send_task_status_changed_email(
+                        task,
+                        user,
+                        board_url,
+                        from_status,
+                        to_status,
+                        batch=batch,
+                    )
+            except Exception:
+                logger.exception("Fallo al enviar email de cambio de estado")
+    return task, new_list.board
 
 
-# Uso esta vista para mover una tarea entre listas.
+# Uso esta vista para mover tareas entre listas o reordenarlas, en lote y por índice destino.
 @login_required
 def move_task(request):
     if request.method == "POST":
-        data = json.loads(request.body)
-        task_id = data.get("task_id")
-        new_list_id = data.get("new_list_id")
-
-        # Busco la tarea origen y la lista destino.
-        task = get_object_or_404(Task, id=task_id)
-        new_list = get_object_or_404(TaskList, id=new_list_id)
-        membership = BoardMembership.objects.filter(
-            board=task.task_list.board, user=request.user
-        ).first()
-        if not membership or membership.role not in ["owner", "editor"]:
-            raise PermissionDenied
-        if new_list.board_id != task.task_list.board_id:
-            raise PermissionDenied
-
-        from_list = task.task_list.title
-        from_status_key = get_list_status_key(from_list)
-        to_status_key = get_list_status_key(new_list.title)
-        task.task_list = new_list
-        task.save()
-        _log_activity(
-            new_list.board,
-            request.user,
-            "Tarea movida",
-            f"{task.title} ({from_list} → {new_list.title})",
-        )
-        if from_status_key != to_status_key:
-            board_url = build_board_url(new_list.board.id, request=request)
-            from_status = get_list_status_label(from_list)
-            to_status = get_list_status_label(new_list.title)
-            recipients = {u.id: u for u in task.assigned_to.exclude(email="")}
-            if task.created_by and task.created_by.email:
-                recipients[task.created_by.id] = task.created_by
-            for user in recipients.values():
-                try:
-                    profile, _ = UserProfile.objects.get_or_create(user=user)
-                    if profile.notify_task_status:
-                        send_task_status_changed_email(
-                            task,
-                            user,
-                            board_url,
-                            from_status,
-                            to_status,
-                        )
-                except Exception:
-                    logger.exception("Fallo al enviar email de cambio de estado")
+        try:
+            moves = _parse_moves(json.loads(request.body))
+        except (AttributeError, ValueError):
+            moves = None
+        if moves is None:
+            return JsonResponse({"status": "error"}, status=400)
+
+        batch = EmailBatch()
+        placed = []
+        # El lote se aplica entero o nada: un movimiento no permitido o en conflicto
+        # deshace los anteriores.
+        try:
+            with transaction.atomic():
+                for move in moves:
+                    task, board = _apply_move(request, move, batch)
+                    placed.append(
+                        {
+                            "id": task.pk,
+                            "list_id": task.task_list_id,
+                            "position": task.position,
+                            "version": task.version,
+                        }
+                    )
+        except VersionConflict as conflict:
+            return _conflict_response(conflict)
+        _flush_email_batch(batch)
 
-        return JsonResponse({"status": "ok"})
+        return JsonResponse(
+            {"status": "ok", "version": board.change_version, "tasks": placed}
+        )
     return JsonResponse({"status": "error"}, status=400)
 
 
@@ -864,78 +1269,141 @@ def move_task(request):
 @login_required
 @require_POST
 def edit_task(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
+    task, access = load_task(request, task_id)
+    access.require_editor()
+    # El formulario envía la versión que leyó. Sin ella no sé contra qué comparar: si usara
+    # la que acabo de leer, la actualización condicional nunca detectaría un conflicto.
+    expected = _parse_version(request.POST.get("version"))
+    if expected is None:
+        return JsonResponse({"status": "error"}, status=400)
     prev_due_date = task.due_date
     prev_assigned = set(task.assigned_to.values_list("id", flat=True))
-    membership = BoardMembership.objects.filter(
-        board=task.task_list.board, user=request.user
-    ).first()
-    if not membership or membership.role not in ["owner", "editor"]:
-        raise PermissionDenied
+    prev_tags = set(task.tags.values_list("id", flat=True))
 
     # Actualizo campos con los datos recibidos del formulario.
     task.title = request.POST.get("title")
     task.description = request.POST.get("description")
     task.priority = request.POST.get("priority")
-    assigned_ids = request.POST.getlist("assigned_to")
-    if assigned_ids:
-        valid_ids = BoardMembership.objects.filter(
-            board=task.task_list.board, user_id__in=assigned_ids
-        ).values_list("user_id", flat=True)
-        task.assigned_to.set(list(valid_ids))
-        new_assigned = set(valid_ids) - prev_assigned
-        if new_assigned:
-            for user in User.objects.filter(id__in=new_assigned).exclude(email=""):
-                try:
-                    profile, _ = UserProfile.objects.get_or_create(user=user)
-                    if profile.notify_task_assigned:
-                        send_task_assigned_email(request, task, user)
-                except Exception:
-                    logger.exception("Fallo al enviar email de asignación")
-    else:
-        task.assigned_to.clear()
-
     # Ajusto fecha límite; puede venir vacía.
     due_date = request.POST.get("due_date")
     task.due_date = due_date if due_date else None
+    fields = {
+        "title": task.title,
+        "description": task.description,
+        "priority": task.priority,
+        "due_date": task.due_date,
+    }
     if task.due_date != prev_due_date:
-        task.due_soon_notified_at = None
-        task.overdue_notified_at = None
+        fields["due_soon_notified_at"] = None
+        fields["overdue_notified_at"] = None
 
-    task.save()
+    assigned_ids = request.POST.getlist("assigned_to")
+    valid_ids = []
+    if assigned_ids:
+        valid_ids = list(
+            BoardMembership.objects.filter(
+                board=task.task_list.board, user_id__in=assigned_ids
+            ).values_list("user_id", flat=True)
+        )
 
-    # Actualizo etiquetas seleccionadas.
-    selected_tags = request.POST.getlist("tags")
-    task.tags.set(selected_tags)
-    _log_activity(task.task_list.board, request.user, "Tarea actualizada", task.title)
-    return redirect("boards:board_detail", pk=task.task_list.board.id)
+    # Escritura condicional: si otra persona guardó antes, no piso sus cambios. Reclamo la
+    # versión con un UPDATE (que bloquea la fila) y guardo los campos con save() para que
+    # salten las señales de la tarea (índice de búsqueda).
+    with transaction.atomic():
+        updated = Task.objects.filter(pk=task.pk, version=expected).update(
+            version=F("version") + 1
+        )
+        if not updated:
+            conflict = VersionConflict(Task, task.pk)
+            if _wants_json(request):
+                return _conflict_response(conflict)
+            messages.error(
+                request,
+                f"La tarea '{task.title}' cambió mientras la editabas. Revisa los cambios y vuelve a guardar.",
+            )
+            return redirect("boards:board_detail", pk=task.task_list.board_id)
+        for field, value in fields.items():
+            setattr(task, field, value)
+        task.version = expected + 1
+        task.save(update_fields=list(fields))
+        task.assigned_to.set(valid_ids)
+        # Actualizo etiquetas seleccionadas y el uso por tablero con la diferencia.
+        selected_tags = set(_board_tag_ids(task.task_list.board, request.POST.getlist("tags")))
+        task.tags.set(selected_tags)
+        task.task_list.board.adjust_tag_usage(
+            {
+                **dict.fromkeys(selected_tags - prev_tags, 1),
+                **dict.fromkeys(prev_tags - selected_tags, -1),
+            }
+        )
+
+    new_assigned = set(valid_ids) - prev_assigned
+    if new_assigned:
+        batch = EmailBatch()
+        for user in User.objects.filter(id__in=new_assigned).exclude(email=""):
+            try:
+                profile, _ = UserProfile.objects.get_or_create(user=user)
+                if profile.notify_task_assigned:
+                    send_task_assigned_email(request, task, user, batch=batch)
+            except Exception:
+                logger.exception("Fallo al enviar email de asignación")
+        _flush_email_batch(batch)
+
+    _log_activity(
+        task.task_list.board, request.user, Activity.TASK_UPDATED, task.title, tasks=[task.pk]
+    )
+    return _board_response(request, task.task_list.board)
 
 
 @login_required
 @require_POST
 def delete_board(request, pk):
-    board = get_object_or_404(Board, pk=pk)
-    _require_owner(board, request.user)
+    board, access = load_board(request, pk)
+    access.require_owner()
     board_title = board.title
     board.delete()
     messages.success(request, f"Tablero '{board_title}' eliminado.")
     return redirect("boards:board_list")
 
 
-# Centralizo helpers de permisos y auditoría.
-def _require_owner(board, user):
-    membership = BoardMembership.objects.filter(board=board, user=user).first()
-    if not membership or membership.role != "owner":
-        raise PermissionDenied
+# Los clientes que sincronizan por API piden JSON; los formularios esperan redirección.
+def _wants_json(request):
+    return "application/json" in request.headers.get("Accept", "")
 
 
-def _log_activity(board, user, action, details=""):
-    Activity.objects.create(board=board, user=user, action=action, details=details)
+def _board_response(request, board):
+    if _wants_json(request):
+        return JsonResponse({"status": "ok", "version": board.change_version})
+    return redirect("boards:board_detail", pk=board.id)
 
 
-def _require_member(board, user):
-    if not BoardMembership.objects.filter(board=board, user=user).exists():
-        raise PermissionDenied
+def _parse_version(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# Respondo a un conflicto de versión con el estado actual para que el cliente lo muestre.
+def _conflict_response(conflict):
+    payload = {"status": "conflict", "detail": str(conflict)}
+    if conflict.model is Task:
+        payload["task"] = current_task_state(conflict.pk)
+    else:
+        task_list = TaskList.objects.filter(pk=conflict.pk).first()
+        payload["list"] = list_sync_dict(task_list) if task_list else None
+    return JsonResponse(payload, status=409)
+
+
+# Centralizo el helper de auditoría; los permisos viven en permissions.py.
+# Todo cambio del tablero pasa por aquí: subo su versión (invalida exportaciones cacheadas),
+# marco las filas afectadas para la sincronización incremental y lo publico en tiempo real.
+# La fila de Activity se guarda al final de la petición junto al resto (ver activity.py).
+def _log_activity(board, user, action, details="", **changes):
+    activity = queue_activity(Activity(board=board, user=user, action=action, details=details))
+    version = record_change(board, **changes)
+    # Aviso a los clientes conectados por WebSocket; ellos piden el detalle a /changes.
+    publish_board_event(board.id, activity_event(activity, version))
 
 
 # ---------------------------------------------------------------------
@@ -944,8 +1412,8 @@ def _require_member(board, user):
 @login_required
 @require_POST
 def add_member(request, board_id):
-    board = get_object_or_404(Board, id=board_id)
-    _require_owner(board, request.user)
+    board, access = load_board(request, board_id)
+    access.require_owner()
     identifier = request.POST.get("identifier", "").strip()
     role = request.POST.get("role", "viewer")
     if role not in ["owner", "editor", "viewer"]:
@@ -963,35 +1431,35 @@ def add_member(request, board_id):
         board=board, user=user, defaults={"role": role}
     )
     messages.success(request, "Miembro actualizado.")
-    _log_activity(board, request.user, "Miembro añadido/actualizado", f"{user.username} ({role})")
+    _log_activity(board, request.user, Activity.MEMBER_SAVED, f"{user.username} ({role})")
     return redirect("boards:board_detail", pk=board_id)
 
 
 @login_required
 @require_POST
 def update_member_role(request, board_id, membership_id):
-    board = get_object_or_404(Board, id=board_id)
-    _require_owner(board, request.user)
+    board, access = load_board(request, board_id)
+    access.require_owner()
     membership = get_object_or_404(BoardMembership, id=membership_id, board=board)
     role = request.POST.get("role", membership.role)
     if role in ["owner", "editor", "viewer"]:
         membership.role = role
         membership.save()
     messages.success(request, "Rol actualizado.")
-    _log_activity(board, request.user, "Rol actualizado", f"{membership.user.username} → {membership.role}")
+    _log_activity(board, request.user, Activity.ROLE_UPDATED, f"{membership.user.username} → {membership.role}")
     return redirect("boards:board_detail", pk=board_id)
 
 
 @login_required
 @require_POST
 def remove_member(request, board_id, membership_id):
-    board = get_object_or_404(Board, id=board_id)
-    _require_owner(board, request.user)
+    board, access = load_board(request, board_id)
+    access.require_owner()
     membership = get_object_or_404(BoardMembership, id=membership_id, board=board)
     if membership.user_id == board.owner_id:
         messages.error(request, "No puedes eliminar al propietario del tablero.")
         return redirect("boards:board_detail", pk=board_id)
-    _log_activity(board, request.user, "Miembro eliminado", membership.user.username)
+    _log_activity(board, request.user, Activity.MEMBER_REMOVED, membership.user.username)
     membership.delete()
     messages.success(request, "Miembro eliminado.")
     return redirect("boards:board_detail", pk=board_id)
@@ -1000,132 +1468,142 @@ def remove_member(request, board_id, membership_id):
 # ---------------------------------------------------------------------
 # Aquí expongo exportaciones de datos
 # ---------------------------------------------------------------------
-@login_required
-def export_tasks_csv(request, board_id):
-    board = get_object_or_404(Board, id=board_id)
-    membership = BoardMembership.objects.filter(board=board, user=request.user).first()
-    if not membership or membership.role not in ["owner", "editor"]:
-        raise PermissionDenied
-
-    tasks = (
-        Task.objects.filter(task_list__board=board)
-        .select_related("task_list", "created_by")
-        .prefetch_related("assigned_to", "tags")
-        .order_by("task_list__position", "position")
+# Sirvo el fichero ya generado o, si aún no existe para esta versión del tablero,
+# respondo 202 con la URL de estado que consulta el frontend.
+def _export_response(request, board, kind, params=""):
+    job = request_export(
+        board,
+        kind,
+        params=params,
+        compressed=request.GET.get("compress") == "gzip",
+        user=request.user,
+    )
+    if job.status == "done" and not _wants_json(request):
+        return _export_file_response(job)
+    return JsonResponse(
+        _export_job_payload(job), status=200 if job.status == "done" else 202
     )
 
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f'attachment; filename="board_{board.id}_tasks.csv"'
 
-    writer = csv.writer(response)
-    writer.writerow([
-        "id",
-        "title",
-        "description",
-        "priority",
-        "due_date",
-        "list",
-        "list_id",
-        "created_by",
-        "created_by_id",
-        "assigned_to",
-        "assigned_to_ids",
-        "tags",
-        "tags_ids",
-        "created_at",
-        "position",
-    ])
-    for t in tasks:
-        assigned = ", ".join([u.username for u in t.assigned_to.all()])
-        assigned_ids = ", ".join([str(u.id) for u in t.assigned_to.all()])
-        tags = ", ".join([tag.name for tag in t.tags.all()])
-        tag_ids = ", ".join([str(tag.id) for tag in t.tags.all()])
-        writer.writerow([
-            t.id,
-            t.title,
-            t.description,
-            t.priority,
-            t.due_date.isoformat() if t.due_date else "",
-            t.task_list.title,
-            t.task_list.id,
-            t.created_by.username if t.created_by else "",
-            t.created_by.id if t.created_by else "",
-            assigned,
-            assigned_ids,
-            tags,
-            tag_ids,
-            t.created_at.isoformat() if t.created_at else "",
-            t.position,
-        ])
+def _export_job_payload(job):
+    payload = {
+        "id": job.id,
+        "status": job.status,
+        "status_url": reverse("boards:export_job_status", args=[job.id]),
+    }
+    if job.status == "done":
+        payload["download_url"] = reverse("boards:export_job_download", args=[job.id])
+    elif job.status == "failed":
+        payload["error"] = "No se pudo generar la exportación."
+    return payload
+
+
+def _export_file_response(job):
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=export_filename(job),
+        content_type=export_content_type(job),
+    )
 
+
+@login_required
+def export_tasks_csv(request, board_id):
+    board, access = load_board(request, board_id)
+    access.require_editor()
+
+    if settings.EXPORT_JOBS_ENABLED:
+        return _export_response(request, board, "tasks_csv")
+    # Sin worker transmito el CSV mientras lo genero: el primer byte sale sin esperar.
+    response = StreamingHttpResponse(
+        iter_csv(TASK_CSV_HEADER, export_tasks_queryset(board), task_csv_row),
+        content_type="text/csv",
+    )
+    response["Content-Disposition"] = f'attachment; filename="board_{board.id}_tasks.csv"'
     return response
 
 
 @login_required
 def export_tasks_json(request, board_id):
-    board = get_object_or_404(Board, id=board_id)
-    membership = BoardMembership.objects.filter(board=board, user=request.user).first()
-    if not membership or membership.role not in ["owner", "editor"]:
-        raise PermissionDenied
-
-    tasks = (
-        Task.objects.filter(task_list__board=board)
-        .select_related("task_list", "created_by")
-        .prefetch_related("assigned_to", "tags")
-        .order_by("task_list__position", "position")
+    board, access = load_board(request, board_id)
+    access.require_editor()
+
+    # Con ?format=ndjson emito una tarea por línea para ETL; si no, el JSON de siempre.
+    ndjson = request.GET.get("format") == "ndjson"
+    if settings.EXPORT_JOBS_ENABLED:
+        return _export_response(request, board, "tasks_ndjson" if ndjson else "tasks_json")
+    tasks = export_tasks_queryset(board)
+    if ndjson:
+        return StreamingHttpResponse(
+            iter_tasks_ndjson(tasks), content_type="application/x-ndjson"
+        )
+    return StreamingHttpResponse(
+        iter_tasks_json(board, tasks), content_type="application/json"
     )
 
-    data = []
-    for t in tasks:
-        data.append({
-            "id": t.id,
-            "title": t.title,
-            "description": t.description,
-            "priority": t.priority,
-            "due_date": t.due_date.isoformat() if t.due_date else None,
-            "list": {"id": t.task_list.id, "title": t.task_list.title},
-            "created_by": {
-                "id": t.created_by.id,
-                "username": t.created_by.username,
-            } if t.created_by else None,
-            "assigned_to": [
-                {"id": u.id, "username": u.username} for u in t.assigned_to.all()
-            ],
-            "tags": [{"id": tag.id, "name": tag.name} for tag in t.tags.all()],
-            "created_at": t.created_at.isoformat() if t.created_at else None,
-            "position": t.position,
-        })
-
-    return JsonResponse({"board": board.title, "tasks": data})
-
 
 @login_required
 def export_activity_csv(request, board_id):
-    board = get_object_or_404(Board, id=board_id)
-    membership = BoardMembership.objects.filter(board=board, user=request.user).first()
-    if not membership or membership.role not in ["owner", "editor"]:
-        raise PermissionDenied
+    board, access = load_board(request, board_id)
+    access.require_editor()
+
+    action = Activity.parse_action(request.GET.get("activity"))
+    # Guardo el código como parámetro del artefacto: "3" y su texto comparten caché.
+    activity_filter = "" if action is None else str(action)
+    if settings.EXPORT_JOBS_ENABLED:
+        return _export_response(request, board, "activity_csv", params=activity_filter)
+    response = StreamingHttpResponse(
+        iter_activity_csv(board, activity_filter),
+        content_type="text/csv",
+    )
+    response["Content-Disposition"] = f'attachment; filename="board_{board.id}_activity.csv"'
+    return response
 
-    activity_filter = request.GET.get("activity")
-    activities = board.activities.select_related("user")
-    if activity_filter:
-        activities = activities.filter(action=activity_filter)
 
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f'attachment; filename="board_{board.id}_activity.csv"'
+# Importo tareas desde un fichero con el formato de las exportaciones (CSV/JSON/NDJSON).
+@login_required
+@require_POST
+def import_tasks_view(request, board_id):
+    board, access = load_board(request, board_id)
+    access.require_editor()
+    wants_json = _wants_json(request)
 
-    writer = csv.writer(response)
-    writer.writerow(["id", "action", "details", "user", "created_at"])
-    for a in activities:
-        writer.writerow([
-            a.id,
-            a.action,
-            a.details,
-            a.user.username if a.user else "",
-            a.created_at.isoformat() if a.created_at else "",
-        ])
+    upload = request.FILES.get("file")
+    try:
+        if upload is None:
+            raise ImportFormatError("Selecciona un fichero para importar.")
+        records = parse_task_export(upload.read())
+        result = import_tasks(board, records, user=request.user)
+    except ImportFormatError as exc:
+        if wants_json:
+            return JsonResponse({"status": "error", "detail": str(exc)}, status=400)
+        messages.error(request, str(exc))
+        return redirect("boards:board_detail", pk=board_id)
 
-    return response
+    if wants_json:
+        return JsonResponse({"status": "ok", **asdict(result)})
+    messages.success(
+        request,
+        f"Importadas {result.tasks} tareas ({result.lists} listas nuevas).",
+    )
+    return redirect("boards:board_detail", pk=board_id)
+
+
+# Consulto el estado de una exportación en segundo plano (polling desde el tablero).
+@login_required
+def export_job_status(request, job_id):
+    job = get_object_or_404(ExportJob.objects.select_related("board"), pk=job_id)
+    get_board_access(request, job.board).require_editor()
+    return JsonResponse(_export_job_payload(job))
+
+
+@login_required
+def export_job_download(request, job_id):
+    job = get_object_or_404(ExportJob.objects.select_related("board"), pk=job_id)
+    get_board_access(request, job.board).require_editor()
+    if job.status != "done" or not job.file:
+        raise Http404("La exportación aún no está lista.")
+    return _export_file_response(job)
 
 
 # ---------------------------------------------------------------------
@@ -1134,8 +1612,8 @@ def export_activity_csv(request, board_id):
 @login_required
 @require_POST
 def invite_member(request, board_id):
-    board = get_object_or_404(Board, id=board_id)
-    _require_owner(board, request.user)
+    board, access = load_board(request, board_id)
+    access.require_owner()
     username = request.POST.get("username", "").strip()
     email = request.POST.get("email", "").strip().lower()
     role = request.POST.get("role", "viewer")
@@ -1160,7 +1638,7 @@ def invite_member(request, board_id):
     try:
         send_invite_email(request, invite)
         messages.success(request, "Invitación enviada.")
-        _log_activity(board, request.user, "Invitación enviada", f"{invite.username} · {invite.email}")
+        _log_activity(board, request.user, Activity.INVITE_SENT, f"{invite.username} · {invite.email}")
     except Exception:
         logger.exception("Fallo al enviar invitación")
         messages.error(request, "No se pudo enviar la invitación.")
@@ -1199,7 +1677,7 @@ def accept_invite(request, token):
     )
     invite.accepted_at = timezone.now()
     invite.save()
-    _log_activity(invite.board, request.user, "Invitación aceptada", request.user.username)
+    _log_activity(invite.board, request.user, Activity.INVITE_ACCEPTED, request.user.username)
     messages.success(request, "Invitación aceptada. Ya tienes acceso al tablero.")
     return redirect("boards:board_detail", pk=invite.board.id)
 
@@ -1207,10 +1685,10 @@ def accept_invite(request, token):
 @login_required
 @require_POST
 def revoke_invite(request, board_id, invite_id):
-    board = get_object_or_404(Board, id=board_id)
-    _require_owner(board, request.user)
+    board, access = load_board(request, board_id)
+    access.require_owner()
     invite = get_object_or_404(BoardInvite, id=invite_id, board=board)
     invite.delete()
     messages.success(request, "Invitación revocada.")
-    _log_activity(board, request.user, "Invitación revocada", invite.email)
+    _log_activity(board, request.user, Activity.INVITE_REVOKED, invite.email)
     return redirect("boards:board_detail", pk=board_id)
@@ -14,4 +14,14 @@ from django.core.asgi import get_asgi_application
 # Fijo el settings module para que el servidor ASGI use la configuración del proyecto.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importo después de inicializar Django: el WebSocket usa sesiones, caché y modelos.
+from boards.realtime import board_socket  # noqa: E402
+
+
+# Envío los WebSockets de tablero a su handler y el resto de tráfico a Django.
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await board_socket(scope, receive, send)
+    return await django_application(scope, receive, send)
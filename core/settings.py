@@ -56,6 +56,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "boards.activity.ActivityBufferMiddleware",  # Guarda la actividad de cada petición en bloque
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -83,6 +84,34 @@ WSGI_APPLICATION = "core.wsgi.application"
 # -----------------------------
 DATABASES = {"default": dj_database_url.config(default=os.environ.get("DATABASE_URL"))}
 
+# -----------------------------
+# CACHÉ
+# -----------------------------
+# Uso memoria local por defecto; en producción con varios workers conviene un
+# backend compartido (Redis, Memcached o base de datos) vía variables de entorno.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "taskmaster"),
+    }
+}
+
+# Caché de roles por usuario (board_id -> rol) para los checks de permisos. Las señales solo
+# la invalidan en el proceso que hace el cambio: con varios workers y caché local, un miembro
+# quitado conserva acceso en los demás hasta que caduca. Por eso con LocMem bajo el TTL por
+# defecto a unos segundos; con una caché compartida (Redis, Memcached) vale uno largo.
+BOARD_ROLES_CACHE_ALIAS = os.environ.get("BOARD_ROLES_CACHE_ALIAS", "default")
+_ROLES_CACHE_IS_LOCAL = "locmem" in CACHES.get(BOARD_ROLES_CACHE_ALIAS, {}).get("BACKEND", "").lower()
+BOARD_ROLES_CACHE_TIMEOUT = int(
+    os.environ.get("BOARD_ROLES_CACHE_TIMEOUT", 5 if _ROLES_CACHE_IS_LOCAL else 300)
+)
+
+# Caché del HTML de tarjetas y cabeceras de columna, con clave por versión (0 la desactiva).
+CARD_CACHE_ALIAS = os.environ.get("CARD_CACHE_ALIAS", "default")
+CARD_CACHE_TIMEOUT = int(os.environ.get("CARD_CACHE_TIMEOUT", 3600))
+
 # -----------------------------
 # VALIDADORES DE CONTRASEÑA
 # -----------------------------
@@ -146,3 +175,23 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_PASS")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 SERVER_EMAIL = EMAIL_HOST_USER
 CONTACT_EMAIL = EMAIL_HOST_USER
+
+# Las vistas solo encolan; `process_email_queue` envía por SMTP con reintentos.
+EMAIL_QUEUE_ENABLED = os.environ.get("EMAIL_QUEUE_ENABLED", "True") == "True"
+EMAIL_QUEUE_WORKERS = int(os.environ.get("EMAIL_QUEUE_WORKERS", 4))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get("EMAIL_QUEUE_MAX_ATTEMPTS", 5))
+EMAIL_QUEUE_RETRY_BASE_SECONDS = int(os.environ.get("EMAIL_QUEUE_RETRY_BASE_SECONDS", 60))
+EMAIL_QUEUE_RETENTION_DAYS = int(os.environ.get("EMAIL_QUEUE_RETENTION_DAYS", 7))
+
+# Con True las exportaciones se generan con `process_export_jobs` (que entonces tiene que estar
+# corriendo) y se guardan en MEDIA_ROOT/exports; por defecto se sirven en streaming.
+EXPORT_JOBS_ENABLED = os.environ.get("EXPORT_JOBS_ENABLED", "False") == "True"
+
+# Días de actividad en la tabla; `archive_activity` mueve el resto a MEDIA_ROOT/activity_archive.
+ACTIVITY_RETENTION_DAYS = int(os.environ.get("ACTIVITY_RETENTION_DAYS", 180))
+
+# Pub/sub de eventos de tablero para los WebSockets: en memoria para un solo proceso ASGI;
+# con varios nodos (o WSGI + ASGI separados) usa "boards.realtime.PostgresBroker".
+BOARD_EVENTS_BACKEND = os.environ.get(
+    "BOARD_EVENTS_BACKEND", "boards.realtime.InMemoryBroker"
+)
@@ -24,14 +24,16 @@ document.addEventListener('DOMContentLoaded', function() {
     bindSpinner(document.querySelector('.task-form'), 'Guardando...');
     document.querySelectorAll('.role-form').forEach(form => bindSpinner(form, '', true));
 
-    // Recalculo progreso según tareas en columnas marcadas como "done".
+    // Recalculo progreso con los contadores del tablero que envía el servidor.
+    const columnTotal = (column) => parseInt(column.getAttribute('data-total') || '0', 10);
+    const progressBar = document.getElementById('main-progress-bar');
     const updateProgressBar = () => {
-        const total = document.querySelectorAll('.task-card').length;
-        const done = document.querySelectorAll('.kanban-column[data-is-done="true"] .task-card').length;
+        if (!progressBar) return;
+        const total = parseInt(progressBar.getAttribute('data-total') || '0', 10);
+        const done = parseInt(progressBar.getAttribute('data-done') || '0', 10);
         const percent = total > 0 ? Math.round((done / total) * 100) : 0;
-        const bar = document.getElementById('main-progress-bar');
         const txt = document.getElementById('progress-text');
-        if (bar) bar.style.width = percent + '%';
+        progressBar.style.width = percent + '%';
         if (txt) txt.textContent = percent + '%';
     };
 
@@ -41,16 +43,24 @@ document.addEventListener('DOMContentLoaded', function() {
     let searchTerm = '';
     const mineFilter = document.querySelector('.mine-filter');
     const currentUserId = mineFilter ? (mineFilter.getAttribute('data-user-id') || '') : '';
-    const TASKS_PAGE_SIZE = 10;
+    const kanbanWrapper = document.querySelector('.kanban-wrapper');
+    // Query string de los filtros del servidor (etiqueta, asignado, prioridad, fechas...).
+    const boardFiltered = Boolean(kanbanWrapper && kanbanWrapper.getAttribute('data-filter-query'));
+    const TASKS_PAGE_SIZE = parseInt((kanbanWrapper && kanbanWrapper.getAttribute('data-page-size')) || '10', 10);
+    const filtersActive = () => Boolean(searchTerm || activePriority || activeMineOnly);
 
-    // Aplico paginación por columna para no renderizar listas largas de una vez.
+    // Pagino cada columna sobre las tarjetas ya cargadas; el servidor indica si quedan más.
     const updatePagination = (column) => {
         if (!column) return;
         const allCards = Array.from(column.querySelectorAll('.task-card'));
         const filteredCards = allCards.filter(card => !card.classList.contains('filter-hidden'));
-        const totalPages = Math.max(1, Math.ceil(filteredCards.length / TASKS_PAGE_SIZE));
+        const hasMore = column.hasAttribute('data-next-cursor');
+        const loadedPages = Math.max(1, Math.ceil(filteredCards.length / TASKS_PAGE_SIZE));
+        const totalPages = filtersActive()
+            ? loadedPages
+            : Math.max(loadedPages, Math.ceil(columnTotal(column) / TASKS_PAGE_SIZE));
         let page = parseInt(column.getAttribute('data-page') || '1', 10);
-        if (page > totalPages) page = totalPages;
+        if (page > loadedPages) page = loadedPages;
         if (page < 1) page = 1;
         column.setAttribute('data-page', page);
 
@@ -64,13 +74,33 @@ document.addEventListener('DOMContentLoaded', function() {
             const prevBtn = pagination.querySelector('.task-page-prev');
             const nextBtn = pagination.querySelector('.task-page-next');
             const info = pagination.querySelector('.task-page-info');
-            pagination.classList.toggle('d-none', filteredCards.length <= TASKS_PAGE_SIZE);
+            pagination.classList.toggle('d-none', totalPages <= 1 && !hasMore);
             if (info) info.textContent = `${page}/${totalPages}`;
             if (prevBtn) prevBtn.disabled = page <= 1;
-            if (nextBtn) nextBtn.disabled = page >= totalPages;
+            if (nextBtn) nextBtn.disabled = page >= loadedPages && !hasMore;
         }
     };
 
+    // Pido al servidor la siguiente página de la columna y la añado al final.
+    const loadNextPage = (column) => {
+        const cursor = column.getAttribute('data-next-cursor');
+        if (!cursor || column.getAttribute('data-loading') === 'true') return Promise.resolve(false);
+        const url = new URL(column.getAttribute('data-tasks-url'), window.location.origin);
+        url.searchParams.set('after', cursor);
+        column.setAttribute('data-loading', 'true');
+        return fetch(url, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.ok ? response.json() : Promise.reject(response))
+            .then(data => {
+                const container = column.querySelector('.tasks-container');
+                container.insertAdjacentHTML('beforeend', data.html);
+                if (data.next_cursor) column.setAttribute('data-next-cursor', data.next_cursor);
+                else column.removeAttribute('data-next-cursor');
+                return true;
+            })
+            .catch(() => false)
+            .finally(() => column.removeAttribute('data-loading'));
+    };
+
     // Combino filtros por estado de columna, prioridad y texto de búsqueda.
     const applyFilters = () => {
         const columns = document.querySelectorAll('.kanban-column');
@@ -99,31 +129,15 @@ document.addEventListener('DOMContentLoaded', function() {
         updateStatusSummary();
     };
 
-    // Actualizo resumen de prioridades (alta/media/baja) en la barra superior.
-    const updatePrioritySummary = () => {
-        const cards = document.querySelectorAll('.task-card');
-        let high = 0, medium = 0, low = 0;
-        cards.forEach(card => {
-            const prio = (card.getAttribute('data-prio') || '').toLowerCase();
-            if (prio.includes('high') || prio.includes('alta')) high += 1;
-            else if (prio.includes('medium') || prio.includes('media')) medium += 1;
-            else if (prio.includes('low') || prio.includes('baja')) low += 1;
-        });
-        const highEl = document.getElementById('prio-high-count');
-        const mediumEl = document.getElementById('prio-medium-count');
-        const lowEl = document.getElementById('prio-low-count');
-        if (highEl) highEl.textContent = high;
-        if (mediumEl) mediumEl.textContent = medium;
-        if (lowEl) lowEl.textContent = low;
-    };
-
     // Actualizo resumen de estados visibles (todo/doing/done) según filtros activos.
     const updateStatusSummary = () => {
         const columns = document.querySelectorAll('.kanban-column');
         let todo = 0, doing = 0, done = 0;
         columns.forEach(column => {
             const status = column.getAttribute('data-status') || 'other';
-            const visibleCards = column.querySelectorAll('.task-card:not(.filter-hidden)').length;
+            const visibleCards = filtersActive()
+                ? column.querySelectorAll('.task-card:not(.filter-hidden)').length
+                : columnTotal(column);
             if (status === 'todo') todo += visibleCards;
             else if (status === 'doing') doing += visibleCards;
             else if (status === 'done') done += visibleCards;
@@ -137,7 +151,6 @@ document.addEventListener('DOMContentLoaded', function() {
     };
 
     updateProgressBar();
-    updatePrioritySummary();
     updateStatusSummary();
     applyFilters();
 
@@ -169,8 +182,10 @@ document.addEventListener('DOMContentLoaded', function() {
                     const cb = form.querySelector(`[name="tags"][value="${id}"]`);
                     if (cb) cb.checked = true;
                 });
+                form.querySelector('[name="version"]').value = card.getAttribute('data-version') || '';
                 form.action = `/boards/task/${card.getAttribute('data-taskid')}/edit/`;
             } else {
+                form.querySelector('[name="version"]').value = '';
                 form.action = `/boards/list/${trigger.getAttribute('data-listid')}/add-task/`;
             }
         });
@@ -182,18 +197,63 @@ document.addEventListener('DOMContentLoaded', function() {
         new Sortable(container, {
             group: 'kanban', animation: 150, handle: '.task-grip, .task-title',
             onEnd: function (evt) {
+                const fromColumn = evt.from.closest('.kanban-column');
+                const toColumn = evt.to.closest('.kanban-column');
+                if (fromColumn !== toColumn) {
+                    fromColumn.setAttribute('data-total', String(Math.max(0, columnTotal(fromColumn) - 1)));
+                    toColumn.setAttribute('data-total', String(columnTotal(toColumn) + 1));
+                    const fromDone = fromColumn.getAttribute('data-is-done') === 'true';
+                    const toDone = toColumn.getAttribute('data-is-done') === 'true';
+                    if (progressBar && fromDone !== toDone) {
+                        const done = parseInt(progressBar.getAttribute('data-done') || '0', 10);
+                        progressBar.setAttribute('data-done', String(done + (toDone ? 1 : -1)));
+                    }
+                }
                 updateProgressBar();
-                updatePrioritySummary();
                 applyFilters();
+                if (fromColumn === toColumn && evt.oldIndex === evt.newIndex) return;
                 const taskId = evt.item.getAttribute('data-taskid');
-                const column = evt.to.closest('.kanban-column');
-                const newListId = column.querySelector('.open-task-modal').getAttribute('data-listid');
+                const newListId = toColumn.querySelector('.open-task-modal').getAttribute('data-listid');
+                const move = {
+                    task_id: taskId,
+                    list_id: newListId,
+                    index: evt.newIndex,
+                    version: evt.item.getAttribute('data-version')
+                };
+                // Anclo a la tarjeta anterior si la hay. Con cualquier filtro activo la columna está
+                // incompleta y el índice no vale: ahí anclo siempre (null: al principio).
+                const previous = evt.item.previousElementSibling;
+                if (previous || boardFiltered) {
+                    move.after_id = previous ? previous.getAttribute('data-taskid') : null;
+                }
                 // Persisto el movimiento en backend; la UI ya refleja el cambio local.
                 fetch('/boards/task/move/', {
                     method: 'POST',
-                    headers: {'Content-Type': 'application/json', 'X-CSRFToken': getCookie('csrftoken')},
-                    body: JSON.stringify({ task_id: taskId, new_list_id: newListId })
-                });
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'Accept': 'application/json',
+                        'X-CSRFToken': getCookie('csrftoken')
+                    },
+                    body: JSON.stringify({ moves: [move] })
+                })
+                    .then(response => {
+                        // 409: alguien cambió la tarea antes; recargo para mostrar el estado real.
+                        if (response.status === 409) {
+                            window.location.reload();
+                            return null;
+                        }
+                        return response.ok ? response.json() : Promise.reject(response);
+                    })
+                    .then(data => {
+                        if (!data) return;
+                        data.tasks.forEach(task => {
+                            const card = document.querySelector(`.task-card[data-taskid="${task.id}"]`);
+                            if (!card) return;
+                            card.setAttribute('data-position', task.position);
+                            card.setAttribute('data-version', task.version);
+                        });
+                    })
+                    .catch(() => {});
             }
         });
     });
@@ -213,18 +273,93 @@ document.addEventListener('DOMContentLoaded', function() {
         if (nextBtn) {
             nextBtn.addEventListener('click', () => {
                 const current = parseInt(column.getAttribute('data-page') || '1', 10);
-                column.setAttribute('data-page', String(current + 1));
-                updatePagination(column);
+                const visible = column.querySelectorAll('.task-card:not(.filter-hidden)').length;
+                const goNext = () => {
+                    column.setAttribute('data-page', String(current + 1));
+                    updatePagination(column);
+                };
+                if (current * TASKS_PAGE_SIZE < visible) {
+                    goNext();
+                    return;
+                }
+                // La página siguiente aún no está cargada: la pido y reaplico filtros.
+                loadNextPage(column).then(loaded => {
+                    if (!loaded) return;
+                    applyFilters();
+                    goNext();
+                });
             });
         }
     });
 
-    // Activo búsqueda instantánea por título y descripción.
+    // Activo búsqueda instantánea por título y descripción en las tarjetas cargadas, y en
+    // paralelo pido al servidor coincidencias en todos mis tableros (también en páginas sin cargar).
     const searchInput = document.getElementById('taskSearch');
+    const searchResults = document.getElementById('taskSearchResults');
+    let searchTimer = null;
+    let searchController = null;
+
+    const hideSearchResults = () => {
+        searchResults.classList.add('d-none');
+        searchResults.replaceChildren();
+    };
+
+    const renderSearchResults = (results) => {
+        searchResults.replaceChildren();
+        if (!results.length) {
+            const empty = document.createElement('div');
+            empty.className = 'list-group-item extra-small text-muted';
+            empty.textContent = 'Sin resultados';
+            searchResults.appendChild(empty);
+        }
+        results.forEach(result => {
+            const item = document.createElement('a');
+            item.className = 'list-group-item list-group-item-action extra-small';
+            item.href = result.url;
+            const title = document.createElement('div');
+            title.className = 'fw-semibold';
+            title.textContent = result.title;
+            const where = document.createElement('div');
+            where.className = 'text-muted';
+            where.textContent = `${result.board.title} · ${result.list.title}`;
+            item.append(title, where);
+            searchResults.appendChild(item);
+        });
+        searchResults.classList.remove('d-none');
+    };
+
+    const searchServer = (query) => {
+        if (searchController) searchController.abort();
+        if (query.length < 2) {
+            hideSearchResults();
+            return;
+        }
+        searchController = new AbortController();
+        const url = `${searchInput.dataset.searchUrl}?q=${encodeURIComponent(query)}`;
+        fetch(url, { headers: { 'Accept': 'application/json' }, signal: searchController.signal })
+            .then(res => res.ok ? res.json() : { results: [] })
+            .then(data => renderSearchResults(data.results))
+            .catch(err => {
+                if (err.name !== 'AbortError') hideSearchResults();
+            });
+    };
+
     if (searchInput) {
         searchInput.addEventListener('input', (e) => {
             searchTerm = e.target.value.toLowerCase();
             applyFilters();
+            if (searchResults && searchInput.dataset.searchUrl) {
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(() => searchServer(e.target.value.trim()), 250);
+            }
+        });
+        searchInput.addEventListener('keydown', (e) => {
+            if (e.key === 'Escape' && searchResults) hideSearchResults();
+        });
+        document.addEventListener('click', (e) => {
+            if (searchResults && !searchResults.contains(e.target) && e.target !== searchInput) {
+                hideSearchResults();
+            }
         });
     }
 
@@ -328,6 +463,188 @@ document.addEventListener('DOMContentLoaded', function() {
         resizer.addEventListener('mousedown', onDown);
         resizer.addEventListener('touchstart', onDown, { passive: true });
     }
+
+    // Sincronizo el tablero en segundo plano: pido solo lo cambiado desde la última versión
+    // y el servidor responde 304 (ETag) mientras no haya novedades.
+    const SYNC_INTERVAL_MS = 15000;
+    let boardVersion = parseInt((kanbanWrapper && kanbanWrapper.getAttribute('data-version')) || '0', 10);
+    let boardEtag = null;
+    const findColumn = (listId) => document.querySelector(`.kanban-column[data-list-id="${listId}"]`);
+
+    const placeCard = (task) => {
+        const existing = document.querySelector(`.task-card[data-taskid="${task.id}"]`);
+        const column = findColumn(task.list_id);
+        if (existing) existing.remove();
+        if (!column) return;
+        const container = column.querySelector('.tasks-container');
+        const cards = Array.from(container.querySelectorAll('.task-card'));
+        const position = parseInt(task.position, 10);
+        const next = cards.find(card => parseInt(card.getAttribute('data-position') || '0', 10) > position);
+        // Si cae detrás de lo ya cargado y quedan páginas, llegará al paginar.
+        if (!next && column.hasAttribute('data-next-cursor')) return;
+        if (next) next.insertAdjacentHTML('beforebegin', task.html);
+        else container.insertAdjacentHTML('beforeend', task.html);
+    };
+
+    const applyChanges = (payload) => {
+        const unknownList = payload.lists.some(list => !findColumn(list.id));
+        if (payload.full || unknownList || payload.deleted.lists.length) {
+            // Cambios de estructura (columnas nuevas o borradas): recargo la página.
+            window.location.reload();
+            return;
+        }
+        payload.deleted.tasks.forEach(id => {
+            const card = document.querySelector(`.task-card[data-taskid="${id}"]`);
+            if (card) card.remove();
+        });
+        payload.tasks.forEach(placeCard);
+        payload.lists.forEach(list => {
+            findColumn(list.id).setAttribute('data-total', String(list.task_count));
+        });
+        if (progressBar) {
+            progressBar.setAttribute('data-total', String(payload.board.task_count));
+            progressBar.setAttribute('data-done', String(payload.board.done_count));
+        }
+        boardVersion = payload.version;
+        updateProgressBar();
+        applyFilters();
+    };
+
+    const syncBoard = () => {
+        const url = new URL(kanbanWrapper.getAttribute('data-changes-url'), window.location.origin);
+        url.searchParams.set('since', boardVersion);
+        url.searchParams.set('html', '1');
+        const headers = { 'Accept': 'application/json' };
+        if (boardEtag) headers['If-None-Match'] = boardEtag;
+        return fetch(url, { headers })
+            .then(response => {
+                if (response.status === 304 || !response.ok) return null;
+                boardEtag = response.headers.get('ETag');
+                return response.json();
+            })
+            .then(payload => {
+                if (payload && payload.version > boardVersion) applyChanges(payload);
+            })
+            .catch(() => {});
+    };
+
+    // Añado al panel de actividad lo que llega en tiempo real (solo en la primera página sin filtro).
+    const activityList = document.querySelector('#activityCollapse > .d-flex.flex-column');
+    const pageParams = new URLSearchParams(window.location.search);
+    const showLiveActivity = activityList && !pageParams.has('activity')
+        && !pageParams.has('activity_before') && !pageParams.has('activity_after');
+    const prependActivity = (activity) => {
+        if (!showLiveActivity || !activity) return;
+        const item = document.createElement('div');
+        item.className = 'd-flex justify-content-between align-items-start border rounded-3 p-2 bg-white';
+        const body = document.createElement('div');
+        const action = document.createElement('div');
+        action.className = 'fw-bold';
+        action.textContent = activity.action;
+        body.appendChild(action);
+        if (activity.details) {
+            const details = document.createElement('div');
+            details.className = 'text-muted small';
+            details.textContent = activity.details;
+            body.appendChild(details);
+        }
+        const author = document.createElement('div');
+        author.className = 'text-muted extra-small';
+        author.textContent = activity.user || 'Sistema';
+        body.appendChild(author);
+        const when = document.createElement('div');
+        when.className = 'text-muted extra-small';
+        when.textContent = new Date(activity.created_at).toLocaleString([], {
+            day: '2-digit', month: 'short', hour: '2-digit', minute: '2-digit'
+        });
+        item.append(body, when);
+        activityList.querySelector(':scope > span.text-muted')?.remove();
+        activityList.prepend(item);
+    };
+
+    // Con cualquier filtro las columnas muestran un subconjunto: ahí no aplico cambios en vivo.
+    const liveEnabled = kanbanWrapper && kanbanWrapper.hasAttribute('data-changes-url') && !boardFiltered;
+
+    // El servidor avisa por WebSocket de cada cambio y pido el detalle a /changes. Si el socket
+    // no está disponible (servidor WSGI o conexión caída) vuelvo a consultar periódicamente.
+    let pollTimer = null;
+    const startPolling = () => {
+        if (pollTimer) return;
+        pollTimer = setInterval(() => {
+            if (!document.hidden) syncBoard();
+        }, SYNC_INTERVAL_MS);
+    };
+    const stopPolling = () => {
+        clearInterval(pollTimer);
+        pollTimer = null;
+    };
+
+    let reconnectDelay = 1000;
+    const connectSocket = () => {
+        const socketPath = kanbanWrapper.getAttribute('data-socket-path');
+        if (!socketPath || !('WebSocket' in window)) {
+            startPolling();
+            return;
+        }
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const socket = new WebSocket(`${scheme}://${window.location.host}${socketPath}`);
+        socket.addEventListener('open', () => {
+            reconnectDelay = 1000;
+            stopPolling();
+            // Recupero lo que haya pasado mientras estaba desconectado.
+            syncBoard();
+        });
+        socket.addEventListener('message', (event) => {
+            let payload;
+            try {
+                payload = JSON.parse(event.data);
+            } catch (e) {
+                return;
+            }
+            prependActivity(payload.activity);
+            if (payload.version > boardVersion) syncBoard();
+        });
+        socket.addEventListener('close', () => {
+            startPolling();
+            setTimeout(connectSocket, reconnectDelay);
+            reconnectDelay = Math.min(reconnectDelay * 2, 60000);
+        });
+    };
+
+    if (liveEnabled) connectSocket();
+
+    // Las exportaciones se generan en segundo plano: pido el trabajo y consulto su estado
+    // hasta que el fichero está listo; entonces lo descargo.
+    const pollExport = (link, payload) => {
+        if (payload.status === 'done' && payload.download_url) {
+            link.classList.remove('disabled');
+            window.location.href = payload.download_url;
+            return;
+        }
+        if (payload.status === 'failed') {
+            link.classList.remove('disabled');
+            alert(payload.error || 'No se pudo generar la exportación.');
+            return;
+        }
+        setTimeout(() => {
+            fetch(payload.status_url, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(next => pollExport(link, next))
+                .catch(() => link.classList.remove('disabled'));
+        }, 1500);
+    };
+
+    document.querySelectorAll('[data-export-link]').forEach(link => {
+        link.addEventListener('click', (e) => {
+            e.preventDefault();
+            if (link.classList.contains('disabled')) return;
+            link.classList.add('disabled');
+            fetch(link.href, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(payload => pollExport(link, payload))
+                .catch(() => link.classList.remove('disabled'));
+        });
+    });
 });
 
 // Uso este helper de CSRF para peticiones fetch POST en Django.